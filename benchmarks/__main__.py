@@ -0,0 +1,143 @@
+# benchmarks/__main__.py
+
+"""
+    python -m benchmarks                     compare with benchmarks/baseline.json
+    python -m benchmarks -k stream           only the benchmarks matching "stream"
+    python -m benchmarks --threshold 5       fail past a 5% slow down
+    python -m benchmarks --save              store the results as the new baseline
+
+Exit status 1 when a benchmark regressed past the threshold. Redis and
+postgres come from the usual config (REDIS_URL, SERVICE_NAME=distributor
+plus POSTGRES_*); benchmarks needing them are skipped when unreachable.
+
+Logs below WARNING are dropped: the log calls are still paid for, as in
+production, but their output does not flood the report.
+"""
+
+# built ins
+import argparse
+import asyncio
+import sys
+
+# installed
+import asyncpg
+from loguru import logger as log
+
+# user defined formula
+# imported for their @benchmark registrations
+from benchmarks import (
+    bench_candles,
+    bench_orders,
+    bench_sizing,
+    bench_storage,
+    bench_stream,
+)
+from benchmarks.harness import (
+    BASELINE_PATH,
+    REGRESSION,
+    comparing,
+    loading_baseline,
+    running_all,
+    saving_baseline,
+)
+from core.db.postgres import postgres_client
+from core.db.redis import redis_client
+
+
+async def checking_redis() -> str:
+    """return: why redis is unavailable, None when it answers"""
+
+    try:
+        pool = await redis_client.get_pool()
+        await asyncio.wait_for(pool.ping(), 2)
+
+    except Exception as error:
+        return f"redis unavailable ({error.__class__.__name__})"
+
+
+async def checking_postgres() -> str:
+    """return: why postgres is unavailable, None when it answers"""
+
+    if not postgres_client.dsn:
+        return "postgres not configured (SERVICE_NAME=distributor)"
+
+    try:
+        connection = await asyncpg.connect(postgres_client.dsn, timeout=2)
+        await connection.close()
+
+    except Exception as error:
+        return f"postgres unavailable ({error.__class__.__name__})"
+
+
+def reporting(
+    results: dict,
+    comparison: dict,
+) -> None:
+    """ """
+
+    print(
+        f"{'benchmark':<28} {'best ops/s':>14} {'median':>14} {'unit':<10} {'change':>8}  status"
+    )
+
+    for name, measured in results.items():
+
+        status, change = comparison[name]
+
+        if measured.get("skipped"):
+            print(
+                f"{name:<28} {'-':>14} {'-':>14} {measured['unit']:<10} {'':>8}  {measured['skipped']}"
+            )
+            continue
+
+        change = "" if change is None else f"{change:+.1f}%"
+
+        print(
+            f"{name:<28} {measured['best']:>14,.1f} {measured['ops_per_second']:>14,.1f} {measured['unit']:<10} {change:>8}  {status}"
+        )
+
+
+async def main() -> int:
+    """ """
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-k", dest="pattern", help="only names containing it")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="update the baseline")
+
+    args = parser.parse_args()
+
+    log.remove()
+    log.add(sys.stderr, level="WARNING")
+
+    try:
+        results = await running_all(
+            args.pattern,
+            {"redis": checking_redis, "postgres": checking_postgres},
+        )
+
+    finally:
+        await postgres_client.close_pool()
+
+    baseline = loading_baseline(args.baseline)["results"]
+
+    comparison = comparing(results, baseline, args.threshold)
+
+    reporting(results, comparison)
+
+    if args.save:
+        saving_baseline(results, args.baseline)
+        print(f"baseline saved in {args.baseline}")
+        return 0
+
+    regressions = [k for k, (status, _) in comparison.items() if status == REGRESSION]
+
+    if regressions:
+        print(f"regressed past {args.threshold}%: {', '.join(regressions)}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,53 @@
+# benchmarks/bench_candles.py
+
+"""
+Candle pattern analysis of the strategies
+"""
+
+# installed
+import numpy as np
+
+# user defined formula
+from benchmarks.harness import benchmark
+from src.scripts.market_understanding.price_action.candles_analysis import (
+    candles_analysis,
+)
+
+CANDLES = 100
+
+
+def get_candles(count: int = CANDLES) -> list:
+    """ohlc without tick nor volume, as cleaned up by get_and_clean_up_candles_data"""
+
+    candles = []
+
+    close = 100_000.0
+
+    for i in range(count):
+
+        open = close
+        close = open + ((i * 7919) % 200 - 100)
+
+        candles.append(
+            dict(
+                open=open,
+                high=max(open, close) + (i % 13) * 5,
+                low=min(open, close) - (i % 11) * 5,
+                close=close,
+            )
+        )
+
+    return candles
+
+
+@benchmark("candles_analysis", unit="candles")
+def analysing_candles():
+    """ """
+
+    candles = get_candles()
+
+    def running() -> int:
+        candles_analysis(np, candles, 3)
+        return len(candles)
+
+    return running
@@ -0,0 +1,57 @@
+# benchmarks/bench_orders.py
+
+"""
+Open orders cache maintenance on user.changes events
+"""
+
+# user defined formula
+from benchmarks.harness import benchmark
+from src.scripts.deribit.caching import update_cached_orders
+
+OPEN_ORDERS = 500
+EVENTS = 200
+
+
+def get_order(
+    i: int,
+    order_state: str = "open",
+) -> dict:
+    """ """
+
+    return dict(
+        order_id=f"ETH-{70_000_000 + i}",
+        instrument_name="ETH-PERPETUAL",
+        label=f"hedgingSpot-open-{1_750_000_000_000 + i}",
+        order_state=order_state,
+        amount=10,
+        price=2_500.0 + i % 50,
+        direction="sell",
+    )
+
+
+@benchmark("update_cached_orders", unit="events")
+def updating_cached_orders():
+    """
+    each event opens an order and closes an older one: the cache stays at
+    OPEN_ORDERS, like a book of resting orders being refreshed
+    """
+
+    events = [
+        dict(
+            orders=[get_order(OPEN_ORDERS + i), get_order(i, "cancelled")],
+            trades=[],
+        )
+        for i in range(EVENTS)
+    ]
+
+    open_orders = [get_order(i) for i in range(OPEN_ORDERS)]
+
+    def running() -> int:
+        orders_all = list(open_orders)
+
+        for event in events:
+            update_cached_orders(orders_all, event)
+
+        return len(events)
+
+    return running
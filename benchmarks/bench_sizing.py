@@ -0,0 +1,91 @@
+# benchmarks/bench_sizing.py
+
+"""
+Hedging spot sizing: decision surface of sizing_surface against the scalar
+functions of hedging_spot, called once per grid point
+"""
+
+# installed
+import numpy as np
+
+# user defined formula
+from benchmarks.harness import benchmark
+from src.scripts.deribit.strategies.hedging import hedging_spot, sizing_surface
+
+MARKET_CONDITIONS = [
+    dict(neutral=True),
+    dict(weak_bullish=True),
+    dict(weak_bearish=True),
+    dict(weak_bearish=True, bearish=True),
+    dict(weak_bearish=True, bearish=True, strong_bearish=True),
+]
+
+
+def get_axes() -> dict:
+    """100 x 40 x 5 x 5 = 100k points"""
+
+    return dict(
+        notional=np.linspace(10_000, 1_000_000, 100),
+        sum_my_trades_currency_strategy=np.linspace(-1_000_000, 100_000, 40),
+        market_conditions=MARKET_CONDITIONS,
+        weighted_factor_medium=[1, 3, 5, 8, 13],
+    )
+
+
+@benchmark("sizing_surface", unit="points")
+def sweeping_sizing_surface():
+    """ """
+
+    axes = get_axes()
+
+    def running() -> int:
+        surface = sizing_surface.sweeping(**axes)
+        return surface["opening_size"].size
+
+    return running
+
+
+@benchmark("sizing_scalar", unit="points", repeat=15)
+def sweeping_sizing_scalar():
+    """the same surface, point by point"""
+
+    axes = get_axes()
+
+    futures_instruments = [dict(instrument_name="BTC-PERPETUAL", min_trade_amount=10)]
+
+    conditions = [
+        {k: bool(o.get(k)) for k in sizing_surface.MARKET_CONDITION_KEYS}
+        for o in axes["market_conditions"]
+    ]
+
+    def running() -> int:
+
+        points = 0
+
+        for notional in axes["notional"]:
+            for sum_trades in axes["sum_my_trades_currency_strategy"]:
+                for condition in conditions:
+
+                    max_position = hedging_spot.size_to_be_hedged(
+                        notional * -1, sum_trades, sum_trades > 0, condition
+                    )
+
+                    for medium in axes["weighted_factor_medium"]:
+
+                        factor = hedging_spot.get_waiting_time_factor(
+                            dict(medium=medium, extreme=10),
+                            condition["strong_bearish"],
+                            condition["bearish"],
+                        )
+                        hedging_spot.determine_opening_size(
+                            "BTC-PERPETUAL",
+                            futures_instruments,
+                            "sell",
+                            max_position,
+                            factor,
+                        )
+                        points += 1
+
+        return points
+
+    return running
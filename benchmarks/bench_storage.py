@@ -0,0 +1,127 @@
+# benchmarks/bench_storage.py
+
+"""
+Persistence paths: sqlite json tables, postgres OHLC, pickle caches
+"""
+
+# built ins
+import os
+import shutil
+import sqlite3
+import tempfile
+
+# user defined formula
+from benchmarks.harness import benchmark
+from core.db import sqlite as db_mgt
+from core.db.postgres import postgres_client
+from src.shared.utils import pickling
+
+ROWS = 2_000
+PICKLED_ITEMS = 100
+APPENDS = 200
+
+BENCH_TABLE = "bench_ohlc1_btc_perp_json"
+
+
+def get_candle(i: int) -> dict:
+    """ """
+
+    return dict(
+        tick=1_750_000_000_000 + i * 60_000,
+        open=104_000.0 + i,
+        high=104_050.0 + i,
+        low=103_950.0 + i,
+        close=104_010.0 + i,
+        volume=12.5,
+        cost=1_300_000.0,
+    )
+
+
+@benchmark("sqlite_insert_tables", unit="rows")
+def inserting_sqlite():
+    """one insert_tables call with a list: a single transaction"""
+
+    directory = tempfile.mkdtemp(prefix="bench_sqlite_")
+    database = os.path.join(directory, "bench.db")
+
+    with sqlite3.connect(database) as connection:
+        connection.execute(
+            f"""
+            CREATE TABLE {BENCH_TABLE} (
+                id INTEGER PRIMARY KEY,
+                data TEXT,
+                tick INTEGER GENERATED ALWAYS AS (JSON_EXTRACT (data, '$.tick')) VIRTUAL UNIQUE
+            )
+            """
+        )
+
+    rounds = iter(range(1_000))
+
+    async def running() -> int:
+        # fresh ticks every round, OR IGNORE would skip the rows otherwise
+        offset = next(rounds) * ROWS
+        await db_mgt.insert_tables(
+            BENCH_TABLE,
+            [get_candle(offset + i) for i in range(ROWS)],
+            database,
+        )
+        return ROWS
+
+    def cleaning() -> None:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return running, cleaning
+
+
+@benchmark("postgres_insert_ohlc", unit="rows", requires=("postgres",))
+async def inserting_postgres():
+    """insert_ohlc row by row, one round trip per candle"""
+
+    await postgres_client.start_pool()
+
+    async with postgres_client._pool.acquire() as conn:
+        await conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {BENCH_TABLE} (data JSONB, tick BIGINT)"
+        )
+
+    candles = [get_candle(i) for i in range(ROWS // 10)]
+
+    async def running() -> int:
+        for candle in candles:
+            await postgres_client.insert_ohlc(BENCH_TABLE, candle)
+        return len(candles)
+
+    async def cleaning() -> None:
+        async with postgres_client._pool.acquire() as conn:
+            await conn.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+
+    return running, cleaning
+
+
+@benchmark("pickle_append_and_replace", unit="appends")
+def appending_pickle():
+    """ticker cache capped at PICKLED_ITEMS, the whole file is rewritten per append"""
+
+    directory = tempfile.mkdtemp(prefix="bench_pickle_")
+    file_name = os.path.join(directory, "ticker.pkl")
+
+    tickers = [
+        dict(change_id=i, timestamp=1_750_000_000_000 + i, mark_price=104_000.0 + i)
+        for i in range(PICKLED_ITEMS + APPENDS)
+    ]
+
+    pickling.dump_data_as_list(file_name, tickers[:PICKLED_ITEMS])
+
+    def running() -> int:
+        for ticker in tickers[PICKLED_ITEMS:]:
+            pickling.append_and_replace_items_based_on_qty(
+                file_name,
+                ticker,
+                PICKLED_ITEMS,
+            )
+        return APPENDS
+
+    def cleaning() -> None:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return running, cleaning
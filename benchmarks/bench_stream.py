@@ -0,0 +1,129 @@
+# benchmarks/bench_stream.py
+
+"""
+Market stream path: receiver XADD, stream entry parsing, distributor handling
+"""
+
+# installed
+import orjson
+
+# user defined formula
+from benchmarks.harness import benchmark
+from core.db.redis import redis_client
+from core.latency import WS_RECEIVE, XADD, latency_tracer
+from src.services.distributor.deribit import distributing_ws_data
+
+MESSAGES = 5_000
+BENCH_STREAM = "stream:benchmark"
+
+
+def get_ticker(i: int) -> dict:
+    """an incremental_ticker notification as sent by Deribit"""
+
+    return {
+        "timestamp": 1_750_000_000_000 + i,
+        "stats": {"volume_usd": 1.2e9, "volume": 12_000.5, "price_change": -0.4},
+        "state": "open",
+        "settlement_price": 104_250.1,
+        "open_interest": 1_100_000_000,
+        "min_price": 103_000.0,
+        "max_price": 106_000.0,
+        "mark_price": 104_500.0 + i % 10,
+        "last_price": 104_499.5,
+        "instrument_name": "BTC-PERPETUAL",
+        "index_price": 104_480.2,
+        "funding_8h": 0.00001,
+        "estimated_delivery_price": 104_480.2,
+        "current_funding": 0.0,
+        "best_bid_price": 104_499.5,
+        "best_bid_amount": 25_000.0,
+        "best_ask_price": 104_500.0,
+        "best_ask_amount": 30_000.0,
+    }
+
+
+def get_stream_messages(count: int = MESSAGES) -> list:
+    """entries as batched by the receiver before xadd_bulk"""
+
+    return [
+        {
+            "channel": "incremental_ticker.BTC-PERPETUAL",
+            "data": orjson.dumps(get_ticker(i)).decode("utf-8"),
+            "timestamp": str(1_750_000_000_000 + i),
+            "exchange": "deribit",
+            "trace": latency_tracer.stamping(latency_tracer.starting(WS_RECEIVE), XADD),
+        }
+        for i in range(count)
+    ]
+
+
+def get_stream_entries(count: int = MESSAGES) -> list:
+    """entries as returned by XREADGROUP: bytes field names and values"""
+
+    return [
+        {k.encode("utf-8"): v for k, v in redis_client.encode_stream_message(o).items()}
+        for o in get_stream_messages(count)
+    ]
+
+
+@benchmark("encode_stream_message", unit="messages")
+def encode_stream_message():
+    """ """
+
+    messages = get_stream_messages()
+
+    def running() -> int:
+        for message in messages:
+            redis_client.encode_stream_message(message)
+        return len(messages)
+
+    return running
+
+
+@benchmark("parse_stream_message", unit="messages")
+def parse_stream_message():
+    """ """
+
+    entries = get_stream_entries()
+
+    def running() -> int:
+        for entry in entries:
+            redis_client.parse_stream_message(entry)
+        return len(entries)
+
+    return running
+
+
+@benchmark("process_message", unit="messages")
+def process_message():
+    """distributor handling of ticker entries, in memory caches only"""
+
+    entries = get_stream_entries()
+
+    state = distributing_ws_data.get_initial_state()
+
+    async def running() -> int:
+        for i, entry in enumerate(entries):
+            await distributing_ws_data.process_message(f"{i}-0", entry, state)
+        return len(entries)
+
+    return running
+
+
+@benchmark("xadd_bulk", unit="messages", requires=("redis",))
+def xadd_bulk():
+    """receiver batches of 50 entries, as flushed by process_messages"""
+
+    messages = get_stream_messages()
+    batches = [messages[i : i + 50] for i in range(0, len(messages), 50)]
+
+    async def running() -> int:
+        for batch in batches:
+            await redis_client.xadd_bulk(BENCH_STREAM, batch)
+        return len(messages)
+
+    async def cleaning() -> None:
+        pool = await redis_client.get_pool()
+        await pool.delete(BENCH_STREAM)
+
+    return running, cleaning
@@ -0,0 +1,288 @@
+# benchmarks/harness.py
+
+"""
+Minimal benchmark runner with a stored baseline
+
+A benchmark is a factory registered with @benchmark. The factory does the
+setup (sync or async) and returns the measured callable, optionally with a
+cleanup callable: (running, cleaning). running (sync or async) does a fixed
+amount of work and returns how many operations it did.
+
+    @benchmark("parse_stream_message", unit="messages")
+    def parse_stream_message():
+        messages = [...]
+
+        def running() -> int:
+            for o in messages:
+                redis_client.parse_stream_message(o)
+            return len(messages)
+
+        return running
+
+Each benchmark is run once to warm up, then `repeat` times. Every round is
+bracketed by a short fixed workload measuring how fast the machine runs at
+that moment; the round rate divided by it (relative) hardly moves when the
+whole machine speeds up or slows down, which raw rates do by tens of
+percent on shared hosts. The median relative rate is compared with the
+baseline, against the threshold as given: single rounds, the best one
+included, still jump by 20% or more between runs, their median does not.
+The best and median raw rates are reported alongside.
+Benchmarks that need a service (redis, postgres) are skipped when it cannot
+be reached, so the pure ones still run on a laptop.
+"""
+
+# built ins
+import inspect
+import os
+import platform
+import statistics
+import time
+from typing import Any, Callable, Dict, Tuple
+
+# installed
+import orjson
+from dataclassy import dataclass
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+CALIBRATION_OPERATIONS = 50_000
+
+OK = "ok"
+REGRESSION = "regression"
+IMPROVEMENT = "improvement"
+NEW = "new"
+SKIPPED = "skipped"
+
+
+@dataclass(unsafe_hash=True, slots=True)
+class Benchmark:
+    """ """
+
+    name: str
+    factory: Callable
+    unit: str = "ops"
+    requires: Tuple = ()
+    repeat: int = 21
+
+
+registered: Dict[str, Benchmark] = {}
+
+
+def benchmark(
+    name: str,
+    unit: str = "ops",
+    requires: tuple = (),
+    repeat: int = 21,
+) -> Callable:
+    """decorator registering a benchmark factory"""
+
+    def registering(factory: Callable) -> Callable:
+        registered[name] = Benchmark(name, factory, unit, tuple(requires), repeat)
+        return factory
+
+    return registering
+
+
+async def awaiting(result: Any) -> Any:
+    """ """
+
+    return await result if inspect.isawaitable(result) else result
+
+
+def calibrating(operations: int = CALIBRATION_OPERATIONS) -> float:
+    """
+    return: operations per second of a fixed pure python workload, the
+        speed the machine runs at right now
+    """
+
+    started = time.perf_counter()
+
+    counts = {}
+
+    for i in range(operations):
+        key = i % 97
+        counts[key] = counts.get(key, 0) + i * 2
+
+    return operations / (time.perf_counter() - started)
+
+
+async def measuring(
+    running: Callable,
+    repeat: int,
+) -> Tuple[list, list]:
+    """
+    return: operations per second of each round, warm up excluded, and
+        the same rates relative to the machine speed around each round
+    """
+
+    await awaiting(running())
+
+    rates = []
+    relatives = []
+
+    for _ in range(repeat):
+
+        speed = calibrating()
+
+        started = time.perf_counter()
+        operations = await awaiting(running())
+        elapsed = time.perf_counter() - started
+
+        speed = (speed + calibrating()) / 2
+
+        rates.append(operations / elapsed if elapsed else 0.0)
+        relatives.append(rates[-1] / speed)
+
+    return rates, relatives
+
+
+async def running_benchmark(bench: Benchmark) -> dict:
+    """ """
+
+    prepared = await awaiting(bench.factory())
+
+    running, cleaning = prepared if isinstance(prepared, tuple) else (prepared, None)
+
+    try:
+        rates, relatives = await measuring(running, bench.repeat)
+
+    finally:
+        if cleaning is not None:
+            await awaiting(cleaning())
+
+    return dict(
+        unit=bench.unit,
+        ops_per_second=round(statistics.median(rates), 2),
+        best=round(max(rates), 2),
+        min=round(min(rates), 2),
+        max=round(max(rates), 2),
+        relative=statistics.median(relatives),
+    )
+
+
+def get_compared_rate(measured: dict, reference: dict) -> Tuple[float, float]:
+    """
+    return: (measured, baseline) rates to compare, the calibrated medians
+        when both sides have them, else the raw medians
+    """
+
+    key = (
+        "relative"
+        if measured.get("relative") and reference.get("relative")
+        else "ops_per_second"
+    )
+
+    return measured.get(key), reference.get(key)
+
+
+def comparing(
+    current: dict,
+    baseline: dict,
+    threshold: float,
+) -> dict:
+    """
+    current, baseline: {name: {"relative": ..., "ops_per_second": ...}}
+    threshold: tolerated change, in percent of the baseline
+    return: {name: (status, change in percent)}, a lower throughput is a negative change
+    """
+
+    result = {}
+
+    for name, measured in current.items():
+
+        if measured.get("skipped"):
+            result[name] = (SKIPPED, None)
+            continue
+
+        rate, reference = get_compared_rate(measured, baseline.get(name, {}))
+
+        if not reference:
+            result[name] = (NEW, None)
+            continue
+
+        change = (rate - reference) / reference * 100
+
+        if change < -threshold:
+            status = REGRESSION
+
+        elif change > threshold:
+            status = IMPROVEMENT
+
+        else:
+            status = OK
+
+        result[name] = (status, round(change, 1))
+
+    return result
+
+
+def loading_baseline(path: str = BASELINE_PATH) -> dict:
+    """ """
+
+    try:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+
+    except FileNotFoundError:
+        return {"results": {}}
+
+
+def saving_baseline(
+    results: dict,
+    path: str = BASELINE_PATH,
+) -> None:
+    """merged into the stored one: a filtered run only updates its benchmarks"""
+
+    baseline = loading_baseline(path)
+
+    baseline["machine"] = dict(
+        python=platform.python_version(),
+        platform=platform.platform(),
+        processor=platform.processor() or platform.machine(),
+    )
+
+    baseline["results"].update(
+        {k: v for k, v in results.items() if not v.get("skipped")}
+    )
+
+    with open(path, "wb") as f:
+        f.write(
+            orjson.dumps(baseline, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+        )
+
+
+async def running_all(
+    pattern: str = None,
+    availability: Dict[str, Callable] = None,
+) -> dict:
+    """
+    availability: {service: async check returning why it is unavailable, or None}
+    """
+
+    availability = availability or {}
+    unavailable = {}
+    results = {}
+
+    for name, bench in registered.items():
+
+        if pattern and pattern not in name:
+            continue
+
+        reasons = []
+
+        for service in bench.requires:
+
+            if service not in unavailable:
+                check = availability.get(service)
+                unavailable[service] = await check() if check else None
+
+            if unavailable[service]:
+                reasons.append(unavailable[service])
+
+        if reasons:
+            results[name] = dict(unit=bench.unit, skipped="; ".join(reasons))
+            continue
+
+        results[name] = await running_benchmark(bench)
+
+    return results
@@ -0,0 +1,137 @@
+# core\db\codecs.py
+
+"""
+Payload codecs of the Redis streams, pubsub messages and snapshot hashes
+
+    json          orjson, the historical format, always available
+    msgpack       binary, smaller and faster to decode for nested payloads
+    <codec>+zstd  either of them, zstd compressed when the encoded payload
+                  reaches REDIS_COMPRESS_MIN_BYTES (zstandard installed)
+
+The codec in use travels with the payload, so consumers never need to be
+configured and keep reading what older publishers wrote:
+    stream entries  a `codec` field next to `data` (absent: json)
+    pubsub/hashes   json as is, any other codec framed as
+                    MAGIC + codec name + b"\\x00" + payload
+MAGIC (0xc1) is neither valid json nor valid msgpack as a first byte.
+
+REDIS_CODEC picks what publishers write: msgpack by default when installed,
+json otherwise.
+"""
+
+# built ins
+import os
+from typing import Any, Tuple, Union
+
+# installed
+import orjson
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+ZSTD = "zstd"
+
+MAGIC = b"\xc1"
+
+COMPRESS_MIN_BYTES = int(os.getenv("REDIS_COMPRESS_MIN_BYTES", 16_384))
+
+
+def get_codec() -> str:
+    """codec written by this process"""
+
+    return os.getenv("REDIS_CODEC", MSGPACK if msgpack else JSON)
+
+
+def serializing(
+    obj: Any,
+    codec: str,
+) -> bytes:
+    """ """
+
+    if codec == JSON:
+        return orjson.dumps(obj)
+
+    if codec == MSGPACK:
+        return msgpack.packb(obj, use_bin_type=True)
+
+    raise ValueError(f"unknown codec {codec}")
+
+
+def deserializing(
+    payload: bytes,
+    codec: str,
+) -> Any:
+    """ """
+
+    if codec == JSON:
+        return orjson.loads(payload)
+
+    if codec == MSGPACK:
+        return msgpack.unpackb(payload, raw=False)
+
+    raise ValueError(f"unknown codec {codec}")
+
+
+def encoding(
+    obj: Any,
+    codec: str = None,
+) -> Tuple[str, bytes]:
+    """
+    return: (codec, payload), codec suffixed with +zstd when compressed
+    """
+
+    codec = codec or get_codec()
+
+    payload = serializing(obj, codec)
+
+    if zstandard and len(payload) >= COMPRESS_MIN_BYTES:
+        return f"{codec}+{ZSTD}", zstandard.ZstdCompressor().compress(payload)
+
+    return codec, payload
+
+
+def decoding(
+    payload: Union[bytes, str],
+    codec: str = JSON,
+) -> Any:
+    """ """
+
+    codec, _, compression = codec.partition("+")
+
+    if compression == ZSTD:
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+
+    return deserializing(payload, codec)
+
+
+def sealing(
+    obj: Any,
+    codec: str = None,
+) -> bytes:
+    """self describing payload, for pubsub messages and hash fields"""
+
+    codec, payload = encoding(obj, codec)
+
+    if codec == JSON:
+        return payload
+
+    return MAGIC + codec.encode() + b"\x00" + payload
+
+
+def unsealing(payload: Union[bytes, str]) -> Any:
+    """ """
+
+    if isinstance(payload, bytes) and payload[:1] == MAGIC:
+        codec, _, payload = payload[1:].partition(b"\x00")
+        return decoding(payload, codec.decode())
+
+    return orjson.loads(payload)
@@ -81,13 +81,27 @@ class PostgresClient:
             self._pool = None
 
     async def insert_ohlc(self, table_name: str, candle: dict):
+        # tick is the partition key, it cannot be generated from data
         query = f"""
-            INSERT INTO {table_name} (data)
-            VALUES ($1)
+            INSERT INTO {table_name} (data, tick)
+            VALUES ($1, $2)
         """
         await self.start_pool()
         async with self._pool.acquire() as conn:
-            await conn.execute(query, orjson.dumps(candle))
+            await conn.execute(query, orjson.dumps(candle), candle["tick"])
+
+    async def upsert_ohlc(self, table_name: str, candles: list) -> None:
+        # one round trip for the whole batch, a tick already stored is refreshed
+        query = f"""
+            INSERT INTO {table_name} (data, tick)
+            VALUES ($1, $2)
+            ON CONFLICT (tick) DO UPDATE SET data = EXCLUDED.data
+        """
+        await self.start_pool()
+        async with self._pool.acquire() as conn:
+            await conn.executemany(
+                query, [(orjson.dumps(o), o["tick"]) for o in candles]
+            )
 
     async def insert_trade_or_order(self, data: dict):
         currency = (
@@ -149,6 +163,39 @@ class PostgresClient:
         async with self._pool.acquire() as conn:
             await conn.execute(query, filter_value)
 
+    async def delete_rows_below(
+        self,
+        table: str,
+        column: str,
+        cutoff: int,
+    ) -> int:
+        """
+        Delete every row whose column is below cutoff, return the row count
+        """
+        query = f"DELETE FROM {table} WHERE {column} < $1"
+
+        await self.start_pool()
+        async with self._pool.acquire() as conn:
+            status = await conn.execute(query, cutoff)
+
+        # asyncpg returns the command tag, e.g. "DELETE 5000"
+        return int(status.split()[-1])
+
+    async def fetch(self, query: str, *args) -> list:
+        await self.start_pool()
+        async with self._pool.acquire() as conn:
+            return await conn.fetch(query, *args)
+
+    async def execute(self, query: str, *args) -> str:
+        await self.start_pool()
+        async with self._pool.acquire() as conn:
+            return await conn.execute(query, *args)
+
+    async def fetch_value(self, query: str, *args) -> Any:
+        await self.start_pool()
+        async with self._pool.acquire() as conn:
+            return await conn.fetchval(query, *args)
+
     async def querying_arithmetic_operator(
         self,
         item: str,
@@ -226,4 +273,5 @@ delete_row = postgres_client.delete_row
 insert_trade_or_order = postgres_client.insert_trade_or_order
 fetch = postgres_client.fetch_active_trades
 insert_ohlc = postgres_client.insert_ohlc
+upsert_ohlc = postgres_client.upsert_ohlc
 update_status = postgres_client.update_status_data
@@ -4,13 +4,18 @@
 Consolidated Redis client with connection pooling
 """
 
+import asyncio
 import os
 import time
 import logging
 import orjson
+import redis
 import redis.asyncio as aioredis
 from typing import Any, Dict, List, Optional, Union
 
+from core.db import codecs
+from core.latency import PUBSUB_PUBLISH, latency_tracer
+from core.metrics import registry
 from src.shared.config.config import config
 
 # Configure logger
@@ -18,12 +23,13 @@ log = logging.getLogger(__name__)
 
 
 async def stream_health_check():
+    # stream commands live on the pool, not on CustomRedisClient
+    pool = await redis_client.get_pool()
+
     return {
-        "length": await client_redis.xlen("stream:market_data"),
-        "pending": await client_redis.xpending(
-            "stream:market_data", "dispatcher_group"
-        ),
-        "consumers": await client_redis.xinfo_consumers(
+        "length": await pool.xlen("stream:market_data"),
+        "pending": await pool.xpending("stream:market_data", "dispatcher_group"),
+        "consumers": await pool.xinfo_consumers(
             "stream:market_data", "dispatcher_group"
         ),
     }
@@ -70,10 +76,16 @@ async def publishing_result(
 
         channel = message["params"]["channel"]
 
+        # traced data (see core.latency) records its publish time
+        data = message["params"].get("data")
+
+        if isinstance(data, dict) and "trace" in data:
+            latency_tracer.stamping(data["trace"], PUBSUB_PUBLISH)
+
         # publishing message
         await client_redis.publish(
             channel,
-            orjson.dumps(message),
+            codecs.sealing(message),
         )
 
     except Exception as error:
@@ -202,8 +214,92 @@ async def publishing_specific_purposes(
         )
 
 
+# exceptions of a command that tell the connection, not the command, failed
+CONNECTION_ERRORS = (
+    redis.exceptions.ConnectionError,
+    redis.exceptions.TimeoutError,
+    ConnectionError,
+    TimeoutError,
+    OSError,  # socket.gaierror included
+)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+BREAKER_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+breaker_state = registry.gauge(
+    "redis_breaker_state", "Redis circuit breaker: 0 closed, 1 half open, 2 open"
+)
+breaker_transitions = registry.counter(
+    "redis_breaker_transitions_total", "Redis circuit breaker transitions", ("state",)
+)
+connection_failures = registry.counter(
+    "redis_connection_failures_total", "Redis commands failed on the connection"
+)
+
+
+class CircuitBreaker:
+    """
+    closed     commands go through, failure_threshold consecutive connection
+               failures open the breaker
+    open       commands fail fast with ConnectionError for cooldown seconds
+    half_open  after the cooldown: commands go through again, the first
+               success closes the breaker, the first failure reopens it
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = int(os.getenv("REDIS_BREAKER_FAILURES", 3)),
+        cooldown: float = float(os.getenv("REDIS_BREAKER_COOLDOWN", 5)),
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def transitioning(self, state: str) -> None:
+        """ """
+        if state != self.state:
+            log.warning(f"Redis circuit breaker {self.state} -> {state}")
+            self.state = state
+            breaker_state.labels().setting(BREAKER_STATES[state])
+            breaker_transitions.labels(state).increment()
+
+    def allowing(self) -> bool:
+        """ """
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.transitioning(HALF_OPEN)
+        return True
+
+    def recording_success(self) -> None:
+        """ """
+        self.failures = 0
+        self.transitioning(CLOSED)
+
+    def recording_failure(self) -> None:
+        """ """
+        self.failures += 1
+        connection_failures.labels().increment()
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self.transitioning(OPEN)
+
+
 class CustomRedisClient:
-    """Singleton Redis client with connection pooling"""
+    """
+    Singleton Redis client with connection pooling
+
+    Commands are never preceded by a health check: the pool is created
+    lazily, the breaker is fed by the outcome of the commands themselves
+    and by a background probe (supervising) that pings every
+    REDIS_PROBE_INTERVAL seconds, off the hot path. A connection failure
+    drops the pool, the next command rebuilds it.
+    """
 
     _instance = None
 
@@ -211,82 +307,125 @@ class CustomRedisClient:
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance.pool = None
-            # Initialize circuit breaker state
-            cls._instance._circuit_open = False
-            cls._instance._last_failure = 0
+            cls._instance.breaker = CircuitBreaker()
+            cls._instance.supervisor = None
+            # last version written per (hash key, field), see put_many
+            cls._instance._versions = {}
         return cls._instance
 
     async def get_pool(self) -> aioredis.Redis:
         """Get or create Redis connection pool"""
 
-        # Circuit breaker logic (5-second cooldown)
-        if self._circuit_open and time.time() - self._last_failure < 5:
+        if not self.breaker.allowing():
             raise ConnectionError("Redis circuit breaker open")
 
-        redis_url = config["redis"]["url"]
-        redis_db = config["redis"]["db"]
+        if self.pool is None:
+
+            redis_url = config["redis"]["url"]
+            redis_db = config["redis"]["db"]
+
+            # no connection is opened until the first command
+            self.pool = aioredis.from_url(
+                redis_url,
+                db=redis_db,
+                encoding="utf-8",
+                decode_responses=False,
+                socket_connect_timeout=5,
+                socket_keepalive=True,
+                max_connections=50,
+            )
+            log.info(f"Created Redis pool for {redis_url}")
+
+        self.starting_supervisor()
+
+        return self.pool
+
+    def starting_supervisor(self) -> None:
+        """one probe per event loop, started with the first pool lookup"""
 
         try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        if (
+            self.supervisor is None
+            or self.supervisor.done()
+            or self.supervisor.get_loop() is not loop
+        ):
+            self.supervisor = loop.create_task(self.supervising())
+
+    async def supervising(
+        self,
+        interval: float = float(os.getenv("REDIS_PROBE_INTERVAL", 5)),
+    ) -> None:
+        """background health probe"""
 
-            if self.pool is None or not await self.is_pool_connected():
+        while True:
+
+            await asyncio.sleep(interval)
+
+            if self.breaker.state == OPEN and not self.breaker.allowing():
+                continue
+
+            try:
+                pool = self.pool
+                if pool is None:
+                    pool = await self.get_pool()
+                await asyncio.wait_for(pool.ping(), timeout=interval)
+                self.breaker.recording_success()
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as error:
+                log.warning(f"Redis health probe failed: {error}")
+                await self.recording_failure()
+
+    async def recording_failure(self) -> None:
+        """drop the pool, its connections may all be dead"""
+
+        self.breaker.recording_failure()
+
+        pool, self.pool = self.pool, None
+
+        if pool is not None:
+            try:
+                await pool.connection_pool.disconnect()
+            except Exception:
+                pass
+
+    async def executing(self, command: str, *args, **kwargs) -> Any:
+        """one command, its outcome fed to the breaker"""
+
+        pool = await self.get_pool()
 
-                for attempt in range(3):
-                    try:
-                        self.pool = aioredis.from_url(
-                            redis_url,
-                            db=redis_db,
-                            encoding="utf-8",
-                            decode_responses=False,
-                            socket_connect_timeout=5,
-                            socket_keepalive=True,
-                            max_connections=50,
-                        )
-                        log.info(f"Created Redis pool for {redis_url}")
-                        break  # Success, exit retry loop
-                    except socket.gaierror:
-                        if attempt < 2:
-                            log.warning(f"DNS resolution failed (attempt {attempt+1}/3), retrying...")
-                            await asyncio.sleep(0.5 * (attempt + 1))
-                        else:
-                            raise
-
-            return self.pool
-        except Exception as e:
-            self._circuit_open = True
-            self._last_failure = time.time()
-            self.pool = None
-            raise
-        
-    async def is_pool_connected(self) -> bool:
-        """Check if the connection pool is still valid"""
-        if self.pool is None:
-            return False
-        
         try:
-            # Test connection with a simple command
-            await self.pool.ping()
-            return True
-        except Exception:
-            return False
-        
+            result = await getattr(pool, command)(*args, **kwargs)
+
+        except CONNECTION_ERRORS:
+            await self.recording_failure()
+            raise
+
+        self.breaker.recording_success()
+
+        return result
+
     async def publish(self, channel: str, message: Union[Dict, str]) -> None:
         """Publish message to Redis channel"""
-        pool = await self.get_pool()
         if isinstance(message, dict):
-            message = orjson.dumps(message).decode("utf-8")
-        await pool.publish(channel, message)
+            message = codecs.sealing(message)
+        await self.executing("publish", channel, message)
 
     async def save_to_hash(self, hash_key: str, field: str, data: Any) -> None:
         """Save data to Redis hash field"""
-        pool = await self.get_pool()
         if not isinstance(data, (str, bytes)):
             data = orjson.dumps(data).decode("utf-8")
-        await pool.hset(hash_key, field, data)
+        await self.executing("hset", hash_key, field, data)
 
     async def get_from_hash(self, hash_key: str, field: str) -> Optional[Any]:
         """Retrieve data from Redis hash field"""
-        pool = await self.get_pool()
-        data = await pool.hget(hash_key, field)
+        data = await self.executing("hget", hash_key, field)
         if data:
             try:
                 return orjson.loads(data)
@@ -294,6 +433,135 @@ class CustomRedisClient:
                 return data
         return None
 
+    async def put_many(
+        self,
+        key: str,
+        snapshots: Dict[str, Any],
+        versions: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """
+        Store the latest snapshot of many fields of a hash in one HSET
+
+        Args:
+            key: Redis hash, e.g. RedisKeys.TICKER
+            snapshots: {field: object}, e.g. {instrument_name: ticker}
+            versions: {field: version} (timestamp, change_id ...); a field
+                whose version is not newer than the last one written by
+                this process is skipped
+
+        Returns:
+            Number of fields written
+        """
+        if versions:
+            snapshots = {
+                field: snapshot
+                for field, snapshot in snapshots.items()
+                if field not in versions
+                or self._versions.get((key, field)) is None
+                or versions[field] > self._versions[(key, field)]
+            }
+
+        if not snapshots:
+            return 0
+
+        await self.executing(
+            "hset",
+            key,
+            mapping={
+                field: codecs.sealing(snapshot) for field, snapshot in snapshots.items()
+            },
+        )
+
+        for field in snapshots:
+            if versions and field in versions:
+                self._versions[(key, field)] = versions[field]
+
+        return len(snapshots)
+
+    @staticmethod
+    def decode_snapshot(data: Optional[bytes]) -> Optional[Any]:
+        """ """
+        if data is None:
+            return None
+        try:
+            return codecs.unsealing(data)
+        except Exception:
+            return data
+
+    async def get_many(
+        self,
+        key: str,
+        fields: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Read many snapshots of a hash in one round trip
+
+        Args:
+            key: Redis hash
+            fields: fields to read (HMGET), all of them when None (HGETALL)
+
+        Returns:
+            {field: object}, None for the missing fields
+        """
+        if fields is None:
+            result = await self.executing("hgetall", key)
+            return {
+                field.decode("utf-8"): self.decode_snapshot(data)
+                for field, data in result.items()
+            }
+
+        if not fields:
+            return {}
+
+        result = await self.executing("hmget", key, fields)
+        return {
+            field: self.decode_snapshot(data) for field, data in zip(fields, result)
+        }
+
+    async def get_many_keys(
+        self,
+        fields_by_key: Dict[str, Optional[List[str]]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        get_many of several hashes, pipelined in one round trip
+
+        Args:
+            fields_by_key: {key: fields}, fields None for the whole hash
+
+        Returns:
+            {key: {field: object}}
+        """
+        pool = await self.get_pool()
+
+        try:
+            async with pool.pipeline(transaction=False) as pipe:
+                for key, fields in fields_by_key.items():
+                    if fields is None:
+                        pipe.hgetall(key)
+                    else:
+                        pipe.hmget(key, fields or [""])
+                results = await pipe.execute()
+
+        except CONNECTION_ERRORS:
+            await self.recording_failure()
+            raise
+
+        self.breaker.recording_success()
+
+        snapshots = {}
+        for (key, fields), result in zip(fields_by_key.items(), results):
+            if fields is None:
+                snapshots[key] = {
+                    field.decode("utf-8"): self.decode_snapshot(data)
+                    for field, data in result.items()
+                }
+            else:
+                snapshots[key] = {
+                    field: self.decode_snapshot(data)
+                    for field, data in zip(fields, result)
+                }
+        return snapshots
+
     async def xadd(
         self,
         stream_name: str,
@@ -308,11 +576,10 @@ class CustomRedisClient:
             data: Dictionary of data to add
             maxlen: Maximum stream length (trims old entries)
         """
-        pool = await self.get_pool()
-        # Use msgpack for more efficient serialization
-        await pool.xadd(
+        await self.executing(
+            "xadd",
             stream_name,
-            data,  # Pass directly as field-value pairs
+            self.encode_stream_message(data),
             maxlen=maxlen,
             approximate=True,  # More efficient trimming
         )
@@ -325,8 +592,8 @@ class CustomRedisClient:
         count: int = 10,
         block: int = 5000,
     ) -> list:
-        pool = await self.get_pool()
-        return await pool.xreadgroup(
+        return await self.executing(
+            "xreadgroup",
             groupname=group_name,
             consumername=consumer_name,
             streams={stream_name: ">"},
@@ -335,12 +602,19 @@ class CustomRedisClient:
         )
 
     @staticmethod
-    def encode_stream_message(message: dict) -> dict:
-        """Encode message values for Redis stream compatibility"""
+    def encode_stream_message(message: dict, codec: Optional[str] = None) -> dict:
+        """
+        Encode message values for Redis stream compatibility
+
+        data, when a dict or a list, is encoded with the codec of the process
+        (see core.db.codecs) and the codec named in a `codec` field
+        """
         encoded = {}
         for key, value in message.items():
             try:
-                if isinstance(value, (dict, list)):
+                if key == "data" and isinstance(value, (dict, list)):
+                    encoded["codec"], encoded[key] = codecs.encoding(value, codec)
+                elif isinstance(value, (dict, list)):
                     encoded[key] = orjson.dumps(value)
                 else:
                     encoded[key] = str(value).encode("utf-8")
@@ -353,15 +627,19 @@ class CustomRedisClient:
     def parse_stream_message(message_data: Dict[bytes, bytes]) -> dict:
         """Parse Redis stream message into Python types"""
         result = {}
+        # entries written before the codec field are json
+        codec = message_data.get(b"codec", codecs.JSON.encode()).decode("utf-8")
         for key, value in message_data.items():
             try:
                 k = key.decode("utf-8")
 
                 # Handle special fields
-                if k == "data":
+                if k == "codec":
+                    continue
+                elif k == "data":
                     try:
-                        result[k] = orjson.loads(value)
-                    except orjson.JSONDecodeError:
+                        result[k] = codecs.decoding(value, codec)
+                    except Exception:
                         result[k] = value.decode("utf-8")
                 else:
                     result[k] = value.decode("utf-8")
@@ -374,31 +652,34 @@ class CustomRedisClient:
         self,
         stream_name: str,
         messages: List[dict],
-        maxlen: int = 500,
+        maxlen: Optional[int] = None,
     ) -> None:
-
-        # pre-trim
-        await self.trim_stream(stream_name, maxlen)
+        """
+        maxlen: length cap applied by each XADD; by default nothing is trimmed
+            here, retention is left to core.db.stream_retention
+        raise: ConnectionError while the breaker is open
+        """
 
         max_retries = 3
         retry_delays = [0.1, 0.5, 2.0]  # Seconds to wait between retries
         
         for attempt in range(max_retries + 1):
+            # an open breaker fails fast, outside the failures counted below:
+            # the batch is left to the caller and the cooldown keeps running
+            pool = await self.get_pool()
+
             try:
-                pool = await self.get_pool()
                 async with pool.pipeline(transaction=False) as pipe:
                     for message in messages:
                         encoded_msg = self.encode_stream_message(message)
                         pipe.xadd(stream_name, encoded_msg, maxlen=maxlen, approximate=True)
                     await pipe.execute()
+                self.breaker.recording_success()
                 log.debug(f"Sent {len(messages)} messages to {stream_name}")
                 return  # Success, exit the method
-            except (redis.exceptions.ConnectionError, 
-                    redis.exceptions.TimeoutError,
-                    ConnectionRefusedError,
-                    OSError) as e:
-                # Reset pool on connection errors
-                self.pool = None
+            except CONNECTION_ERRORS as e:
+                # drops the pool, the next attempt reconnects
+                await self.recording_failure()
                 
                 if attempt < max_retries:
                     delay = retry_delays[attempt]
@@ -413,8 +694,7 @@ class CustomRedisClient:
                 break
             
     async def xack(self, stream_name: str, group_name: str, message_id: str) -> None:
-        pool = await self.get_pool()
-        await pool.xack(stream_name, group_name, message_id)
+        await self.executing("xack", stream_name, group_name, message_id)
 
     async def create_consumer_group(self, stream_name: str, group_name: str) -> None:
         pool = await self.get_pool()
@@ -472,9 +752,9 @@ class CustomRedisClient:
         Returns:
             List of (message_id, message_data) tuples
         """
-        pool = await self.get_pool()
         try:
-            messages = await pool.xreadgroup(
+            messages = await self.executing(
+                "xreadgroup",
                 groupname=group_name,
                 consumername=consumer_name,
                 streams={stream_name: ">"},  # Deliver never-seen messages
@@ -493,13 +773,11 @@ class CustomRedisClient:
         self, stream_name: str, group_name: str, message_id: str
     ) -> None:
         """Acknowledge successful processing of message"""
-        pool = await self.get_pool()
-        await pool.xack(stream_name, group_name, message_id)
+        await self.executing("xack", stream_name, group_name, message_id)
 
     async def trim_stream(self, stream_name: str, maxlen: int = 1000) -> None:
         """Trim stream to prevent excessive memory usage"""
-        pool = await self.get_pool()
-        await pool.xtrim(stream_name, maxlen=maxlen, approximate=True)
+        await self.executing("xtrim", stream_name, maxlen=maxlen, approximate=True)
 
     async def publish_error(self, error_data: Dict[str, Any]):
         """Publish errors to Redis channel"""
@@ -12,7 +12,11 @@ from loguru import logger as log
 from typing import Any, Dict, List, Optional, cast
 
 # user defined formulas
-from core.db.redis import publishing_specific_purposes
+from core.db.redis import (
+    publishing_specific_purposes,
+    redis_client as global_redis_client,
+)
+from src.scripts.deribit.versioned_cache import VersionedPublisher
 
 from src.shared.utils import (
     error_handling,
@@ -23,12 +27,48 @@ from src.shared.utils import (
 _redis_client = None
 
 
+# v_trading_all_active is broadcast as deltas between periodic snapshots,
+# numbered per channel in redis as every process writing trades publishes
+_trading_active_publisher = VersionedPublisher("sqlite_record_updating")
+
+
 def set_redis_client(redis_client):
     """Set Redis client for error reporting"""
     global _redis_client
     _redis_client = redis_client
 
 
+async def publishing_trading_active_update() -> None:
+    """Broadcast the rows of v_trading_all_active changed since the last call"""
+
+    query_trades = f"SELECT * FROM  v_trading_all_active"
+
+    my_trades_currency_all_transactions: list = await executing_query_with_return(
+        query_trades
+    )
+
+    client_redis = _redis_client or await global_redis_client.get_pool()
+
+    data = _trading_active_publisher.building_message(
+        dict(my_trades=my_trades_currency_all_transactions),
+        await _trading_active_publisher.numbering(client_redis),
+    )
+
+    result = {}
+    result.update({"params": {}})
+    result.update({"method": "subscription"})
+    result["params"].update({"data": data})
+
+    if data["kind"] == "snapshot":
+        await _trading_active_publisher.saving_snapshot(client_redis)
+
+    await publishing_specific_purposes(
+        "sqlite_record_updating",
+        result,
+        client_redis=client_redis,
+    )
+
+
 def get_db_path():
     """Get SQLite database path with Docker compatibility"""
     base_path = os.environ.get("DB_BASE_PATH", "/app/data")
@@ -137,11 +177,16 @@ async def insert_tables(
 
             if "json" in table_name:
 
-                # input was in list format. Insert them to db one by one
+                # input was in list format. Insert them in a single transaction
                 if isinstance(params, list):
-                    for param in params:
-                        insert_table_json = f"""INSERT  OR IGNORE INTO {table_name} (data) VALUES (json ('{json.dumps(param)}'));"""
-                        await db.execute(insert_table_json)
+                    insert_table_json = f"""INSERT  OR IGNORE INTO {table_name} (data) VALUES (json (?));"""
+
+                    await db.execute("BEGIN;")
+                    await db.executemany(
+                        insert_table_json,
+                        [(json.dumps(param),) for param in params],
+                    )
+                    await db.execute("COMMIT;")
 
                 # input is in dict format. Insert them to db directly
                 if isinstance(params, dict):
@@ -166,21 +211,7 @@ async def insert_tables(
 
         if "my_trades" in table_name or "order" in table_name:
 
-            query_trades = f"SELECT * FROM  v_trading_all_active"
-
-            my_trades_currency_all_transactions: list = (
-                await executing_query_with_return(query_trades)
-            )
-
-            result = {}
-            result.update({"params": {}})
-            result.update({"method": "subscription"})
-            result["params"].update({"data": my_trades_currency_all_transactions})
-
-            await publishing_specific_purposes(
-                "sqlite_record_updating",
-                result,
-            )
+            await publishing_trading_active_update()
 
 
 async def querying_table(
@@ -291,21 +322,41 @@ async def deleting_row(
 
         if "my_trades" in table or "order" in table:
 
-            query_trades = f"SELECT * FROM  v_trading_all_active"
+            await publishing_trading_active_update()
 
-            my_trades_currency_all_transactions: list = (
-                await executing_query_with_return(query_trades)
-            )
 
-            result = {}
-            result.update({"params": {}})
-            result.update({"method": "subscription"})
-            result["params"].update({"data": my_trades_currency_all_transactions})
+async def deleting_rows_below(
+    table: str,
+    column: str,
+    cutoff: int,
+    database: str = None,
+) -> int:
+    """
+    delete every row whose column is below cutoff in a single statement
 
-            await publishing_specific_purposes(
-                "sqlite_record_updating",
-                result,
-            )
+    return: number of rows deleted
+    """
+
+    if database is None:
+        database = get_db_path()
+
+    query_table = f"DELETE FROM {table} WHERE {column} < ?"
+
+    try:
+        async with aiosqlite.connect(database, isolation_level=None) as db:
+
+            await db.execute("pragma journal_mode=wal;")
+
+            cursor = await db.execute(query_table, (cutoff,))
+
+            return cursor.rowcount
+
+    except Exception as error:
+        log.critical(f"deleting_rows_below {query_table} {error}")
+
+        error_handling.parse_error_message(error)
+
+        return 0
 
 
 async def querying_duplicated_transactions(
@@ -449,21 +500,122 @@ async def update_status_data(
 
         if "my_trades" in table or "order" in table:
 
-            query_trades = f"SELECT * FROM  v_trading_all_active"
+            await publishing_trading_active_update()
 
-            my_trades_currency_all_transactions: list = (
-                await executing_query_with_return(query_trades)
-            )
 
-            result = {}
-            result.update({"params": {}})
-            result.update({"method": "subscription"})
-            result["params"].update({"data": my_trades_currency_all_transactions})
+async def update_status_data_many(
+    table: str,
+    data_column: str,
+    filter: str,
+    filter_values: list,
+    new_value: any,
+    database: str = None,
+) -> None:
+    """
+    set one column to the same value for many rows in a single statement,
+    e.g. flag every matched trade_id of a cleanup cycle as closed at once
+    """
 
-            await publishing_specific_purposes(
-                "sqlite_record_updating",
-                result,
-            )
+    if not filter_values:
+        return
+
+    # stay below SQLITE_MAX_VARIABLE_NUMBER of older sqlite builds
+    chunk_size = 500
+
+    query = None
+
+    try:
+
+        if database is None:
+            database = get_db_path()
+
+        async with aiosqlite.connect(
+            database,
+            isolation_level=None,
+        ) as db:
+
+            await db.execute("pragma journal_mode=wal;")
+
+            await db.execute("BEGIN;")
+
+            for start in range(0, len(filter_values), chunk_size):
+
+                chunk = filter_values[start : start + chunk_size]
+
+                placeholders = ", ".join(["?"] * len(chunk))
+
+                query = f"""UPDATE {table} SET {data_column} = ? WHERE {filter} IN ({placeholders});"""
+
+                await db.execute(query, (new_value, *chunk))
+
+            await db.execute("COMMIT;")
+
+    except Exception as error:
+        log.critical(f" ERROR {error}")
+        log.info(f"query update status data many {query}")
+
+        error_handling.parse_error_message(error)
+
+    finally:
+
+        if "my_trades" in table or "order" in table:
+
+            await publishing_trading_active_update()
+
+
+async def update_data_many(
+    table: str,
+    filter: str,
+    rows: list,
+    database: str = None,
+) -> None:
+    """
+    write several json fields of many rows in one transaction
+
+    rows: [{filter: value, field_1: new_value, field_2: ...}, ...]
+        every row carries the same fields
+    """
+
+    if not rows:
+        return
+
+    columns = [o for o in rows[0] if o != filter]
+
+    json_paths = ", ".join([f"'$.{o}', ?" for o in columns])
+
+    query = f"""UPDATE {table} SET data = JSON_SET (data, {json_paths}) WHERE {filter} = ?;"""
+
+    values = [tuple(row[o] for o in columns) + (row[filter],) for row in rows]
+
+    try:
+
+        if database is None:
+            database = get_db_path()
+
+        async with aiosqlite.connect(
+            database,
+            isolation_level=None,
+        ) as db:
+
+            await db.execute("pragma journal_mode=wal;")
+
+            await db.execute("BEGIN;")
+
+            await db.executemany(query, values)
+
+            await db.execute("COMMIT;")
+
+    except Exception as error:
+        log.critical(f" ERROR {error}")
+        log.info(f"query update data many {query}")
+
+        error_handling.parse_error_message(error)
+
+    finally:
+
+        if "my_trades" in table or "order" in table:
+
+            await publishing_trading_active_update()
 
 
 def querying_open_interest(
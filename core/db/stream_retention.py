@@ -0,0 +1,170 @@
+# core\db\stream_retention.py
+
+"""
+Time based retention of the Redis streams
+
+Writers only XADD. A timer trims each stream with XTRIM MINID: entries
+older than the window go, unless a consumer group still needs them. The
+oldest entry a group needs is its oldest pending (delivered, not yet
+acknowledged) one, or else the first one after its last-delivered-id.
+A slow or stopped consumer therefore keeps its backlog instead of losing
+it; stream_retention_lag_entries shows how far behind the slowest is.
+
+Trimming is approximate (~): Redis only drops whole radix tree nodes,
+so a few entries older than MINID may stay until a later pass. No entry
+at or above MINID is ever removed.
+"""
+
+# built ins
+import asyncio
+import os
+import time
+from typing import Optional
+
+# installed
+from dataclassy import dataclass
+from loguru import logger as log
+
+# user defined formula
+from core.metrics import registry
+
+entries_trimmed = registry.counter(
+    "stream_entries_trimmed_total", "Stream entries removed by retention", ("stream",)
+)
+retention_lag = registry.gauge(
+    "stream_retention_lag_entries",
+    "Entries not yet delivered to the slowest consumer group",
+    ("stream",),
+)
+
+
+def parsing_id(entry_id) -> tuple:
+    """'1700000000000-3' -> (1700000000000, 3)"""
+
+    if isinstance(entry_id, bytes):
+        entry_id = entry_id.decode()
+
+    ms, _, sequence = str(entry_id).partition("-")
+
+    return int(ms), int(sequence or 0)
+
+
+def formatting_id(entry_id: tuple) -> str:
+    """ """
+
+    return f"{entry_id[0]}-{entry_id[1]}"
+
+
+def get_next_id(entry_id: tuple) -> tuple:
+    """ """
+
+    return entry_id[0], entry_id[1] + 1
+
+
+def computing_minid(
+    window_minid: tuple,
+    groups: list,
+) -> tuple:
+    """
+    groups: [(last_delivered_id, oldest_pending_id or None)] of every
+        consumer group of the stream
+    return: the lowest id to keep
+    """
+
+    needed = [
+        oldest_pending if oldest_pending else get_next_id(last_delivered)
+        for last_delivered, oldest_pending in groups
+    ]
+
+    return min([window_minid] + needed)
+
+
+@dataclass(unsafe_hash=True, slots=True)
+class StreamRetention:
+    """ """
+
+    stream: str
+    window_ms: int = int(os.getenv("STREAM_RETENTION_WINDOW_MS", 10 * 60_000))
+    interval: float = float(os.getenv("STREAM_RETENTION_INTERVAL", 30))
+
+    async def fetching_groups(
+        self,
+        pool: object,
+    ) -> list:
+        """
+        return: [(last_delivered_id, oldest_pending_id or None, lag)]
+        """
+
+        groups = []
+
+        for group in await pool.xinfo_groups(self.stream):
+
+            oldest_pending = None
+
+            if group["pending"]:
+                pending = await pool.xpending(self.stream, group["name"])
+                oldest_pending = parsing_id(pending["min"])
+
+            groups.append(
+                (
+                    parsing_id(group["last-delivered-id"]),
+                    oldest_pending,
+                    # entries not delivered yet, redis >= 7
+                    group.get("lag") or 0,
+                )
+            )
+
+        return groups
+
+    async def trimming(
+        self,
+        pool: object,
+        now: Optional[int] = None,
+    ) -> int:
+        """
+        return: entries trimmed
+        """
+
+        now = now or int(time.time() * 1000)
+
+        groups = await self.fetching_groups(pool)
+
+        minid = computing_minid(
+            (now - self.window_ms, 0),
+            [(delivered, pending) for delivered, pending, _ in groups],
+        )
+
+        retention_lag.labels(self.stream).setting(
+            max([lag for _, _, lag in groups], default=0)
+        )
+
+        trimmed = await pool.xtrim(
+            self.stream,
+            minid=formatting_id(minid),
+            approximate=True,
+        )
+
+        entries_trimmed.labels(self.stream).increment(trimmed)
+
+        return trimmed
+
+    async def running(
+        self,
+        client_redis: object,
+    ) -> None:
+        """
+        client_redis: CustomRedisClient, the pool is looked up on every pass
+        """
+
+        while True:
+
+            try:
+                trimmed = await self.trimming(await client_redis.get_pool())
+
+                if trimmed:
+                    log.debug(f"trimmed {trimmed} entries of {self.stream}")
+
+            except Exception as error:
+                log.warning(f"{self.stream} retention pass failed: {error}")
+
+            await asyncio.sleep(self.interval)
@@ -75,8 +75,8 @@ class ErrorHandler:
             "context": context or "Unspecified error",
             "stack_trace": traceback.format_exc(),
             "metadata": metadata or {},
-            "service": settings.SERVICE_NAME,
-            "environment": config.services.environment,
+            "service": config["services"]["name"],
+            "environment": config["services"]["environment"],
         }
 
     def wrap_async(self, func: Callable[..., Coroutine]) -> Callable[..., Coroutine]:
@@ -1,49 +1,269 @@
 # core/health.py
 
+"""
+Health and metrics surface of a service
+
+serving_metrics starts a tiny HTTP server (asyncio streams, no framework):
+    GET /metrics  Prometheus text format, see core.metrics
+    GET /health   health_check as json
+
+It also starts the event loop watchdog (core.watchdog) and the system
+control listener (core.profiling), so every service that serves metrics
+can be profiled at runtime.
+"""
+
+# built ins
+import asyncio
+import os
+
+# installed
+import orjson
+import psutil
+from loguru import logger as log
+
+# user defined formula
 from core.db.postgres import postgres_client
 from core.db.redis import redis_client
-import psutil
+from core.latency import latency_tracer
+from core.metrics import registry
+from core.profiling import runtime_profiler
+from core.watchdog import event_loop_lag, loop_watchdog
+from src.shared.config.constants import ServiceConstants
 
+STREAM_NAME = ServiceConstants.REDIS_STREAM_MARKET
+
+# seconds a client has to send its request line and headers
+REQUEST_TIMEOUT = float(os.getenv("METRICS_REQUEST_TIMEOUT", 5))
+GROUP_NAME = ServiceConstants.REDIS_GROUP_DISPATCHER
+
+stream_length = registry.gauge("redis_stream_length", "Entries in the market stream")
+stream_lag = registry.gauge(
+    "redis_stream_lag", "Entries not yet delivered to the consumer group"
+)
+stream_pending = registry.gauge(
+    "redis_stream_pending", "Delivered but unacknowledged entries (PEL size)"
+)
+pool_connections = registry.gauge(
+    "pool_connections", "Connections per pool and state", ("pool", "state")
+)
+memory_bytes = registry.gauge("process_memory_bytes", "Process memory", ("kind",))
+
+
+def get_pg_stats() -> dict:
+    """ """
 
-async def health_check():
-    # PostgreSQL connections
-    pg_stats = {}
     if postgres_client._pool and not postgres_client._pool._closed:
-        pg_stats = {
+        return {
             "connections": postgres_client._pool.get_size(),
             "idle": postgres_client._pool.get_idle_size(),
         }
 
-    # Redis connections
-    redis_stats = {}
+    return {}
+
+
+def get_redis_stats() -> dict:
+    """ """
+
+    # never opens a pool just to report on it
+    pool = redis_client.pool
+
+    if pool is None:
+        return {"breaker": redis_client.breaker.state}
+
+    connection_pool = pool.connection_pool
+
+    return {
+        "connections": len(connection_pool._in_use_connections)
+        + len(connection_pool._available_connections),
+        "in_use": len(connection_pool._in_use_connections),
+        "breaker": redis_client.breaker.state,
+    }
+
+
+async def get_stream_stats() -> dict:
+    """ """
+
+    pool = await redis_client.get_pool()
+
+    result = {"length": await pool.xlen(STREAM_NAME)}
+
+    for group in await pool.xinfo_groups(STREAM_NAME):
+
+        name = group["name"]
+        name = name.decode() if isinstance(name, bytes) else name
+
+        if name == GROUP_NAME:
+            result.update(
+                {
+                    "pending": group["pending"],
+                    # lag is only reported by redis >= 7
+                    "lag": group.get("lag") or 0,
+                }
+            )
+
+    return result
+
+
+async def collecting_runtime_metrics() -> None:
+    """refresh the sampled gauges right before a scrape"""
+
+    for pool_name, stats in (("postgres", get_pg_stats()), ("redis", get_redis_stats())):
+        for state, value in stats.items():
+            pool_connections.labels(pool_name, state).setting(value)
+
+    mem_info = psutil.Process().memory_info()
+    memory_bytes.labels("rss").setting(mem_info.rss)
+    memory_bytes.labels("vms").setting(mem_info.vms)
+
     try:
-        pool = await redis_client.get_pool()
-        redis_stats = {"connections": len(pool._connections)}
+        stream_stats = await get_stream_stats()
+
     except Exception:
-        pass
+        return
+
+    stream_length.labels().setting(stream_stats["length"])
+    stream_pending.labels().setting(stream_stats.get("pending", 0))
+    stream_lag.labels().setting(stream_stats.get("lag", 0))
+
+
+def getting_process_stats() -> dict:
+    """
+    blocking: memory_full_info walks /proc/self/smaps and open_files every
+    file descriptor, run it in a thread
+    """
 
-    # Memory diagnostics
     process = psutil.Process()
     mem_info = process.memory_full_info()
 
-    # Stream backlog monitoring
-    stream_backlog = 0
-    try:
-        stream_backlog = await redis_client.xlen("stream:market_data")
-    except Exception:
-        pass
-
-    return {
-        "postgres": pg_stats,
-        "redis": redis_stats,
-        "memory": {
+    return dict(
+        memory={
             "rss_mb": mem_info.rss / 1024 / 1024,
             "uss_mb": mem_info.uss / 1024 / 1024,
             "swap_mb": mem_info.swap / 1024 / 1024,
         },
-        "stream_backlog": stream_backlog,
-        "connections": {
+        connections={
             "open_files": len(process.open_files()),
             "threads": process.num_threads(),
         },
+    )
+
+
+async def health_check():
+    # Memory diagnostics, off the event loop
+    process_stats = await asyncio.to_thread(getting_process_stats)
+
+    # Stream backlog monitoring
+    stream_backlog = {}
+    try:
+        stream_backlog = await get_stream_stats()
+    except Exception:
+        pass
+
+    return {
+        "postgres": get_pg_stats(),
+        "redis": get_redis_stats(),
+        "memory": process_stats["memory"],
+        "stream_backlog": stream_backlog,
+        "event_loop_lag_seconds": event_loop_lag.labels().value,
+        "latency_us": latency_tracer.stats(),
+        "connections": process_stats["connections"],
     }
+
+
+async def reading_request_line(reader: asyncio.StreamReader) -> bytes:
+    """ """
+
+    request_line = await reader.readline()
+
+    # drain the headers, the requests we serve have no body
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+        pass
+
+    return request_line
+
+
+async def handling_request(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
+    """ """
+
+    try:
+        # one deadline for the whole request: an idle or slow client cannot
+        # hold the handler open
+        request_line = await asyncio.wait_for(
+            reading_request_line(reader),
+            REQUEST_TIMEOUT,
+        )
+
+        parts = request_line.decode("latin-1").split()
+        path = parts[1] if len(parts) > 1 else ""
+
+        if path.startswith("/metrics"):
+            await registry.collecting()
+            status = "200 OK"
+            content_type = "text/plain; version=0.0.4"
+            body = registry.rendering().encode()
+
+        elif path.startswith("/health"):
+            status = "200 OK"
+            content_type = "application/json"
+            body = orjson.dumps(await health_check())
+
+        else:
+            status = "404 Not Found"
+            content_type = "text/plain"
+            body = b"not found\n"
+
+        writer.write(
+            (
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode()
+            + body
+        )
+        await writer.drain()
+
+    except Exception as error:
+        log.warning(f"metrics request failed: {error}")
+
+    finally:
+        writer.close()
+
+
+async def serving_metrics(
+    port: int = None,
+    host: str = "0.0.0.0",
+) -> asyncio.AbstractServer:
+    """
+    start the /metrics and /health server, the event loop watchdog and
+    the system control listener
+    """
+
+    port = int(os.getenv("METRICS_PORT", 9100)) if port is None else port
+
+    registry.adding_collector(collecting_runtime_metrics)
+
+    server = await asyncio.start_server(handling_request, host, port)
+
+    loop_watchdog.starting(
+        threshold=float(os.getenv("LOOP_WATCHDOG_THRESHOLD", 0.25)),
+    )
+
+    runtime_profiler.starting()
+
+    log.info(f"metrics server listening on {host}:{port}")
+
+    return server
+
+
+async def stopping_metrics(server: asyncio.AbstractServer) -> None:
+    """Shutdown hook"""
+
+    loop_watchdog.stopping()
+    runtime_profiler.stopping()
+
+    server.close()
+    await server.wait_closed()
@@ -0,0 +1,298 @@
+# core/latency.py
+
+"""
+End-to-end latency tracing, from the Deribit WS frame to the order ack
+
+A trace is a small dict {stage: monotonic ns} that travels with the data:
+as a field of the market stream entries, then inside the message data
+published on pubsub. Every stamp records two latencies, in microseconds:
+    - stages[stage]: since the previous stamp of the trace
+    - end_to_end[stage]: since the first stamp of the trace
+
+time.monotonic_ns reads CLOCK_MONOTONIC, shared by every process (and
+container) on the same host, so stamps from the receiver, the distributor
+and the executor can be subtracted from each other.
+
+Histograms are HDR-style: log-linear buckets with a bounded relative error,
+O(1) recording and a fixed memory footprint regardless of the sample count.
+"""
+
+# built ins
+import time
+from typing import Any
+
+# installed
+import orjson
+
+WS_RECEIVE = "ws_receive"
+XADD = "xadd"
+XREADGROUP = "xreadgroup"
+HANDLER_START = "handler_start"
+HANDLER_END = "handler_end"
+PUBSUB_PUBLISH = "pubsub_publish"
+STRATEGY_DECISION = "strategy_decision"
+ORDER_ACK = "order_ack"
+
+STAGES = (
+    WS_RECEIVE,
+    XADD,
+    XREADGROUP,
+    HANDLER_START,
+    HANDLER_END,
+    PUBSUB_PUBLISH,
+    STRATEGY_DECISION,
+    ORDER_ACK,
+)
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def now_ns() -> int:
+    """ """
+    return time.monotonic_ns()
+
+
+class HdrHistogram:
+    """
+    Log-linear histogram of non negative integers
+
+    Values below 2**sub_bucket_bits are counted exactly. Above, each power
+    of two range is split into 2**(sub_bucket_bits - 1) buckets, so the
+    relative error stays below 1 / 2**(sub_bucket_bits - 1) (~1.6% with 7 bits).
+    """
+
+    __slots__ = (
+        "sub_bucket_bits",
+        "half_count",
+        "max_trackable",
+        "counts",
+        "count",
+        "total",
+        "min",
+        "max",
+    )
+
+    def __init__(
+        self,
+        sub_bucket_bits: int = 7,
+        max_trackable: int = 3_600_000_000,  # one hour in microseconds
+    ):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.half_count = 1 << (sub_bucket_bits - 1)
+        self.max_trackable = max_trackable
+        self.counts = [0] * (self.indexing(max_trackable) + 1)
+        self.resetting()
+
+    def resetting(self) -> None:
+        """ """
+
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def indexing(
+        self,
+        value: int,
+    ) -> int:
+        """ """
+
+        magnitude = value.bit_length() - self.sub_bucket_bits
+
+        if magnitude <= 0:
+            return value
+
+        return magnitude * self.half_count + (value >> magnitude)
+
+    def highest_equivalent(
+        self,
+        index: int,
+    ) -> int:
+        """largest value counted in the bucket at index"""
+
+        if index < 2 * self.half_count:
+            return index
+
+        magnitude = index // self.half_count - 1
+        sub_bucket = index - magnitude * self.half_count
+
+        return ((sub_bucket + 1) << magnitude) - 1
+
+    def recording(
+        self,
+        value: int,
+    ) -> None:
+        """ """
+
+        value = min(max(int(value), 0), self.max_trackable)
+
+        self.counts[self.indexing(value)] += 1
+        self.count += 1
+        self.total += value
+
+        if self.min is None or value < self.min:
+            self.min = value
+
+        if value > self.max:
+            self.max = value
+
+    def percentile(
+        self,
+        percentile: float,
+    ) -> int:
+        """ """
+
+        if not self.count:
+            return 0
+
+        target = max(1, round(self.count * percentile / 100))
+
+        running = 0
+
+        for index, count in enumerate(self.counts):
+
+            running += count
+
+            if running >= target:
+                return min(self.highest_equivalent(index), self.max)
+
+        return self.max
+
+    def merging(
+        self,
+        other: "HdrHistogram",
+    ) -> None:
+        """ """
+
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def snapshot(self) -> dict:
+        """ """
+
+        result = dict(
+            count=self.count,
+            min=self.min or 0,
+            mean=round(self.total / self.count, 1) if self.count else 0,
+            max=self.max,
+        )
+
+        for percentile in PERCENTILES:
+            result[f"p{percentile}"] = self.percentile(percentile)
+
+        return result
+
+
+def loading_trace(raw: Any) -> dict:
+    """trace as read back from a stream field or a message, {} when absent"""
+
+    if not raw:
+        return {}
+
+    if isinstance(raw, dict):
+        return raw
+
+    try:
+        trace = orjson.loads(raw)
+
+    except orjson.JSONDecodeError:
+        return {}
+
+    return trace if isinstance(trace, dict) else {}
+
+
+class LatencyTracer:
+    """Singleton holding the per stage histograms of the process"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.stages = {}
+            cls._instance.end_to_end = {}
+        return cls._instance
+
+    def starting(
+        self,
+        stage: str = WS_RECEIVE,
+        at: int = None,
+    ) -> dict:
+        """ """
+
+        return {stage: at or now_ns()}
+
+    def stamping(
+        self,
+        trace: dict,
+        stage: str,
+        at: int = None,
+    ) -> dict:
+        """
+        trace: mutated in place, nothing is recorded when it is empty
+        """
+
+        if not trace:
+            return trace
+
+        trace[stage] = at or now_ns()
+
+        self.recording_stamp(trace, stage)
+
+        return trace
+
+    def recording_stamp(
+        self,
+        trace: dict,
+        stage: str,
+    ) -> None:
+        """
+        records a stage already stamped in trace, e.g. once the write carrying
+        the stamp went through
+        """
+
+        at = trace.get(stage)
+
+        stamps = [v for k, v in trace.items() if k != stage]
+
+        if at is None or not stamps:
+            return
+
+        self.recording(self.stages, stage, at - max(stamps))
+        self.recording(self.end_to_end, stage, at - min(stamps))
+
+    def recording(
+        self,
+        histograms: dict,
+        stage: str,
+        elapsed_ns: int,
+    ) -> None:
+        """ """
+
+        histogram = histograms.get(stage)
+
+        if histogram is None:
+            histogram = histograms[stage] = HdrHistogram()
+
+        histogram.recording(elapsed_ns // 1000)
+
+    def stats(self) -> dict:
+        """percentiles in microseconds"""
+
+        return dict(
+            stages={k: v.snapshot() for k, v in self.stages.items()},
+            end_to_end={k: v.snapshot() for k, v in self.end_to_end.items()},
+        )
+
+
+# Global latency tracer instance
+latency_tracer = LatencyTracer()
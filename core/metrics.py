@@ -0,0 +1,238 @@
+# core/metrics.py
+
+"""
+In-process metrics registry rendered in the Prometheus text format
+
+Hot loops resolve their labelled child once and keep it; recording is then
+a single attribute update (counter/gauge) or an O(1) histogram bucket
+increment, with no locks nor allocation:
+
+    messages = registry.counter("messages_total", "...", ("channel",))
+    ...
+    messages.labels(channel).increment()
+
+Histograms are exported as Prometheus summaries (quantiles, sum, count)
+computed from an HdrHistogram, so no bucket layout has to be chosen upfront.
+Collectors are coroutine functions run right before each scrape, for values
+that are cheaper to sample than to track (stream lag, pool usage, RSS).
+"""
+
+# built ins
+from typing import Any, Awaitable, Callable, List
+
+# user defined formula
+from core.latency import PERCENTILES, HdrHistogram
+
+COUNTER = "counter"
+GAUGE = "gauge"
+SUMMARY = "summary"
+
+
+class Counter:
+    """ """
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def increment(
+        self,
+        amount: float = 1,
+    ) -> None:
+        """ """
+        self.value += amount
+
+
+class Gauge:
+    """ """
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def setting(
+        self,
+        value: float,
+    ) -> None:
+        """ """
+        self.value = value
+
+    def increment(
+        self,
+        amount: float = 1,
+    ) -> None:
+        """ """
+        self.value += amount
+
+
+class Metric:
+    """A metric family: one child per combination of label values"""
+
+    __slots__ = ("name", "help", "kind", "label_names", "children", "factory")
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        kind: str,
+        label_names: tuple,
+        factory: Callable[[], Any],
+    ):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.label_names = label_names
+        self.children = {}
+        self.factory = factory
+
+    def labels(self, *values: str) -> Any:
+        """ """
+
+        child = self.children.get(values)
+
+        if child is None:
+            child = self.children[values] = self.factory()
+
+        return child
+
+
+def escaping_label_value(value: Any) -> str:
+    """ """
+
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def formatting_labels(
+    names: tuple,
+    values: tuple,
+    extra: dict = None,
+) -> str:
+    """ """
+
+    pairs = [
+        f'{name}="{escaping_label_value(value)}"' for name, value in zip(names, values)
+    ]
+
+    pairs += [f'{k}="{v}"' for k, v in (extra or {}).items()]
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class MetricsRegistry:
+    """Singleton registry shared by the whole process"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.metrics = {}
+            cls._instance.collectors = []
+        return cls._instance
+
+    def registering(
+        self,
+        name: str,
+        help: str,
+        kind: str,
+        label_names: tuple,
+        factory: Callable[[], Any],
+    ) -> Metric:
+        """idempotent: modules re-registering the same name share the metric"""
+
+        metric = self.metrics.get(name)
+
+        if metric is None:
+            metric = self.metrics[name] = Metric(
+                name,
+                help,
+                kind,
+                tuple(label_names),
+                factory,
+            )
+
+        return metric
+
+    def counter(
+        self,
+        name: str,
+        help: str = "",
+        label_names: tuple = (),
+    ) -> Metric:
+        """ """
+        return self.registering(name, help, COUNTER, label_names, Counter)
+
+    def gauge(
+        self,
+        name: str,
+        help: str = "",
+        label_names: tuple = (),
+    ) -> Metric:
+        """ """
+        return self.registering(name, help, GAUGE, label_names, Gauge)
+
+    def histogram(
+        self,
+        name: str,
+        help: str = "",
+        label_names: tuple = (),
+    ) -> Metric:
+        """ """
+        return self.registering(name, help, SUMMARY, label_names, HdrHistogram)
+
+    def adding_collector(
+        self,
+        collector: Callable[[], Awaitable[None]],
+    ) -> None:
+        """ """
+
+        if collector not in self.collectors:
+            self.collectors.append(collector)
+
+    async def collecting(self) -> None:
+        """a failing collector must not break the scrape"""
+
+        for collector in self.collectors:
+            try:
+                await collector()
+            except Exception:
+                pass
+
+    def rendering(self) -> str:
+        """Prometheus text exposition format"""
+
+        lines: List[str] = []
+
+        for metric in self.metrics.values():
+
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+            for values, child in list(metric.children.items()):
+
+                labels = formatting_labels(metric.label_names, values)
+
+                if metric.kind != SUMMARY:
+                    lines.append(f"{metric.name}{labels} {child.value}")
+                    continue
+
+                for percentile in PERCENTILES:
+                    quantile_labels = formatting_labels(
+                        metric.label_names,
+                        values,
+                        {"quantile": percentile / 100},
+                    )
+                    lines.append(
+                        f"{metric.name}{quantile_labels} {child.percentile(percentile)}"
+                    )
+
+                lines.append(f"{metric.name}_sum{labels} {child.total}")
+                lines.append(f"{metric.name}_count{labels} {child.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry instance
+registry = MetricsRegistry()
@@ -0,0 +1,467 @@
+# core/profiling.py
+
+"""
+On demand profiling of a live service, driven through Redis pubsub
+
+Every service listens on RedisChannels.SYSTEM_CONTROL for json commands:
+    {"command": "profile", "target": "receiver", "seconds": 30, "format": "speedscope"}
+    {"command": "tracemalloc", "target": "distributor", "seconds": 60, "top": 25}
+
+target is a service name (SERVICE_NAME) or "all". The result is written in
+/app/data/profiles and its path is published on RedisChannels.SYSTEM_CONTROL_REPLY:
+    redis-cli SUBSCRIBE system_control.reply
+    redis-cli PUBLISH system_control '{"command": "profile", "target": "receiver"}'
+
+profile: a background thread samples the event loop thread's stack through
+sys._current_frames, so nothing is instrumented and the loop keeps running.
+Output is either collapsed stacks (flamegraph.pl, speedscope, inferno) or a
+speedscope json document.
+
+tracemalloc: tracing is only switched on for the window of the command (or
+reused when it already runs), then the top allocation sites are dumped.
+Leaving PYTHONTRACEMALLOC on permanently slows every allocation down.
+"""
+
+# built ins
+import asyncio
+import collections
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Union
+
+# installed
+import orjson
+from loguru import logger as log
+
+# user defined formula
+from core.db.redis import redis_client
+from src.shared.config.config import config
+from src.shared.config.constants import RedisChannels, ServiceConstants
+
+PROFILES_PATH = os.path.join(ServiceConstants.DB_BASE_PATH, "profiles")
+
+PROFILE = "profile"
+TRACEMALLOC = "tracemalloc"
+
+COLLAPSED = "collapsed"
+SPEEDSCOPE = "speedscope"
+
+EXTENSIONS = {
+    COLLAPSED: "folded",
+    SPEEDSCOPE: "speedscope.json",
+    TRACEMALLOC: "tracemalloc.txt",
+}
+
+MAX_SECONDS = 300
+MAX_TOP = 200
+
+
+def extracting_frames(
+    frame: object,
+    limit: int = 64,
+) -> tuple:
+    """
+    return: ((name, filename, lineno), ...) outermost first
+    """
+
+    frames = []
+
+    while frame is not None and len(frames) < limit:
+        code = frame.f_code
+        frames.append((code.co_name, code.co_filename, frame.f_lineno))
+        frame = frame.f_back
+
+    return tuple(reversed(frames))
+
+
+class SamplingProfiler:
+    """Samples the stack of one thread from another one"""
+
+    def __init__(
+        self,
+        thread_id: int,
+        interval: float = 0.005,
+    ):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = collections.Counter()
+        self.started_at = None
+        self.stopped_at = None
+
+    def sampling(
+        self,
+        seconds: float,
+    ) -> collections.Counter:
+        """blocking: run it in a thread"""
+
+        self.started_at = time.monotonic()
+        deadline = self.started_at + seconds
+
+        while time.monotonic() < deadline:
+
+            frame = sys._current_frames().get(self.thread_id)
+
+            if frame is not None:
+                self.samples[extracting_frames(frame)] += 1
+
+            # drop the reference: the frame keeps the whole stack alive
+            frame = None
+
+            time.sleep(self.interval)
+
+        self.stopped_at = time.monotonic()
+
+        return self.samples
+
+
+def formatting_frame(frame: tuple) -> str:
+    """ """
+
+    name, filename, lineno = frame
+
+    return f"{name} ({filename}:{lineno})"
+
+
+def rendering_collapsed(samples: collections.Counter) -> str:
+    """one line per unique stack: frame;frame;frame count"""
+
+    lines = [
+        f"{';'.join(formatting_frame(o) for o in stack)} {count}"
+        for stack, count in samples.most_common()
+    ]
+
+    return "\n".join(lines) + "\n"
+
+
+def rendering_speedscope(
+    samples: collections.Counter,
+    interval: float,
+    name: str,
+) -> dict:
+    """https://www.speedscope.app/file-format-schema.json, sampled profile"""
+
+    frames = []
+    frame_index = {}
+
+    stacks = []
+    weights = []
+
+    for stack, count in samples.most_common():
+
+        indexes = []
+
+        for frame in stack:
+
+            index = frame_index.get(frame)
+
+            if index is None:
+                index = frame_index[frame] = len(frames)
+                frames.append(dict(name=frame[0], file=frame[1], line=frame[2]))
+
+            indexes.append(index)
+
+        stacks.append(indexes)
+        weights.append(count * interval)
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "core.profiling",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": stacks,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+def rendering_tracemalloc(
+    snapshot: tracemalloc.Snapshot,
+    top: int,
+) -> str:
+    """ """
+
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        )
+    )
+
+    stats = snapshot.statistics("traceback")
+
+    total = sum(o.size for o in stats)
+
+    lines = [f"total traced: {total / 1024:.1f} KiB in {len(stats)} sites", ""]
+
+    for rank, stat in enumerate(stats[:top], 1):
+
+        lines.append(f"#{rank}: {stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        lines += stat.traceback.format(most_recent_first=True)
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def get_profile_path(
+    service: str,
+    kind: str,
+    directory: str = PROFILES_PATH,
+) -> str:
+    """ """
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+
+    return os.path.join(directory, f"{service}_{stamp}.{EXTENSIONS[kind]}")
+
+
+def writing_file(
+    path: str,
+    content: Union[str, bytes],
+) -> None:
+    """blocking: run it in a thread"""
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, "wb" if isinstance(content, bytes) else "w") as f:
+        f.write(content)
+
+
+class RuntimeProfiler:
+    """Singleton: executes the system control commands of the process"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.service = config["services"]["name"]
+            cls._instance.directory = PROFILES_PATH
+            cls._instance.loop_thread_id = None
+            cls._instance.running = set()
+            cls._instance.command_tasks = set()
+            cls._instance.listener_task = None
+        return cls._instance
+
+    def is_targeted(
+        self,
+        command: dict,
+    ) -> bool:
+        """ """
+
+        return command.get("target", "all") in ("all", self.service)
+
+    async def profiling(
+        self,
+        seconds: float = 30,
+        output: str = SPEEDSCOPE,
+        interval: float = 0.005,
+    ) -> str:
+        """
+        return: path of the written profile
+        """
+
+        if output not in (COLLAPSED, SPEEDSCOPE):
+            raise ValueError(f"unknown profile format {output}")
+
+        profiler = SamplingProfiler(
+            self.loop_thread_id or threading.main_thread().ident,
+            interval,
+        )
+
+        samples = await asyncio.to_thread(profiler.sampling, seconds)
+
+        path = get_profile_path(self.service, output, self.directory)
+
+        if output == COLLAPSED:
+            content = rendering_collapsed(samples)
+
+        else:
+            content = orjson.dumps(
+                rendering_speedscope(
+                    samples,
+                    interval,
+                    f"{self.service} {os.path.basename(path)}",
+                )
+            )
+
+        await asyncio.to_thread(writing_file, path, content)
+
+        return path
+
+    async def snapshotting_memory(
+        self,
+        seconds: float = 60,
+        top: int = 25,
+        frames: int = 5,
+    ) -> str:
+        """
+        return: path of the written top allocation sites
+        """
+
+        started_here = not tracemalloc.is_tracing()
+
+        if started_here:
+            tracemalloc.start(frames)
+
+        try:
+            # only the allocations made during the window are traced
+            if started_here:
+                await asyncio.sleep(seconds)
+
+            snapshot = tracemalloc.take_snapshot()
+
+        finally:
+            if started_here:
+                tracemalloc.stop()
+
+        content = await asyncio.to_thread(rendering_tracemalloc, snapshot, top)
+
+        path = get_profile_path(self.service, TRACEMALLOC, self.directory)
+
+        await asyncio.to_thread(writing_file, path, content)
+
+        return path
+
+    async def handling_command(
+        self,
+        command: dict,
+    ) -> dict:
+        """
+        return: the reply, with either the path of the result or the error
+        """
+
+        kind = command.get("command")
+
+        reply = dict(
+            service=self.service,
+            command=kind,
+            request_id=command.get("request_id"),
+        )
+
+        if kind not in (PROFILE, TRACEMALLOC):
+            return dict(reply, error=f"unknown command {kind}")
+
+        if kind in self.running:
+            return dict(reply, error=f"{kind} already running")
+
+        # a malformed command gets an error reply, not a dead listener
+        try:
+            seconds = min(float(command.get("seconds", 30)), MAX_SECONDS)
+            interval = max(float(command.get("interval", 0.005)), 0.001)
+            top = min(int(command.get("top", 25)), MAX_TOP)
+            frames = int(command.get("frames", 5))
+
+        except (TypeError, ValueError) as error:
+            return dict(reply, error=f"invalid arguments: {error}")
+
+        self.running.add(kind)
+
+        log.info(f"system control: {kind} for {seconds}s")
+
+        try:
+            if kind == PROFILE:
+                path = await self.profiling(
+                    seconds,
+                    command.get("format", SPEEDSCOPE),
+                    interval,
+                )
+
+            else:
+                path = await self.snapshotting_memory(seconds, top, frames)
+
+        except Exception as error:
+            return dict(reply, error=str(error))
+
+        finally:
+            self.running.discard(kind)
+
+        log.info(f"system control: {kind} written to {path}")
+
+        return dict(reply, path=path)
+
+    async def replying(
+        self,
+        command: dict,
+    ) -> None:
+        """ """
+
+        reply = await self.handling_command(command)
+
+        try:
+            await redis_client.publish(RedisChannels.SYSTEM_CONTROL_REPLY, reply)
+
+        except Exception as error:
+            log.warning(f"system control reply not published: {error} {reply}")
+
+    async def listening(self) -> None:
+        """runs on the event loop until cancelled, resubscribing after failures"""
+
+        self.loop_thread_id = threading.get_ident()
+
+        while True:
+
+            try:
+                pool = await redis_client.get_pool()
+
+                pubsub = pool.pubsub()
+
+                await pubsub.subscribe(RedisChannels.SYSTEM_CONTROL)
+
+                async for message in pubsub.listen():
+
+                    if message["type"] != "message":
+                        continue
+
+                    try:
+                        command = orjson.loads(message["data"])
+
+                    except orjson.JSONDecodeError:
+                        log.warning(f"invalid system control command {message['data']}")
+                        continue
+
+                    if not isinstance(command, dict) or not self.is_targeted(command):
+                        continue
+
+                    # executed aside: a profile lasts while the listener keeps reading
+                    task = asyncio.create_task(self.replying(command))
+                    self.command_tasks.add(task)
+                    task.add_done_callback(self.command_tasks.discard)
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as error:
+                log.warning(f"system control listener failed: {error}")
+                await asyncio.sleep(5)
+
+    def starting(self) -> None:
+        """call from the event loop thread"""
+
+        if self.listener_task is None or self.listener_task.done():
+            self.listener_task = asyncio.create_task(self.listening())
+
+    def stopping(self) -> None:
+        """ """
+
+        if self.listener_task is not None:
+            self.listener_task.cancel()
+
+        for task in list(self.command_tasks):
+            task.cancel()
+
+
+# Global runtime profiler instance
+runtime_profiler = RuntimeProfiler()
@@ -0,0 +1,219 @@
+# core/watchdog.py
+
+"""
+Event loop lag and slow callback watchdog
+
+A heartbeat coroutine wakes up every `interval` seconds and records how late
+it was scheduled (event loop lag). A sidecar thread watches the heartbeat:
+when it has not beaten for longer than `threshold`, the loop is blocked by a
+synchronous call, and the thread samples the loop thread's stack through
+sys._current_frames until the loop recovers. The most frequent stack of the
+episode is then reported as a slow callback, through the metrics surface and
+error_handler.
+
+This replaces PYTHONASYNCIODEBUG=1 in production: the cost is one sleep per
+interval on the loop and one cheap check per interval in the thread, and
+stacks are only walked while the loop is actually blocked.
+"""
+
+# built ins
+import asyncio
+import collections
+import sys
+import threading
+import time
+import traceback
+
+# installed
+from loguru import logger as log
+
+# user defined formula
+from core.metrics import registry
+
+event_loop_lag = registry.gauge(
+    "event_loop_lag_seconds", "Delay of the last scheduled wake up of the event loop"
+)
+event_loop_lag_histogram = registry.histogram(
+    "event_loop_lag_microseconds", "Delay of the scheduled wake ups of the event loop"
+)
+slow_callbacks = registry.counter(
+    "slow_callbacks_total", "Episodes of the event loop blocked", ("location",)
+)
+slow_callback_duration = registry.histogram(
+    "slow_callback_duration_microseconds", "How long the event loop stayed blocked"
+)
+
+
+class SlowCallback(RuntimeWarning):
+    """The event loop was blocked by a synchronous call"""
+
+
+def formatting_stack(
+    frame: object,
+    limit: int = 30,
+) -> tuple:
+    """
+    return: (location of the innermost frame, collapsed stack outermost first)
+    """
+
+    frames = traceback.extract_stack(frame, limit=limit)
+
+    collapsed = ";".join(f"{o.name} ({o.filename}:{o.lineno})" for o in frames)
+
+    innermost = frames[-1] if frames else None
+
+    location = (
+        f"{innermost.filename}:{innermost.lineno} {innermost.name}"
+        if innermost
+        else "unknown"
+    )
+
+    return location, collapsed
+
+
+class LoopWatchdog:
+    """Singleton: one watchdog per process, watching the main event loop"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.interval = 0.05
+            cls._instance.threshold = 0.25
+            cls._instance.last_beat = time.monotonic()
+            cls._instance.loop_thread_id = None
+            cls._instance.episodes = collections.deque(maxlen=100)
+            cls._instance.heartbeat_task = None
+            cls._instance.reporting_tasks = set()
+            cls._instance.sampler = None
+            cls._instance.stop_event = threading.Event()
+        return cls._instance
+
+    async def beating(self) -> None:
+        """runs on the loop: measures lag and reports finished episodes"""
+
+        lag_gauge = event_loop_lag.labels()
+        lag_histogram = event_loop_lag_histogram.labels()
+
+        while True:
+
+            expected = time.monotonic() + self.interval
+
+            await asyncio.sleep(self.interval)
+
+            now = time.monotonic()
+            self.last_beat = now
+
+            lag = max(0.0, now - expected)
+            lag_gauge.setting(lag)
+            lag_histogram.recording(lag * 1_000_000)
+
+            # reported aside: awaiting here would delay the next beat
+            while self.episodes:
+                task = asyncio.create_task(self.reporting(self.episodes.popleft()))
+                self.reporting_tasks.add(task)
+                task.add_done_callback(self.reporting_tasks.discard)
+
+    async def reporting(
+        self,
+        episode: dict,
+    ) -> None:
+        """ """
+
+        slow_callbacks.labels(episode["location"]).increment()
+        slow_callback_duration.labels().recording(episode["blocked_seconds"] * 1_000_000)
+
+        log.warning(
+            f"event loop blocked {episode['blocked_seconds']:.3f}s at {episode['location']}"
+        )
+
+        try:
+            # imported late: loading the handler pulls the notifiers' config
+            from core.error_handler import error_handler
+
+            await error_handler.capture(
+                SlowCallback(
+                    f"event loop blocked {episode['blocked_seconds']:.3f}s at {episode['location']}"
+                ),
+                context="LoopWatchdog",
+                metadata=episode,
+                severity="WARNING",
+            )
+
+        except Exception as error:
+            log.warning(f"slow callback not reported to error_handler: {error}")
+
+    def sampling(self) -> None:
+        """runs in the sidecar thread"""
+
+        stacks = collections.Counter()
+        blocked_since = None
+
+        while not self.stop_event.wait(self.interval):
+
+            silent_for = time.monotonic() - self.last_beat
+
+            if silent_for > self.threshold:
+
+                if blocked_since is None:
+                    blocked_since = self.last_beat
+
+                frame = sys._current_frames().get(self.loop_thread_id)
+
+                if frame is not None:
+                    stacks[formatting_stack(frame)] += 1
+
+                continue
+
+            if blocked_since is not None and stacks:
+
+                (location, collapsed), samples = stacks.most_common(1)[0]
+
+                self.episodes.append(
+                    dict(
+                        location=location,
+                        stack=collapsed,
+                        samples=samples,
+                        blocked_seconds=round(self.last_beat - blocked_since, 6),
+                    )
+                )
+
+            stacks.clear()
+            blocked_since = None
+
+    def starting(
+        self,
+        interval: float = None,
+        threshold: float = None,
+    ) -> None:
+        """call from the event loop thread"""
+
+        self.interval = interval or self.interval
+        self.threshold = threshold or self.threshold
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+
+        if self.heartbeat_task is None or self.heartbeat_task.done():
+            self.heartbeat_task = asyncio.create_task(self.beating())
+
+        if self.sampler is None or not self.sampler.is_alive():
+            self.stop_event.clear()
+            self.sampler = threading.Thread(
+                target=self.sampling,
+                name="loop-watchdog",
+                daemon=True,
+            )
+            self.sampler.start()
+
+    def stopping(self) -> None:
+        """ """
+
+        self.stop_event.set()
+
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+
+
+# Global watchdog instance
+loop_watchdog = LoopWatchdog()
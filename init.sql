@@ -30,70 +30,88 @@ CREATE TABLE instruments (
     contract_size INTEGER GENERATED ALWAYS AS ((data->>'contract_size')::INTEGER) STORED
 );
 
+-- OHLC tables are range partitioned by tick (unix ms): daily for the
+-- short time frames, monthly for the long ones. Partitions are created ahead
+-- of time and dropped once expired by src/services/cleaner/partitioning_db.py,
+-- so retention never deletes rows. A partition key cannot be a generated
+-- column, hence tick is written explicitly by the inserts.
+-- No default partition: it would rule out DETACH PARTITION CONCURRENTLY, so
+-- the maintenance job drops expired partitions without locking the table. A
+-- row needs its partition, hence partitions span the whole retention window
+-- plus the ones ahead. A tick holds one candle: UNIQUE (tick),
+-- allowed as tick is the partition key, is the conflict target of upsert_ohlc.
 CREATE TABLE ohlc60_btc_perp (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     data JSONB NOT NULL,
     open_interest REAL,
-    tick BIGINT GENERATED ALWAYS AS ((data->>'tick')::INTEBIGINTGER) STORED
-);
-CREATE INDEX idx_ohlc60_btc_perp_tick ON ohlc60_btc_perp (tick);
+    tick BIGINT NOT NULL,
+    PRIMARY KEY (tick, id),
+    UNIQUE (tick)
+) PARTITION BY RANGE (tick);
 
 CREATE TABLE ohlc15_btc_perp (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     data JSONB NOT NULL,
     open_interest REAL,
-    tick BIGINT GENERATED ALWAYS AS ((data->>'tick')::BIGINT) STORED
-);
-CREATE INDEX idx_ohlc15_btc_perp_tick ON ohlc15_btc_perp (tick);
+    tick BIGINT NOT NULL,
+    PRIMARY KEY (tick, id),
+    UNIQUE (tick)
+) PARTITION BY RANGE (tick);
 
 CREATE TABLE ohlc5_btc_perp (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     data JSONB NOT NULL,
     open_interest REAL,
-    tick BIGINT GENERATED ALWAYS AS ((data->>'tick')::BIGINT) STORED
-);
-CREATE INDEX idx_ohlc5_btc_perp_tick ON ohlc5_btc_perp (tick);
+    tick BIGINT NOT NULL,
+    PRIMARY KEY (tick, id),
+    UNIQUE (tick)
+) PARTITION BY RANGE (tick);
 
 CREATE TABLE ohlc1_btc_perp (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     data JSONB NOT NULL,
     open_interest REAL,
-    tick BIGINT GENERATED ALWAYS AS ((data->>'tick')::BIGINT) STORED
-);
-CREATE INDEX idx_ohlc1_btc_perp_tick ON ohlc1_btc_perp (tick);
+    tick BIGINT NOT NULL,
+    PRIMARY KEY (tick, id),
+    UNIQUE (tick)
+) PARTITION BY RANGE (tick);
 
 
 CREATE TABLE ohlc60_eth_perp (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     data JSONB NOT NULL,
     open_interest REAL,
-    tick BIGINT GENERATED ALWAYS AS ((data->>'tick')::BIGINT) STORED
-);
-CREATE INDEX idx_ohlc60_eth_perp_tick ON ohlc60_eth_perp (tick);
+    tick BIGINT NOT NULL,
+    PRIMARY KEY (tick, id),
+    UNIQUE (tick)
+) PARTITION BY RANGE (tick);
 
 CREATE TABLE ohlc15_eth_perp (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     data JSONB NOT NULL,
     open_interest REAL,
-    tick BIGINT GENERATED ALWAYS AS ((data->>'tick')::BIGINT) STORED
-);
-CREATE INDEX idx_ohlc15_eth_perp_tick ON ohlc15_eth_perp (tick);
+    tick BIGINT NOT NULL,
+    PRIMARY KEY (tick, id),
+    UNIQUE (tick)
+) PARTITION BY RANGE (tick);
 
 CREATE TABLE ohlc5_eth_perp (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     data JSONB NOT NULL,
     open_interest REAL,
-    tick BIGINT GENERATED ALWAYS AS ((data->>'tick')::BIGINT) STORED
-);
-CREATE INDEX idx_ohlc5_eth_perp_tick ON ohlc5_eth_perp (tick);
+    tick BIGINT NOT NULL,
+    PRIMARY KEY (tick, id),
+    UNIQUE (tick)
+) PARTITION BY RANGE (tick);
 
 CREATE TABLE ohlc1_eth_perp (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     data JSONB NOT NULL,
     open_interest REAL,
-    tick BIGINT GENERATED ALWAYS AS ((data->>'tick')::BIGINT) STORED
-);
-CREATE INDEX idx_ohlc1_eth_perp_tick ON ohlc1_eth_perp (tick);
+    tick BIGINT NOT NULL,
+    PRIMARY KEY (tick, id),
+    UNIQUE (tick)
+) PARTITION BY RANGE (tick);
 
 CREATE OR REPLACE FUNCTION get_arithmetic_value(
     p_item TEXT,
@@ -126,6 +144,56 @@ END;
 $$ LANGUAGE plpgsql SECURITY DEFINER;
 
 
+-- Partitions of every time partitioned table from its retention horizon to
+-- the next one, named and bounded as src/services/cleaner/partitioning_db.py
+-- does (same retention as get_default_policies), which keeps creating them
+-- ahead.
+DO $$
+DECLARE
+    policy RECORD;
+    period_start TIMESTAMP;
+    period_end TIMESTAMP;
+    last_end TIMESTAMP;
+BEGIN
+    FOR policy IN
+        SELECT * FROM (VALUES
+            ('ohlc1_btc_perp', 'day', 7),
+            ('ohlc5_btc_perp', 'day', 35),
+            ('ohlc15_btc_perp', 'month', 105),
+            ('ohlc60_btc_perp', 'month', 420),
+            ('ohlc1_eth_perp', 'day', 7),
+            ('ohlc5_eth_perp', 'day', 35),
+            ('ohlc15_eth_perp', 'month', 105),
+            ('ohlc60_eth_perp', 'month', 420)
+        ) AS p (table_name, unit, retention_days)
+    LOOP
+        period_start := date_trunc(
+            policy.unit,
+            (now() AT TIME ZONE 'UTC') - make_interval(days => policy.retention_days)
+        );
+        last_end := date_trunc(policy.unit, now() AT TIME ZONE 'UTC')
+            + ('2 ' || policy.unit)::INTERVAL;
+
+        WHILE period_start < last_end LOOP
+            period_end := period_start + ('1 ' || policy.unit)::INTERVAL;
+
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%s) TO (%s)',
+                policy.table_name || '_p' || to_char(
+                    period_start,
+                    CASE policy.unit WHEN 'day' THEN 'YYYYMMDD' ELSE 'YYYYMM' END
+                ),
+                policy.table_name,
+                (extract(epoch FROM period_start AT TIME ZONE 'UTC') * 1000)::BIGINT,
+                (extract(epoch FROM period_end AT TIME ZONE 'UTC') * 1000)::BIGINT
+            );
+
+            period_start := period_end;
+        END LOOP;
+    END LOOP;
+END $$;
+
+
 -- Main partitioned orders table
 CREATE TABLE orders (
     user_id TEXT,
@@ -1,56 +1,70 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 
-# installed
-import asyncio
-import json
-
 # built ins
-from datetime import datetime, timedelta
+import asyncio
 
+# installed
 from loguru import logger as log
 
 # user defined formula
-from core.db.postgres import insert_ohlc
-from core.error_handler import error_handler
-from src.shared.utils import error_handling
+from core.db.postgres import postgres_client
+from src.shared.utils import error_handling, string_modification as str_mod
+from src.shared.utils.resampling import get_bucket, resampling
 from src.shared.config.settings import DERIBIT_CURRENCIES
 from src.scripts.deribit.restful_api import end_point_params_template as end_point
 
 
-async def insert_ohlc(
-    currency,
+async def fetching_ohlc(
     instrument_name: str,
     resolution: int = 1,
     qty_candles: int = 6000,
-) -> None:
+) -> list:
+    """ """
+
     ohlc_request = await end_point.get_ohlc(
         instrument_name, resolution, qty_candles, None, True
     )
 
     if not ohlc_request:
         log.error(f"No OHLC data for {instrument_name}")
+        return []
+
+    # Transform array-based OHLC to dict-per-candle format
+    candles = str_mod.transform_nested_dict_to_list_ohlc(ohlc_request)
+
+    return candles
+
+
+async def insert_ohlc(
+    currency,
+    instrument_name: str,
+    resolutions: list = [1, 5, 15, 60],
+    qty_candles: int = 6000,
+) -> None:
+    """
+    only the 1 minute candles are fetched, the other resolutions are
+    resampled from them as the receiver does on the live stream
+    """
+
+    candles = await fetching_ohlc(instrument_name, 1, qty_candles)
+
+    if not candles:
         return
 
-    table = f"ohlc{resolution}_{currency.lower()}_perp"
+    for resolution in resolutions:
 
-    # Transform array-based OHLC to dict-per-candle format
-    candles = []
-    for i in range(len(ohlc_request["t"])):
-        candle = {
-            "tick": ohlc_request["t"][i],
-            "open": ohlc_request["open"][i],
-            "high": ohlc_request["high"][i],
-            "low": ohlc_request["low"][i],
-            "close": ohlc_request["close"][i],
-            "volume": ohlc_request["volume"][i],
-        }
-        if "cost" in ohlc_request:
-            candle["cost"] = ohlc_request["cost"][i]
-        candles.append(candle)
-
-    for candle in candles:
-        await postgres_client.insert_ohlc(table, candle)
+        table = f"ohlc{resolution}_{currency.lower()}_perp"
+
+        resampled = candles if resolution == 1 else resampling(candles, resolution)
+
+        # the oldest bucket misses the minutes fetched before it started
+        first_tick = min(o["tick"] for o in candles)
+
+        if resampled and get_bucket(first_tick, resolution) != first_tick:
+            resampled = resampled[1:]
+
+        await postgres_client.upsert_ohlc(table, resampled)
 
 
 async def main():
@@ -63,23 +77,19 @@ async def main():
 
         log.critical(f"instrument_name {instrument_name} currency {currency}")
 
-        resolutions = [60, 5, 15, 1]
+        resolutions = [1, 5, 15, 60]
 
         qty_candles = 6000
 
-        for res in resolutions:
-
-            await insert_ohlc(currency, instrument_name, res, qty_candles)
+        await insert_ohlc(currency, instrument_name, resolutions, qty_candles)
 
 
 if __name__ == "__main__":
     try:
-        asyncio.get_event_loop().run_until_complete(main())
+        asyncio.run(main())
 
     except (KeyboardInterrupt, SystemExit):
-        asyncio.get_event_loop().run_until_complete(main().stop_ws())
+        pass
 
     except Exception as error:
-        await error_handling.parse_error_message(
-            error,
-        )
+        error_handling.parse_error_message(error)
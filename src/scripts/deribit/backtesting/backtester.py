@@ -0,0 +1,690 @@
+# src\scripts\deribit\backtesting\backtester.py
+
+"""
+Event driven backtester of the strategy classes
+
+Recorded events (events.py) are replayed in time order. Tickers move the
+simulated exchange (simulated_exchange.py) and, at most once per decision
+interval, the strategy decides the way its app loop does live:
+    hedgingSpot   HedgingSpot, as app_hedging_spot: cancel the stale orders,
+                  is_send_open_order_allowed (opening_position), then
+                  is_send_exit_order_allowed on the open transaction nearest
+                  to the bid
+    comboAuto     ComboAuto, as app_future_spreads: cancel the stale orders,
+                  then is_send_open_order_allowed_auto_combo on the first
+                  combo, of a future not about to expire, that allows it
+
+The market condition is the one of translate_candles_data_to_market_condition
+over the last 5 candles of the perpetual in 5, 15 and 60 minutes, as
+get_market_condition computes it live, unless MARKET_CONDITION events were
+recorded. The hedged instrument is fixed (the perpetual by default) where
+the live app picks a random future per decision.
+
+Parameter sets run in parallel, one process per set:
+    python -m src.scripts.deribit.backtesting.backtester /app/data/recordings/session \\
+        --strategy hedgingSpot --set weighted_factor.medium=3,5,8 \\
+        --set waiting_minute_before_cancel=1,3,10 --processes 8
+"""
+
+# built ins
+import argparse
+import asyncio
+import copy
+import functools
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# installed
+import numpy as np
+import orjson
+from loguru import logger as log
+
+# user defined formula
+from src.scripts.deribit.backtesting.events import (
+    CANDLE,
+    MARKET_CONDITION,
+    TICKER,
+    Event,
+    building_ohlc_events,
+    merging,
+    reading_recording,
+)
+from src.scripts.deribit.backtesting.simulated_exchange import (
+    SimulatedExchange,
+    get_combo_legs,
+)
+from src.scripts.deribit.strategies.cash_carry.combo_auto import ComboAuto
+from src.scripts.deribit.strategies.hedging.hedging_spot import HedgingSpot
+from src.scripts.market_understanding.price_action.candles_analysis import (
+    candles_analysis,
+    translate_candles_data_to_market_condition,
+)
+from src.services.receiver.deribit.recording_frames import reading_manifest
+from src.shared.utils import system_tools
+from src.shared.utils.labels import parsed_label
+
+RESOLUTIONS = (5, 15, 60)
+QTY_CANDLES = 5
+DIM_SEQUENCE = 3
+
+ONE_MINUTE = 60_000
+INSTRUMENT_EXPIRATION_THRESHOLD = 60 * 8  # minutes
+AVERAGE_MOVEMENT = 0.15 / 100
+
+NEUTRAL = dict(
+    strong_bullish=False,
+    bullish=False,
+    weak_bullish=False,
+    neutral=True,
+    weak_bearish=False,
+    bearish=False,
+    strong_bearish=False,
+)
+
+DECIDING = {
+    "hedgingSpot": "deciding_hedging_spot",
+    "comboAuto": "deciding_combo_auto",
+}
+
+
+class MarketConditionTracker:
+    """Market condition of an instrument, from its candles as they update"""
+
+    def __init__(
+        self,
+        instrument_name: str,
+        resolutions: tuple = RESOLUTIONS,
+        qty_candles: int = QTY_CANDLES,
+    ):
+        self.instrument_name = instrument_name
+        self.qty_candles = qty_candles
+        self.candles = {o: {} for o in resolutions}
+        self.computed = dict(NEUTRAL)
+        self.recorded = None
+
+    def updating(self, event: Event) -> None:
+        """ """
+
+        if event.kind == MARKET_CONDITION:
+            self.recorded = event.data
+            return
+
+        candles = self.candles.get(event.resolution)
+
+        if candles is None or event.instrument_name != self.instrument_name:
+            return
+
+        # the forming candle is updated in place, as in the ohlc tables
+        candles[event.data["tick"]] = event.data
+
+        for tick in sorted(candles)[: -self.qty_candles]:
+            del candles[tick]
+
+        if all(len(o) == self.qty_candles for o in self.candles.values()):
+            self.computing()
+
+    def computing(self) -> None:
+        """ """
+
+        candles_data = [
+            dict(
+                resolution=resolution,
+                candles_analysis=candles_analysis(
+                    np,
+                    [
+                        dict(
+                            open=o["open"],
+                            high=o["high"],
+                            low=o["low"],
+                            close=o["close"],
+                        )
+                        # newest first, as queried from the ohlc tables
+                        for o in sorted(
+                            candles.values(), key=lambda o: o["tick"], reverse=True
+                        )
+                    ],
+                    DIM_SEQUENCE,
+                ),
+            )
+            for resolution, candles in self.candles.items()
+        ]
+
+        self.computed = (
+            translate_candles_data_to_market_condition(np, candles_data)
+            or self.computed
+        )
+
+    def getting(self) -> dict:
+        """ """
+
+        return self.recorded or self.computed
+
+
+def get_nearest_transaction(
+    transactions: list,
+    control_price: float,
+) -> list:
+    """as get_nearest_transaction_to_index of app_hedging_spot"""
+
+    closest_price = min(
+        (o["price"] for o in transactions),
+        key=lambda o: abs(o - control_price),
+    )
+
+    return [o for o in transactions if o["price"] == closest_price]
+
+
+def get_index_price(ticker: dict) -> float:
+    """ """
+
+    return ticker.get("index_price") or ticker.get("estimated_delivery_price")
+
+
+class Backtester:
+    """One strategy, one parameter set, one currency"""
+
+    def __init__(
+        self,
+        strategy_label: str,
+        strategy_parameters: dict,
+        instruments: list,
+        currency: str = "BTC",
+        equity: float = 1.0,
+        instrument_name: str = None,
+        non_checked_strategies: list = (),
+        contribute_to_hedging_strategies: list = None,
+        maker_fee: float = 0.0,
+        through: bool = False,
+        decision_interval: int = 1000,
+    ):
+        if strategy_label not in DECIDING:
+            raise ValueError(
+                f"no backtest for {strategy_label}, only {', '.join(DECIDING)}"
+            )
+
+        self.strategy_label = strategy_label
+        self.strategy_parameters = strategy_parameters
+        self.currency = currency.upper()
+        self.instrument_name_perpetual = f"{self.currency}-PERPETUAL"
+        self.instrument_name = instrument_name or self.instrument_name_perpetual
+        self.non_checked_strategies = list(non_checked_strategies)
+        self.contribute_to_hedging_strategies = contribute_to_hedging_strategies or [
+            strategy_label
+        ]
+        self.decision_interval = decision_interval
+
+        instruments = [o for o in instruments if self.currency in o["instrument_name"]]
+
+        self.futures = [o for o in instruments if "-FS-" not in o["instrument_name"]]
+        self.combos = [o for o in instruments if "-FS-" in o["instrument_name"]]
+
+        self.exchange = SimulatedExchange(equity, maker_fee, through)
+        self.market_condition = MarketConditionTracker(self.instrument_name_perpetual)
+        self.deciding = getattr(self, DECIDING[strategy_label])
+
+        self.archive_db_table = f"my_trades_all_{self.currency.lower()}_json"
+        self.trade_db_table = "my_trades_all_json"
+
+        self.server_time = 0
+        self.last_decision = None
+        self.equity_peak = equity
+        self.max_drawdown = 0.0
+        self.stats = dict(events=0, decisions=0)
+
+    def getting_strategy_transactions(self, transactions: list) -> list:
+        """ """
+
+        return [o for o in transactions if self.strategy_label in o["label"]]
+
+    def cancelling_orders(self, cancel: dict) -> None:
+        """ """
+
+        if cancel["cancel_allowed"]:
+            self.exchange.cancelling(cancel["cancel_id"])
+
+    async def deciding_hedging_spot(
+        self,
+        index_price: float,
+    ) -> None:
+        """ """
+
+        exchange = self.exchange
+        ticker = exchange.tickers.get(self.instrument_name)
+
+        if not ticker:
+            return
+
+        orders_strategy = self.getting_strategy_transactions(exchange.orders)
+        trades_strategy = self.getting_strategy_transactions(exchange.trades)
+
+        notional: float = index_price * exchange.computing_equity()
+
+        hedging = HedgingSpot(
+            self.strategy_label,
+            self.strategy_parameters,
+            notional * -1,
+            trades_strategy,
+            self.market_condition.getting(),
+            index_price,
+            exchange.trades,
+        )
+
+        for order in orders_strategy:
+            self.cancelling_orders(
+                await hedging.is_cancelling_orders_allowed(
+                    order,
+                    orders_strategy,
+                    self.server_time,
+                )
+            )
+
+        orders_strategy = self.getting_strategy_transactions(exchange.orders)
+
+        # orphaned closed trades, relabelled in sqlite by the live strategy,
+        # do not arise here: a label only leaves the book once netted out
+        send_order: dict = await hedging.is_send_open_order_allowed(
+            self.non_checked_strategies,
+            self.instrument_name,
+            self.futures,
+            orders_strategy,
+            ticker["best_ask_price"],
+            self.archive_db_table,
+            self.trade_db_table,
+        )
+
+        if send_order["order_allowed"]:
+            exchange.placing(send_order["order_parameters"], self.server_time)
+            return
+
+        contribute_to_hedging_sum = sum(
+            o["amount"]
+            for o in exchange.trades
+            if parsed_label(o["label"]).main in self.contribute_to_hedging_strategies
+        )
+
+        trades_open = [
+            o
+            for o in trades_strategy
+            if "open" in o["label"] and o["instrument_name"] == self.instrument_name
+        ]
+
+        if not trades_open or contribute_to_hedging_sum > 0:
+            return
+
+        best_bid_prc: float = ticker["best_bid_price"]
+
+        send_closing_order: dict = await hedging.is_send_exit_order_allowed(
+            [o for o in orders_strategy if "open" not in o["label"]],
+            best_bid_prc,
+            get_nearest_transaction(trades_open, best_bid_prc),
+        )
+
+        if send_closing_order["order_allowed"]:
+            exchange.placing(send_closing_order["order_parameters"], self.server_time)
+
+    async def deciding_combo_auto(
+        self,
+        index_price: float,
+    ) -> None:
+        """ """
+
+        exchange = self.exchange
+        ticker_perpetual = exchange.tickers.get(self.instrument_name_perpetual)
+        params = self.strategy_parameters
+
+        notional: float = index_price * exchange.computing_equity()
+
+        combo_auto = ComboAuto(
+            self.strategy_label,
+            params,
+            self.getting_strategy_transactions(exchange.orders),
+            self.server_time,
+            self.market_condition.getting(),
+            self.getting_strategy_transactions(exchange.trades),
+            ticker_perpetual,
+        )
+
+        for order in self.getting_strategy_transactions(exchange.orders):
+            self.cancelling_orders(
+                await combo_auto.is_cancelling_orders_allowed(order, self.server_time)
+            )
+
+        # the orders left after cancelling
+        combo_auto = ComboAuto(
+            self.strategy_label,
+            params,
+            self.getting_strategy_transactions(exchange.orders),
+            self.server_time,
+            self.market_condition.getting(),
+            self.getting_strategy_transactions(exchange.trades),
+            ticker_perpetual,
+        )
+
+        for instrument_attributes_combo in self.combos:
+
+            instrument_name_combo = instrument_attributes_combo["instrument_name"]
+            instrument_name_future, _ = get_combo_legs(instrument_name_combo)
+
+            ticker_combo = exchange.tickers.get(instrument_name_combo)
+            ticker_future = exchange.tickers.get(instrument_name_future)
+
+            expiration_timestamp = [
+                o["expiration_timestamp"]
+                for o in self.futures
+                if o["instrument_name"] == instrument_name_future
+            ]
+
+            if not (ticker_combo and ticker_future and expiration_timestamp):
+                continue
+
+            instrument_time_left = (
+                expiration_timestamp[0] - self.server_time
+            ) / ONE_MINUTE
+
+            if instrument_time_left <= INSTRUMENT_EXPIRATION_THRESHOLD:
+                continue
+
+            send_order: dict = await combo_auto.is_send_open_order_allowed_auto_combo(
+                ticker_future,
+                ticker_combo,
+                notional,
+                instrument_name_combo,
+                self.futures,
+                instrument_attributes_combo,
+                params["monthly_profit_pct"],
+                AVERAGE_MOVEMENT,
+                params["waiting_minute_before_relabelling"] + 3,
+            )
+
+            if send_order["order_allowed"]:
+                exchange.placing(send_order["order_parameters"], self.server_time)
+                break
+
+    async def handling(self, event: Event) -> None:
+        """ """
+
+        self.stats["events"] += 1
+        self.server_time = max(self.server_time, event.timestamp)
+
+        if event.kind in (CANDLE, MARKET_CONDITION):
+            self.market_condition.updating(event)
+            return
+
+        if event.kind != TICKER:
+            return
+
+        self.exchange.matching(event.data, self.server_time)
+
+        if (
+            self.last_decision is not None
+            and self.server_time - self.last_decision < self.decision_interval
+        ):
+            return
+
+        ticker_perpetual = self.exchange.tickers.get(self.instrument_name_perpetual)
+
+        index_price = get_index_price(ticker_perpetual) if ticker_perpetual else None
+
+        if not index_price:
+            return
+
+        self.last_decision = self.server_time
+        self.stats["decisions"] += 1
+
+        await self.deciding(index_price)
+
+        equity = self.exchange.computing_equity()
+
+        self.equity_peak = max(self.equity_peak, equity)
+        self.max_drawdown = max(self.max_drawdown, self.equity_peak - equity)
+
+    async def running(self, events) -> dict:
+        """
+        return: summary of the run, amounts in coin
+        """
+
+        for event in events:
+            await self.handling(event)
+
+        exchange = self.exchange
+
+        equity = exchange.computing_equity()
+
+        return dict(
+            strategy_label=self.strategy_label,
+            equity_start=exchange.equity_start,
+            equity_end=round(equity, 8),
+            pnl=round(equity - exchange.equity_start, 8),
+            fees=round(exchange.fees, 8),
+            max_drawdown=round(self.max_drawdown, 8),
+            positions={k: v for k, v in exchange.positions.items() if v},
+            open_orders=len(exchange.orders),
+            trades=len(exchange.trades) + len(exchange.archive),
+            **exchange.stats,
+            **self.stats,
+        )
+
+
+@functools.lru_cache(maxsize=2)
+def loading_source(
+    source: str,
+    spread_pct: float = 0.01,
+) -> tuple:
+    """
+    source: a recording directory, or a json file of
+        {"instruments": [...],
+         "ohlc": [{"instrument_name", "resolution", "candles": [...]}],
+         "market_conditions": [{"timestamp", ...market condition}]}
+    return: (instruments, events), loaded once per process
+    """
+
+    if os.path.isdir(source):
+        return (
+            reading_manifest(source).get("instruments", []),
+            tuple(reading_recording(source)),
+        )
+
+    with open(source, "rb") as f:
+        dataset = orjson.loads(f.read())
+
+    streams = [
+        building_ohlc_events(
+            o["instrument_name"],
+            o["resolution"],
+            o["candles"],
+            spread_pct,
+        )
+        for o in dataset.get("ohlc", [])
+    ]
+
+    streams.append(
+        sorted(
+            (
+                Event(o["timestamp"], MARKET_CONDITION, o.get("instrument_name"), o)
+                for o in dataset.get("market_conditions", [])
+            ),
+            key=lambda o: o.timestamp,
+        )
+    )
+
+    return dataset.get("instruments", []), tuple(merging(*streams))
+
+
+def running_spec(spec: dict) -> dict:
+    """
+    process pool worker: one parameter set over the whole source
+    """
+
+    # the strategies log every decision
+    log.remove()
+
+    spec = dict(spec)
+
+    instruments, events = loading_source(
+        spec.pop("source"),
+        spec.pop("spread_pct", 0.01),
+    )
+    overrides = spec.pop("overrides", {})
+
+    result = asyncio.run(Backtester(instruments=instruments, **spec).running(events))
+
+    return dict(result, overrides=overrides)
+
+
+def expanding_grid(
+    strategy_parameters: dict,
+    grid: dict,
+) -> list:
+    """
+    grid: {"weighted_factor.medium": [3, 5, 8], "waiting_minute_before_cancel": [1, 3]}
+    return: [(overrides, parameters)] for every combination of the grid
+    """
+
+    keys = list(grid)
+    result = []
+
+    for values in itertools.product(*(grid[k] for k in keys)):
+
+        parameters = copy.deepcopy(strategy_parameters)
+
+        for key, value in zip(keys, values):
+
+            *parents, leaf = key.split(".")
+
+            target = parameters
+            for parent in parents:
+                target = target[parent]
+
+            target[leaf] = value
+
+        result.append((dict(zip(keys, values)), parameters))
+
+    return result
+
+
+def get_strategy_attributes(
+    strategies: list,
+    strategy_label: str,
+) -> dict:
+    """the labels the app derives from strategies.toml, next to the parameters"""
+
+    return dict(
+        strategy_parameters=[
+            o for o in strategies if o["strategy_label"] == strategy_label
+        ][0],
+        non_checked_strategies=[
+            o["strategy_label"]
+            for o in strategies
+            if o.get("non_checked_for_size_label_consistency")
+        ],
+        contribute_to_hedging_strategies=[
+            o["strategy_label"] for o in strategies if o.get("contribute_to_hedging")
+        ],
+    )
+
+
+def sweeping(
+    source: str,
+    strategies: list,
+    strategy_label: str,
+    grid: dict = None,
+    processes: int = None,
+    **options,
+) -> list:
+    """
+    strategies: the [[strategies]] of strategies.toml
+    options: passed to Backtester (currency, equity, maker_fee, ...), plus spread_pct
+    return: one result per parameter set, best profit first
+    """
+
+    attributes = get_strategy_attributes(strategies, strategy_label)
+    strategy_parameters = attributes.pop("strategy_parameters")
+
+    specs = [
+        dict(
+            options,
+            **attributes,
+            source=source,
+            strategy_label=strategy_label,
+            strategy_parameters=parameters,
+            overrides=overrides,
+        )
+        for overrides, parameters in expanding_grid(strategy_parameters, grid or {})
+    ]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = list(executor.map(running_spec, specs))
+
+    return sorted(results, key=lambda o: o["pnl"], reverse=True)
+
+
+def parsing_value(value: str):
+    """ """
+
+    try:
+        return orjson.loads(value)
+
+    except orjson.JSONDecodeError:
+        return value
+
+
+def main() -> None:
+    """ """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("source", help="recording directory or ohlc json file")
+    parser.add_argument("--strategy", default="hedgingSpot", choices=list(DECIDING))
+    parser.add_argument(
+        "--config",
+        default=os.getenv(
+            "STRATEGY_CONFIG_PATH",
+            os.path.join("src", "shared", "config", "strategies.toml"),
+        ),
+    )
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="KEY=V1,V2",
+        help="parameter values to sweep, dotted keys for nested ones",
+    )
+    parser.add_argument("--currency", default="BTC")
+    parser.add_argument("--equity", type=float, default=1.0, help="in coin")
+    parser.add_argument("--instrument", dest="instrument_name")
+    parser.add_argument("--maker-fee", type=float, default=0.0)
+    parser.add_argument("--through", action="store_true", help="fill past the price")
+    parser.add_argument("--decision-interval", type=int, default=1000, help="ms")
+    parser.add_argument("--spread-pct", type=float, default=0.01)
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--top", type=int, default=20)
+
+    args = parser.parse_args()
+
+    grid = {}
+
+    for item in args.set:
+        key, _, values = item.partition("=")
+        grid[key] = [parsing_value(o) for o in values.split(",")]
+
+    results = sweeping(
+        args.source,
+        system_tools.get_config_tomli(args.config)["strategies"],
+        args.strategy,
+        grid,
+        args.processes,
+        currency=args.currency,
+        equity=args.equity,
+        instrument_name=args.instrument_name,
+        maker_fee=args.maker_fee,
+        through=args.through,
+        decision_interval=args.decision_interval,
+        spread_pct=args.spread_pct,
+    )
+
+    for result in results[: args.top]:
+        print(orjson.dumps(result).decode())
+
+
+if __name__ == "__main__":
+    main()
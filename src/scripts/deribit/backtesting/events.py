@@ -0,0 +1,181 @@
+# src\scripts\deribit\backtesting\events.py
+
+"""
+Market events replayed by the backtester, in time order
+
+    TICKER             full ticker of an instrument (best bid/ask, mark, index)
+    CANDLE             ohlc candle of an instrument and resolution, updated
+                       while it forms, as chart.trades.<instrument>.<resolution>
+    MARKET_CONDITION   recorded output of the market analysis, used as is
+                       instead of the one computed from the candles
+
+Two sources:
+    a recording of the receiver (recording_frames.py): incremental_ticker
+    changes are merged into full tickers, chart.trades frames become candles,
+    plus the resampled_resolutions of the manifest built from the 1 minute
+    ones, as the receiver publishes them
+
+    ohlc candles (e.g. exported from the ohlc<resolution>_<currency>_perp_json
+    tables): one candle event per candle plus a ticker synthesised from its
+    close, the bid and ask spread apart
+"""
+
+# built ins
+import heapq
+from typing import Iterable, Iterator
+
+# installed
+import orjson
+from dataclassy import dataclass
+
+# user defined formula
+from src.services.receiver.deribit.recording_frames import (
+    reading_frames,
+    reading_manifest,
+)
+from src.shared.utils.resampling import OhlcResampler
+
+TICKER = "ticker"
+CANDLE = "candle"
+MARKET_CONDITION = "market_condition"
+
+ONE_MINUTE = 60_000
+
+
+@dataclass(unsafe_hash=True, slots=True)
+class Event:
+    """ """
+
+    timestamp: int  # ms
+    kind: str
+    instrument_name: str
+    data: dict
+    resolution: int = None
+
+
+def parsing_frame(
+    received_ms: int,
+    frame: str,
+    tickers: dict,
+) -> Event:
+    """
+    tickers: merged incremental tickers, per instrument, updated in place
+    return: None for frames other than tickers and candles
+    """
+
+    try:
+        message = orjson.loads(frame)
+
+    except orjson.JSONDecodeError:
+        return None
+
+    if message.get("method") != "subscription":
+        return None
+
+    params = message["params"]
+    channel: str = params["channel"]
+    data = params["data"]
+
+    if channel.startswith("incremental_ticker.") or channel.startswith("ticker."):
+
+        instrument_name = data["instrument_name"]
+
+        # snapshot first, then only the changed fields
+        ticker = tickers.setdefault(instrument_name, {})
+        ticker.update(data)
+
+        return Event(received_ms, TICKER, instrument_name, dict(ticker))
+
+    if channel.startswith("chart.trades."):
+
+        _, _, instrument_name, resolution = channel.split(".", 3)
+
+        return Event(
+            received_ms,
+            CANDLE,
+            instrument_name,
+            data,
+            int(resolution) if resolution.isdigit() else resolution,
+        )
+
+    return None
+
+
+def reading_recording(path: str) -> Iterator[Event]:
+    """ """
+
+    tickers = {}
+
+    resolutions = reading_manifest(path).get("resampled_resolutions")
+    resampler = OhlcResampler(resolutions) if resolutions else None
+
+    for received_ns, frame in reading_frames(path):
+
+        event = parsing_frame(received_ns // 1_000_000, frame, tickers)
+
+        if event is None:
+            continue
+
+        yield event
+
+        if resampler is not None and event.kind == CANDLE and event.resolution == 1:
+
+            for resolution, candle in resampler.updating(
+                event.instrument_name, event.data
+            ):
+                yield Event(
+                    event.timestamp,
+                    CANDLE,
+                    event.instrument_name,
+                    candle,
+                    resolution,
+                )
+
+
+def building_ohlc_events(
+    instrument_name: str,
+    resolution: int,
+    candles: list,
+    spread_pct: float = 0.01,
+) -> list:
+    """
+    candles: [{"tick", "open", "high", "low", "close", ...}], any order
+    spread_pct: distance between the synthesised bid and ask, in percent
+
+    A candle is only known once closed, so its events are stamped at its end.
+    """
+
+    events = []
+
+    half_spread = spread_pct / 100 / 2
+
+    for candle in sorted(candles, key=lambda o: o["tick"]):
+
+        closed_at = candle["tick"] + resolution * ONE_MINUTE
+        close = candle["close"]
+
+        events.append(Event(closed_at, CANDLE, instrument_name, candle, resolution))
+
+        events.append(
+            Event(
+                closed_at,
+                TICKER,
+                instrument_name,
+                dict(
+                    instrument_name=instrument_name,
+                    timestamp=closed_at,
+                    best_bid_price=close * (1 - half_spread),
+                    best_ask_price=close * (1 + half_spread),
+                    mark_price=close,
+                    index_price=close,
+                ),
+            )
+        )
+
+    return events
+
+
+def merging(*streams: Iterable[Event]) -> Iterator[Event]:
+    """streams each sorted by time, merged into one"""
+
+    return heapq.merge(*streams, key=lambda o: o.timestamp)
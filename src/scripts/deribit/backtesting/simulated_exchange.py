@@ -0,0 +1,293 @@
+# src\scripts\deribit\backtesting\simulated_exchange.py
+
+"""
+Order book and fills of the backtester
+
+Orders and trades have the shape the strategies read from the cache and the
+db: label, instrument_name, direction, signed amount (sell < 0), price,
+timestamp. Resting limit orders are matched against each new ticker of
+their instrument:
+    sell at p fills once best_bid_price >= p    (> p with through=True)
+    buy at p fills once best_ask_price <= p     (< p with through=True)
+at the order price, in full, as maker. through=True is the conservative
+model: touching the price is not enough, the book has to trade through it,
+as the order sits behind the queue already there.
+
+Combo orders (-FS- instruments) fill as their two legs, the way Deribit
+reports them: the future at the perpetual price plus the combo price, the
+perpetual at its mark, both under the combo label.
+
+Open and closed trades of a label netting to zero are moved to the archive,
+as the cleaner does live, so the strategies only see what is still open.
+Profit and loss is in coin, as for the inverse contracts: a trade of amount
+a at price p is worth a / p, marked at m it is worth a / m.
+"""
+
+# built ins
+from collections import defaultdict
+
+# user defined formula
+from src.shared.utils.labels import parsed_label
+
+
+def get_combo_legs(instrument_name_combo: str) -> tuple:
+    """
+    'BTC-FS-27DEC24_PERP'
+    return: ('BTC-27DEC24', 'BTC-PERPETUAL')
+    """
+
+    currency, _, legs = instrument_name_combo.split("-", 2)
+
+    expiry, _, _ = legs.partition("_")
+
+    return f"{currency}-{expiry}", f"{currency}-PERPETUAL"
+
+
+def is_filled(
+    order: dict,
+    ticker: dict,
+    through: bool = False,
+) -> bool:
+    """ """
+
+    price = order["price"]
+
+    if order["direction"] == "sell":
+        best = ticker.get("best_bid_price")
+        return bool(best) and (best > price if through else best >= price)
+
+    best = ticker.get("best_ask_price")
+    return bool(best) and (best < price if through else best <= price)
+
+
+class SimulatedExchange:
+    """One currency of a sub account"""
+
+    def __init__(
+        self,
+        equity: float,
+        maker_fee: float = 0.0,
+        through: bool = False,
+    ):
+        self.equity_start = equity
+        self.maker_fee = maker_fee
+        self.through = through
+
+        self.tickers = {}
+        self.orders = []
+        self.trades = []
+        self.archive = []
+
+        self.positions = defaultdict(float)
+        self.coin_basis = defaultdict(float)
+        self.fees = 0.0
+
+        self.sequence = 0
+        self.last_label_id = 0
+        self.stats = dict(placed=0, cancelled=0, filled=0)
+
+    def get_mark_price(self, instrument_name: str) -> float:
+        """ """
+
+        ticker = self.tickers.get(instrument_name, {})
+
+        mark = ticker.get("mark_price")
+
+        if mark:
+            return mark
+
+        bid, ask = ticker.get("best_bid_price"), ticker.get("best_ask_price")
+
+        return (bid + ask) / 2 if bid and ask else None
+
+    def computing_pnl(self) -> float:
+        """return: realised and unrealised profit, in coin, fees excluded"""
+
+        pnl = 0.0
+
+        for instrument_name, position in self.positions.items():
+
+            mark = self.get_mark_price(instrument_name)
+
+            if position and mark:
+                pnl += self.coin_basis[instrument_name] - position / mark
+
+            elif not position:
+                pnl += self.coin_basis[instrument_name]
+
+        return pnl
+
+    def computing_equity(self) -> float:
+        """ """
+
+        return self.equity_start + self.computing_pnl() - self.fees
+
+    def labelling(
+        self,
+        label: str,
+        server_time: int,
+    ) -> str:
+        """
+        new open labels are numbered from the simulated time: the wall clock
+        of str_mod.labelling would repeat within a fast replay
+        """
+
+        if parsed_label(label).status != "open":
+            return label
+
+        self.last_label_id = max(server_time, self.last_label_id + 1)
+
+        return f"{parsed_label(label).main}-open-{self.last_label_id}"
+
+    def placing(
+        self,
+        params: dict,
+        server_time: int,
+    ) -> dict:
+        """
+        params: order_parameters returned by the strategies
+        """
+
+        self.sequence += 1
+
+        side = params["side"]
+        size = abs(params["size"])
+
+        order = dict(
+            order_id=f"sim-{self.sequence}",
+            instrument_name=params["instrument_name"],
+            label=self.labelling(params["label"], server_time),
+            direction=side,
+            amount=-size if side == "sell" else size,
+            price=params["entry_price"],
+            order_type=params.get("type", "limit"),
+            order_state="open",
+            timestamp=server_time,
+            last_update_timestamp=server_time,
+        )
+
+        self.orders.append(order)
+        self.stats["placed"] += 1
+
+        return order
+
+    def cancelling(self, order_id: str) -> bool:
+        """ """
+
+        remaining = [o for o in self.orders if o["order_id"] != order_id]
+
+        cancelled = len(remaining) != len(self.orders)
+
+        self.orders = remaining
+        self.stats["cancelled"] += cancelled
+
+        return cancelled
+
+    def recording_trade(
+        self,
+        order: dict,
+        instrument_name: str,
+        amount: float,
+        price: float,
+        server_time: int,
+    ) -> None:
+        """ """
+
+        self.sequence += 1
+
+        trade = dict(
+            trade_id=f"sim-{self.sequence}",
+            order_id=order["order_id"],
+            instrument_name=instrument_name,
+            label=order["label"],
+            direction="sell" if amount < 0 else "buy",
+            side="sell" if amount < 0 else "buy",
+            amount=amount,
+            price=price,
+            timestamp=server_time,
+        )
+
+        if "-FS-" in order["instrument_name"]:
+            trade["combo_id"] = order["instrument_name"]
+
+        self.trades.append(trade)
+
+        self.positions[instrument_name] += amount
+        self.coin_basis[instrument_name] += amount / price
+        self.fees += abs(amount) / price * self.maker_fee
+
+    def filling(
+        self,
+        order: dict,
+        server_time: int,
+    ) -> None:
+        """ """
+
+        instrument_name = order["instrument_name"]
+        amount, price = order["amount"], order["price"]
+
+        if "-FS-" not in instrument_name:
+            self.recording_trade(order, instrument_name, amount, price, server_time)
+
+        else:
+            # selling the combo sells the future and buys the perpetual
+            future, perpetual = get_combo_legs(instrument_name)
+            perpetual_price = self.get_mark_price(perpetual)
+
+            self.recording_trade(
+                order, future, amount, perpetual_price + price, server_time
+            )
+            self.recording_trade(
+                order, perpetual, -amount, perpetual_price, server_time
+            )
+
+        self.stats["filled"] += 1
+
+        self.archiving(parsed_label(order["label"]).int)
+
+    def archiving(self, label_integer: str) -> None:
+        """moves the trades of a label once its open and closed ones net out"""
+
+        transactions = [
+            o for o in self.trades if parsed_label(o["label"]).int == label_integer
+        ]
+
+        statuses = {parsed_label(o["label"]).status for o in transactions}
+
+        if {"open", "closed"} <= statuses and not sum(
+            o["amount"] for o in transactions
+        ):
+            self.archive += transactions
+            self.trades = [o for o in self.trades if o not in transactions]
+
+    def matching(
+        self,
+        ticker: dict,
+        server_time: int,
+    ) -> list:
+        """
+        return: orders filled by the ticker
+        """
+
+        instrument_name = ticker["instrument_name"]
+
+        self.tickers[instrument_name] = ticker
+
+        # a combo fill needs the price of its perpetual leg
+        if "-FS-" in instrument_name and not self.get_mark_price(
+            get_combo_legs(instrument_name)[1]
+        ):
+            return []
+
+        filled = [
+            o
+            for o in self.orders
+            if o["instrument_name"] == instrument_name
+            and is_filled(o, ticker, self.through)
+        ]
+
+        for order in filled:
+            self.orders.remove(order)
+            self.filling(order, server_time)
+
+        return filled
@@ -3,8 +3,8 @@
 # built ins
 import asyncio
 
-# installed
-import orjson
+# user defined formula
+from core.db import codecs
 
 
 async def get_redis_message(message_byte: bytes) -> dict:
@@ -12,7 +12,7 @@ async def get_redis_message(message_byte: bytes) -> dict:
 
     if message_byte and message_byte["type"] == "message":
 
-        message_byte_data = orjson.loads(message_byte["data"])
+        message_byte_data = codecs.unsealing(message_byte["data"])
 
         params = message_byte_data["params"]
 
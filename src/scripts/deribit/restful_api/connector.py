@@ -17,10 +17,14 @@ references:
 
 # built ins
 import asyncio
+import os
+from typing import Optional
 
 # installed
 import aiohttp
+import orjson
 from aiohttp.helpers import BasicAuth
+from loguru import logger as log
 
 # user defined formula
 from src.scripts.deribit.restful_api import (
@@ -29,6 +33,78 @@ from src.scripts.deribit.restful_api import (
 from src.scripts.telegram import end_point_params_template as telegram_end_point
 
 
+class HttpSessionPool:
+    """
+    Process-wide, lazily created aiohttp session.
+
+    One TCPConnector is shared by every request so that DNS results and
+    keep-alive TLS connections are reused instead of being renegotiated per
+    call. Limits and timeouts are tunable via environment variables.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.session = None
+            cls._instance._lock = None
+        return cls._instance
+
+    @staticmethod
+    def _build_session() -> aiohttp.ClientSession:
+        """ """
+
+        connector = aiohttp.TCPConnector(
+            limit=int(os.getenv("HTTP_POOL_LIMIT", 100)),
+            limit_per_host=int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", 20)),
+            keepalive_timeout=float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 60)),
+            ttl_dns_cache=int(os.getenv("HTTP_DNS_CACHE_TTL", 300)),
+            enable_cleanup_closed=True,
+        )
+
+        timeout = aiohttp.ClientTimeout(
+            total=float(os.getenv("HTTP_TIMEOUT_TOTAL", 10)),
+            connect=float(os.getenv("HTTP_TIMEOUT_CONNECT", 3)),
+            sock_read=float(os.getenv("HTTP_TIMEOUT_READ", 5)),
+        )
+
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            json_serialize=lambda obj: orjson.dumps(obj).decode("utf-8"),
+        )
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Get or create the shared session"""
+
+        if self.session is None or self.session.closed:
+
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+
+            async with self._lock:
+                if self.session is None or self.session.closed:
+                    self.session = self._build_session()
+                    log.info("Created pooled HTTP session")
+
+        return self.session
+
+    async def close(self) -> None:
+        """Shutdown hook: release pooled connections"""
+
+        session: Optional[aiohttp.ClientSession] = self.session
+        self.session = None
+
+        if session is not None and not session.closed:
+            await session.close()
+            log.info("Closed pooled HTTP session")
+
+
+# Global pooled session instance
+http_pool = HttpSessionPool()
+
+
 async def get_connected(
     connection_url: str,
     endpoint: str = None,
@@ -37,44 +113,44 @@ async def get_connected(
     params: str = None,
 ) -> None:
 
-    async with aiohttp.ClientSession() as session:
+    session = await http_pool.get_session()
 
-        if client_id:
+    if client_id:
 
-            if "telegram" in connection_url:
+        if "telegram" in connection_url:
 
-                response = await telegram_response(
-                    session,
-                    connection_url,
-                    endpoint,
-                    client_id,
-                    client_secret,
-                    params,
-                )
+            response = await telegram_response(
+                session,
+                connection_url,
+                endpoint,
+                client_id,
+                client_secret,
+                params,
+            )
 
-            if "deribit" in connection_url:
+        if "deribit" in connection_url:
 
-                response: dict = await deribit_response(
-                    session,
-                    connection_url,
-                    endpoint,
-                    client_id,
-                    client_secret,
-                    params,
-                )
+            response: dict = await deribit_response(
+                session,
+                connection_url,
+                endpoint,
+                client_id,
+                client_secret,
+                params,
+            )
 
-        else:
+    else:
 
-            connect_end_point = (
-                connection_url if endpoint is None else (connection_url + endpoint)
-            )
+        connect_end_point = (
+            connection_url if endpoint is None else (connection_url + endpoint)
+        )
 
-            async with session.get(connect_end_point) as response:
+        async with session.get(connect_end_point) as response:
 
-                # RESToverHTTP Response Content
-                response: dict = await response.json()
+            # RESToverHTTP Response Content
+            response: dict = await response.json()
 
-        return response
+    return response
 
 
 async def telegram_response(
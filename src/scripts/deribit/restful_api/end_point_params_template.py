@@ -3,6 +3,7 @@
 import asyncio
 
 from dataclassy import dataclass
+from loguru import logger as log
 
 # user defined formula
 from src.shared.utils import (
@@ -10,10 +11,18 @@ from src.shared.utils import (
     string_modification as str_mod,
 )
 from src.scripts.deribit.restful_api import connector
+from src.scripts.deribit.restful_api.rate_limiter import (
+    READ,
+    classifying_endpoint,
+    credit_scheduler,
+)
+from src.scripts.deribit.restful_api.request_cache import building_key, request_cache
+from src.scripts.deribit import ws_rpc
+from src.shared.config.config import config
 
 
 def get_basic_https() -> str:
-    return f"https://www.deribit.com/api/v2/"
+    return config["deribit"]["api_url"]
 
 
 def get_currencies_end_point() -> str:
@@ -72,9 +81,16 @@ async def get_instruments(currency) -> dict:
 
     """
 
-    result = await connector.get_connected(
-        get_basic_https(),
-        get_instruments_end_point(currency),
+    endpoint = get_instruments_end_point(currency)
+
+    # receiver, executor, canceller and relabeller all ask at startup
+    result = await request_cache.getting(
+        endpoint,
+        building_key(endpoint),
+        lambda: connector.get_connected(
+            get_basic_https(),
+            endpoint,
+        ),
     )
 
     return result["result"]
@@ -96,7 +112,7 @@ async def get_ticker(instrument_name) -> str:
 
 
 def get_tradingview_chart_data_end_point() -> str:
-    return f"get_tradingview_chart_data?"
+    return f"public/get_tradingview_chart_data?"
 
 
 def get_ohlc_end_point(
@@ -117,14 +133,14 @@ def get_ohlc_end_point(
 
     # recalculate start timestamp using qty as basis point
     if qty_as_start_time_stamp:
-        start_timestamp = now_unix - (60000 * resolution) * qty_as_start_time_stamp
+        start_timestamp = now_unix - (60000 * resolution) * qty_or_start_time_stamp
 
     if provided_end_timestamp:
         end_timestamp = provided_end_timestamp
     else:
         end_timestamp = now_unix
 
-    return f"end_timestamp={end_timestamp}&instrument_name={instrument_name}&resolution={resolution}&start_timestamp={start_timestamp}"
+    return f"{get_tradingview_chart_data_end_point()}end_timestamp={end_timestamp}&instrument_name={instrument_name}&resolution={resolution}&start_timestamp={start_timestamp}"
 
 
 async def get_ohlc(
@@ -352,6 +368,24 @@ def cancel_order_end_point() -> str:
     return f"private/cancel"
 
 
+def edit_order_end_point() -> str:
+    return f"private/edit"
+
+
+def get_edit_order_params(
+    order_id: str,
+    amount: float,
+    price: float,
+    post_only: bool = True,
+) -> dict:
+    return {
+        "order_id": order_id,
+        "amount": amount,
+        "price": price,
+        "post_only": post_only,
+    }
+
+
 def get_cancel_order_params(
     order_id: str,
 ) -> dict:
@@ -381,6 +415,7 @@ def get_user_trades_by_instrument_and_time_params(
         "end_timestamp": now_unix,
         "instrument_name": instrument_name,
         "historical": historical,
+        "sorting": "asc",
         "start_timestamp": start_timestamp,
     }
 
@@ -413,6 +448,42 @@ class SendApiRequest:
     client_id: str
     client_secret: str
 
+    async def requesting(
+        self,
+        endpoint: str,
+        params: dict,
+    ) -> dict:
+        """private REST call; identical concurrent reads share one call"""
+
+        return await request_cache.getting(
+            endpoint,
+            building_key(self.client_id, endpoint, params),
+            lambda: self.sending(endpoint, params),
+        )
+
+    async def sending(
+        self,
+        endpoint: str,
+        params: dict,
+    ) -> dict:
+        """private REST call, paced by the process-wide credit scheduler"""
+
+        await credit_scheduler.acquiring(endpoint)
+
+        result = await connector.get_connected(
+            get_basic_https(),
+            endpoint,
+            self.client_id,
+            self.client_secret,
+            params,
+        )
+
+        # orders/edits/cancels change the account: cached reads are stale
+        if classifying_endpoint(endpoint)[1] != READ:
+            request_cache.invalidating()
+
+        return result
+
     async def simulate_portfolio(
         self,
         instrument_name: str,
@@ -478,11 +549,8 @@ class SendApiRequest:
 
         """
 
-        portfolio_simulation = await connector.get_connected(
-            get_basic_https(),
+        portfolio_simulation = await self.requesting(
             simulate_portfolio_end_point(),
-            self.client_id,
-            self.client_secret,
             simulate_portfolio_params(
                 instrument_name,
                 position,
@@ -498,18 +566,69 @@ class SendApiRequest:
     ) -> None:
         """ """
 
-        cancel_order = await connector.get_connected(
-            get_basic_https(),
+        params = get_cancel_order_params(order_id)
+
+        # cancelling is idempotent, so any WS failure can fall back to REST
+        if ws_rpc.rpc_client.serves(self.client_id):
+
+            try:
+                cancel_order = await ws_rpc.rpc_client.request(
+                    cancel_order_end_point(),
+                    params,
+                )
+                return cancel_order["result"]
+
+            except (
+                ws_rpc.WsNotConnected,
+                ws_rpc.WsOutcomeUnknown,
+                asyncio.TimeoutError,
+                KeyError,
+            ):
+                pass
+
+        cancel_order = await self.requesting(
             cancel_order_end_point(),
-            self.client_id,
-            self.client_secret,
-            get_cancel_order_params(
-                order_id,
-            ),
+            params,
         )
 
         return cancel_order["result"]
 
+    async def cancel_orders_byOrderIds(
+        self,
+        order_ids: list,
+    ) -> list:
+        """cancel several orders without waiting for each response in turn"""
+
+        return await asyncio.gather(
+            *[self.get_cancel_order_byOrderId(order_id) for order_id in order_ids],
+            return_exceptions=True,
+        )
+
+    async def edit_order(
+        self,
+        order_id: str,
+        amount: float,
+        price: float,
+        post_only: bool = True,
+    ) -> dict:
+        """ """
+
+        params = get_edit_order_params(order_id, amount, price, post_only)
+
+        if ws_rpc.rpc_client.serves(self.client_id):
+
+            # a sent edit whose reply was lost is not resent, as for orders
+            try:
+                return await ws_rpc.rpc_client.edit_order(params)
+
+            except ws_rpc.WsNotConnected:
+                pass
+
+        return await self.requesting(
+            edit_order_end_point(),
+            params,
+        )
+
     async def send_limit_order(
         self,
         params: dict,
@@ -636,27 +755,40 @@ class SendApiRequest:
 
         if side is not None:
 
-            result = await connector.get_connected(
-                get_basic_https(),
+            order_params = send_orders_params(
+                side,
+                instrument,
+                amount,
+                label,
+                price,
+                type,
+                otoco_config,
+                linked_order_type,
+                trigger_price,
+                trigger,
+                time_in_force,
+                reduce_only,
+                post_only,
+                reject_post_only,
+            )
+
+            if ws_rpc.rpc_client.serves(self.client_id):
+
+                # fall back to REST only if the order never left this process.
+                # without a reply the order may be live: resending could double it
+                try:
+                    return await ws_rpc.rpc_client.send_order(side, order_params)
+
+                except ws_rpc.WsNotConnected:
+                    pass
+
+                except (asyncio.TimeoutError, ws_rpc.WsOutcomeUnknown):
+                    log.warning(f"order {label} sent over WS without response")
+                    return result
+
+            result = await self.requesting(
                 send_orders_end_point(side),
-                self.client_id,
-                self.client_secret,
-                send_orders_params(
-                    side,
-                    instrument,
-                    amount,
-                    label,
-                    price,
-                    type,
-                    otoco_config,
-                    linked_order_type,
-                    trigger_price,
-                    trigger,
-                    time_in_force,
-                    reduce_only,
-                    post_only,
-                    reject_post_only,
-                ),
+                order_params,
             )
 
         return result
@@ -666,11 +798,8 @@ class SendApiRequest:
         with_portfolio: bool = True,
     ) -> dict:
 
-        sub_account = await connector.get_connected(
-            get_basic_https(),
+        sub_account = await self.requesting(
             get_subaccounts_end_point(),
-            self.client_id,
-            self.client_secret,
             get_subaccounts_params(with_portfolio),
         )
 
@@ -682,11 +811,8 @@ class SendApiRequest:
         with_open_orders: bool = True,
     ) -> dict:
 
-        sub_account = await connector.get_connected(
-            get_basic_https(),
+        sub_account = await self.requesting(
             get_subaccounts_details_end_point(),
-            self.client_id,
-            self.client_secret,
             get_subaccounts_details_params(
                 currency,
                 with_open_orders,
@@ -703,11 +829,8 @@ class SendApiRequest:
         query: str = "trade",
     ) -> list:
 
-        result_transaction_log = await connector.get_connected(
-            get_basic_https(),
+        result_transaction_log = await self.requesting(
             get_transaction_log_end_point(),
-            self.client_id,
-            self.client_secret,
             get_transaction_log_params(
                 currency,
                 start_timestamp,
@@ -726,11 +849,8 @@ class SendApiRequest:
         type: str,
     ) -> list:
 
-        result_open_orders = await connector.get_connected(
-            get_basic_https(),
+        result_open_orders = await self.requesting(
             get_open_orders_end_point(),
-            self.client_id,
-            self.client_secret,
             get_open_orders_params(
                 kind,
                 type,
@@ -781,22 +901,42 @@ class SendApiRequest:
             'has_more': False
             }
 
+        return: every trade since start_timestamp, paged by count oldest
+            first while has_more
         """
 
-        result_trades = await connector.get_connected(
-            get_basic_https(),
-            get_user_trades_by_instrument_and_time_end_point(),
-            self.client_id,
-            self.client_secret,
-            get_user_trades_by_instrument_and_time_params(
-                instrument_name,
-                start_timestamp,
-                historical,
-                count,
-            ),
-        )
+        trades = {}
+
+        while True:
+
+            result_trades = await self.requesting(
+                get_user_trades_by_instrument_and_time_end_point(),
+                get_user_trades_by_instrument_and_time_params(
+                    instrument_name,
+                    start_timestamp,
+                    historical,
+                    count,
+                ),
+            )
+
+            page = result_trades["result"]["trades"]
+
+            # the next page starts at the last timestamp: trades of that ms
+            # come back twice
+            trades.update({o["trade_id"]: o for o in page})
+
+            if not result_trades["result"].get("has_more") or not page:
+                break
+
+            last_timestamp = page[-1]["timestamp"]
+
+            # a full page within one ms, nothing left to page on
+            if last_timestamp == start_timestamp:
+                break
+
+            start_timestamp = last_timestamp
 
-        return result_trades["result"]["trades"]
+        return list(trades.values())
 
 
 def get_user_trades_by_currency_params(
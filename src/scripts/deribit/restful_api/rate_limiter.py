@@ -0,0 +1,238 @@
+# src\scripts\deribit\restful_api\rate_limiter.py
+
+"""
+Client-side model of Deribit's credit based rate limits
+
+Deribit keeps two credit pools per account:
+    - matching engine (buy/sell/edit/cancel): a small burst refilled at a
+      tier dependent number of requests per second
+    - non matching engine (everything else): 50_000 credits, 500 per
+      request, refilled at 10_000 credits per second
+
+Every caller in the process shares one scheduler. When a pool runs dry,
+requests queue up and are granted strictly by priority (cancel, then order,
+then read) so that reconciliation loops can never starve a cancel.
+
+references:
+    - https://docs.deribit.com/#rate-limits
+    - https://support.deribit.com/hc/en-us/articles/25944617523357-Rate-Limits
+"""
+
+# built ins
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import defaultdict
+
+# installed
+from dataclassy import dataclass
+from loguru import logger as log
+
+# priority classes, lower is served first
+CANCEL = 0
+ORDER = 1
+READ = 2
+
+PRIORITY_NAMES = {CANCEL: "cancel", ORDER: "order", READ: "read"}
+
+MATCHING_ENGINE = "matching_engine"
+NON_MATCHING_ENGINE = "non_matching_engine"
+
+
+def classifying_endpoint(endpoint: str) -> tuple:
+    """
+    return: (pool, priority) for a json-rpc method, e.g. "private/cancel"
+    """
+
+    method = endpoint.rsplit("/", 1)[-1].rstrip("?")
+
+    if method.startswith("cancel"):
+        return MATCHING_ENGINE, CANCEL
+
+    if method in ("buy", "sell", "edit", "edit_by_label"):
+        return MATCHING_ENGINE, ORDER
+
+    return NON_MATCHING_ENGINE, READ
+
+
+@dataclass(unsafe_hash=True, slots=True)
+class TokenBucket:
+    """ """
+
+    capacity: float
+    refill_per_second: float
+    cost: float
+    credits: float = None
+    last_refill: float = 0.0
+
+    def __post_init__(self):
+        """ """
+        self.credits = self.capacity if self.credits is None else self.credits
+        self.last_refill = time.monotonic()
+
+    def refilling(self) -> None:
+        """ """
+
+        now = time.monotonic()
+
+        self.credits = min(
+            self.capacity,
+            self.credits + (now - self.last_refill) * self.refill_per_second,
+        )
+        self.last_refill = now
+
+    def try_consuming(self) -> bool:
+        """ """
+
+        self.refilling()
+
+        if self.credits >= self.cost:
+            self.credits -= self.cost
+            return True
+
+        return False
+
+    def seconds_until_available(self) -> float:
+        """ """
+
+        return max(0.0, (self.cost - self.credits) / self.refill_per_second)
+
+
+@dataclass(unsafe_hash=True, slots=True)
+class PoolQueue:
+    """Waiters of one credit pool, ordered by (priority, arrival)"""
+
+    bucket: TokenBucket
+    waiters: list = []
+    draining_task: asyncio.Task = None
+
+
+class CreditScheduler:
+    """Singleton priority scheduler shared by every request sender"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._build()
+        return cls._instance
+
+    def _build(self) -> None:
+        """ """
+
+        self.pools = {
+            MATCHING_ENGINE: PoolQueue(
+                TokenBucket(
+                    capacity=float(os.getenv("DERIBIT_ME_BURST", 20)),
+                    refill_per_second=float(os.getenv("DERIBIT_ME_RATE", 5)),
+                    cost=1,
+                )
+            ),
+            NON_MATCHING_ENGINE: PoolQueue(
+                TokenBucket(
+                    capacity=50_000,
+                    refill_per_second=10_000,
+                    cost=500,
+                )
+            ),
+        }
+
+        self.arrivals = itertools.count()
+
+        # wait metrics per priority class
+        self.granted = defaultdict(int)
+        self.queued = defaultdict(int)
+        self.wait_seconds_total = defaultdict(float)
+        self.wait_seconds_max = defaultdict(float)
+
+    async def acquiring(
+        self,
+        endpoint: str,
+    ) -> float:
+        """
+        Wait until the request may be sent.
+
+        return: seconds spent waiting
+        """
+
+        pool_name, priority = classifying_endpoint(endpoint)
+        pool: PoolQueue = self.pools[pool_name]
+
+        # fast path: nobody queued and credits available
+        if not pool.waiters and pool.bucket.try_consuming():
+            self.recording(priority, 0.0)
+            return 0.0
+
+        started = time.monotonic()
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(pool.waiters, (priority, next(self.arrivals), future))
+        self.queued[priority] += 1
+
+        if pool.draining_task is None or pool.draining_task.done():
+            pool.draining_task = asyncio.create_task(self.draining(pool))
+
+        await future
+
+        waited = time.monotonic() - started
+        self.recording(priority, waited)
+
+        if waited > 1:
+            log.warning(
+                f"{PRIORITY_NAMES[priority]} request {endpoint} waited {waited:.2f}s for credits"
+            )
+
+        return waited
+
+    async def draining(
+        self,
+        pool: PoolQueue,
+    ) -> None:
+        """Grant queued requests, highest priority first, as credits refill"""
+
+        while pool.waiters:
+
+            if pool.bucket.try_consuming():
+
+                _, _, future = heapq.heappop(pool.waiters)
+
+                # the waiter may have been cancelled meanwhile: refund
+                if future.done():
+                    pool.bucket.credits += pool.bucket.cost
+                    continue
+
+                future.set_result(None)
+
+            else:
+                await asyncio.sleep(pool.bucket.seconds_until_available())
+
+    def recording(
+        self,
+        priority: int,
+        waited: float,
+    ) -> None:
+        """ """
+
+        self.granted[priority] += 1
+        self.wait_seconds_total[priority] += waited
+        self.wait_seconds_max[priority] = max(self.wait_seconds_max[priority], waited)
+
+    def stats(self) -> dict:
+        """ """
+
+        return {
+            PRIORITY_NAMES[priority]: dict(
+                granted=self.granted[priority],
+                queued=self.queued[priority],
+                wait_seconds_total=round(self.wait_seconds_total[priority], 6),
+                wait_seconds_max=round(self.wait_seconds_max[priority], 6),
+            )
+            for priority in PRIORITY_NAMES
+        }
+
+
+# Global credit scheduler instance
+credit_scheduler = CreditScheduler()
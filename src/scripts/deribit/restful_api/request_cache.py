@@ -0,0 +1,173 @@
+# src\scripts\deribit\restful_api\request_cache.py
+
+"""
+Single-flight coalescing and short-TTL caching for repeated REST reads
+
+Tasks in one process often ask for the same thing at the same moment
+(sub account details after every order update, instruments at startup).
+Identical concurrent reads share a single in-flight call, and the result
+is kept for a per-endpoint TTL. Writes (orders, edits, cancels) and the
+WS events that signal an account change invalidate the private entries.
+"""
+
+# built ins
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+# installed
+import orjson
+from loguru import logger as log
+
+# seconds a successful response stays valid, per endpoint.
+# endpoints not listed here are never cached nor coalesced
+ENDPOINT_TTL = {
+    "public/get_instruments": 300.0,
+    "private/get_subaccounts": 2.0,
+    "private/get_subaccounts_details": 2.0,
+    "private/get_open_orders": 1.0,
+}
+
+
+def get_endpoint_ttl(endpoint: str) -> float:
+    """ """
+
+    return ENDPOINT_TTL.get(endpoint.split("?", 1)[0], 0.0)
+
+
+def building_key(*parts: Any) -> str:
+    """ """
+
+    return orjson.dumps(parts, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+
+
+class RequestCache:
+    """Singleton single-flight/TTL cache"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.cached = {}
+            cls._instance.in_flight = {}
+            # invalidated prefix: times it was invalidated
+            cls._instance.generations = {}
+            cls._instance.hits = 0
+            cls._instance.coalesced = 0
+            cls._instance.misses = 0
+        return cls._instance
+
+    def getting_generation(self, endpoint: str) -> int:
+        """changes whenever a group the endpoint belongs to is invalidated"""
+
+        return sum(
+            count
+            for prefix, count in self.generations.items()
+            if endpoint.startswith(prefix)
+        )
+
+    async def getting(
+        self,
+        endpoint: str,
+        key: str,
+        fetching: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        endpoint: decides the TTL and the invalidation group
+        key: identity of the request (endpoint, credentials, params)
+        fetching: coroutine function performing the real call
+        """
+
+        ttl = get_endpoint_ttl(endpoint)
+
+        if not ttl:
+            return await fetching()
+
+        entry = self.cached.get(key)
+
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[2]
+
+        generation = self.getting_generation(endpoint)
+
+        flight = self.in_flight.get(key)
+
+        # a call started before an invalidation may return stale data: later
+        # reads start their own
+        if flight is not None and flight[0] == generation:
+            future = flight[1]
+            self.coalesced += 1
+
+            try:
+                return await asyncio.shield(future)
+
+            except asyncio.CancelledError:
+                # only the leader was cancelled: this waiter takes over
+                if not future.cancelled():
+                    raise
+                return await self.getting(endpoint, key, fetching)
+
+        self.misses += 1
+
+        future = asyncio.get_running_loop().create_future()
+        flight = (generation, future)
+        self.in_flight[key] = flight
+
+        try:
+            result = await fetching()
+
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+        except Exception as error:
+            future.set_exception(error)
+            # the leader re-raises itself; retrieving the exception here keeps
+            # a failure nobody else waited for from being logged as unhandled
+            future.exception()
+            raise
+
+        else:
+            future.set_result(result)
+
+            # invalidated while in flight: returned but not kept
+            if self.getting_generation(endpoint) == generation:
+                self.cached[key] = (time.monotonic() + ttl, endpoint, result)
+
+            return result
+
+        finally:
+            if self.in_flight.get(key) is flight:
+                del self.in_flight[key]
+
+    def invalidating(
+        self,
+        prefix: str = "private/",
+    ) -> None:
+        """Drop cached responses of endpoints starting with prefix"""
+
+        self.generations[prefix] = self.generations.get(prefix, 0) + 1
+
+        stale = [k for k, entry in self.cached.items() if entry[1].startswith(prefix)]
+
+        for key in stale:
+            del self.cached[key]
+
+        if stale:
+            log.debug(f"invalidated {len(stale)} cached {prefix} responses")
+
+    def stats(self) -> dict:
+        """ """
+
+        return dict(
+            hits=self.hits,
+            coalesced=self.coalesced,
+            misses=self.misses,
+            entries=len(self.cached),
+        )
+
+
+# Global request cache instance
+request_cache = RequestCache()
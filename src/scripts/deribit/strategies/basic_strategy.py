@@ -9,6 +9,7 @@ from loguru import logger as log
 
 # user defined formula
 from src.shared.utils import error_handling, string_modification as str_mod
+from src.shared.utils.labels import parsed_label
 
 
 def positions_and_orders(
@@ -171,13 +172,13 @@ def get_label(
 
     else:
 
+        parsed = parsed_label(label_main_or_label_transactions)
+
         # parsing label id
-        label_id: int = str_mod.parsing_label(label_main_or_label_transactions)["int"]
+        label_id: int = parsed.int
 
         # parsing label strategy
-        label_main: str = str_mod.parsing_label(label_main_or_label_transactions)[
-            "main"
-        ]
+        label_main: str = parsed.main
 
         if status == "contra":
 
@@ -389,7 +390,7 @@ def get_transaction_price(transaction: dict) -> float:
 def get_label_integer(label: dict) -> bool:
     """ """
 
-    return str_mod.parsing_label(label)["int"]
+    return parsed_label(label).int
 
 
 def get_order_label(data_from_db: list) -> list:
@@ -401,12 +402,9 @@ def get_order_label(data_from_db: list) -> list:
 def get_label_super_main(result: list, strategy_label: str) -> list:
     """ """
 
-    return [
-        o
-        for o in result
-        if str_mod.parsing_label(strategy_label)["super_main"]
-        == str_mod.parsing_label(o["label"])["super_main"]
-    ]
+    super_main = parsed_label(strategy_label).super_main
+
+    return [o for o in result if parsed_label(o["label"]).super_main == super_main]
 
 
 def combine_vars_to_get_future_spread_label(timestamp: int) -> str:
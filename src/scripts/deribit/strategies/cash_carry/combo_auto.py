@@ -20,6 +20,7 @@ from src.shared.utils import (
     string_modification as str_mod,
     system_tools,
 )
+from src.shared.utils.labels import parsed_label
 
 
 def reading_from_pkl_data(end_point: str, currency: str, status: str = None) -> dict:
@@ -156,12 +157,9 @@ def extracting_closing_parameters_from_transactions(
 def get_label_main(result: list, strategy_label: str) -> list:
     """ """
 
-    return [
-        o
-        for o in result
-        if str_mod.parsing_label(strategy_label)["main"]
-        == str_mod.parsing_label(o["label"])["main"]
-    ]
+    main = parsed_label(strategy_label).main
+
+    return [o for o in result if parsed_label(o["label"]).main == main]
 
 
 def get_outstanding_closed_orders(orders_currency: dict, label_integer: int) -> list:
@@ -257,7 +255,6 @@ def get_label(status: str, label_main_or_label_transactions: str) -> str:
     """
     provide transaction label
     """
-    from utilities import label_numbering
 
     if status == "open":
         # get open label
@@ -265,13 +262,13 @@ def get_label(status: str, label_main_or_label_transactions: str) -> str:
 
     if status == "closed":
 
+        parsed = parsed_label(label_main_or_label_transactions)
+
         # parsing label id
-        label_id: int = str_mod.parsing_label(label_main_or_label_transactions)["int"]
+        label_id: int = parsed.int
 
         # parsing label strategy
-        label_main: str = str_mod.parsing_label(label_main_or_label_transactions)[
-            "main"
-        ]
+        label_main: str = parsed.main
 
         # combine id + label strategy
         label: str = f"""{label_main}-closed-{label_id}"""
@@ -6,7 +6,6 @@ import math
 
 # installed
 import uvloop
-import orjson
 from loguru import logger as log
 
 asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
@@ -14,6 +13,11 @@ asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 from db_management.redis_client import publishing_result
 from messaging.telegram_bot import telegram_bot_sendtext
 from messaging import get_published_messages, subscribing_to_channels
+from core.db import codecs
+from core.db.redis import redis_client as snapshot_store
+from core.latency import STRATEGY_DECISION, latency_tracer
+from src.scripts.deribit import versioned_cache
+from src.shared.config.constants import RedisKeys
 from strategies.hedging.hedging_spot import (
     HedgingSpot,
     modify_hedging_instrument,
@@ -93,6 +97,11 @@ async def hedging_spot(
         ticker_cached_channel: str = redis_channels["ticker_cache_updating"]
         sub_account_cached_channel: str = redis_channels["sub_account_cache_updating"]
 
+        # rebuilds the sub account view from snapshot/delta broadcasts
+        sub_account_subscriber = versioned_cache.VersionedSubscriber(
+            sub_account_cached_channel
+        )
+
         # subscribe to channels
         await subscribing_to_channels.redis_channels(
             pubsub,
@@ -104,7 +113,14 @@ async def hedging_spot(
 
         not_cancel = True
 
-        market_condition_all = []
+        # latest market condition of every instrument, until the next update
+        market_condition_all = [
+            o
+            for o in (
+                await snapshot_store.get_many(RedisKeys.MARKET_CONDITION)
+            ).values()
+            if o
+        ]
 
         query_trades = f"SELECT * FROM  v_trading_all_active"
 
@@ -169,6 +185,11 @@ async def hedging_spot(
 
                 if sub_account_cached_channel in message_channel:
 
+                    data = await sub_account_subscriber.receiving(
+                        client_redis,
+                        data,
+                    )
+
                     cached_orders = data["open_orders"]
 
                     my_trades_active_all = data["my_trades"]
@@ -368,6 +389,13 @@ async def hedging_spot(
 
                                 if send_order["order_allowed"]:
 
+                                    # tick to order: the trace of the ticker
+                                    # carries on to the executor
+                                    send_order["trace"] = latency_tracer.stamping(
+                                        dict(data.get("trace") or {}),
+                                        STRATEGY_DECISION,
+                                    )
+
                                     result["params"].update(
                                         {"channel": sending_order_channel}
                                     )
@@ -677,7 +705,7 @@ def get_data_and_channel_from_message(message_byte: dict) -> dict:
 
     if message_byte and message_byte["type"] == "message":
 
-        message_byte_data = orjson.loads(message_byte["data"])
+        message_byte_data = codecs.unsealing(message_byte["data"])
 
         params = message_byte_data["params"]
 
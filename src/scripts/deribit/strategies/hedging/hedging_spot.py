@@ -305,9 +305,6 @@ class HedgingSpot(BasicStrategy):
 
     def __post_init__(self):
 
-        print(f"HedgingSpot init args: {args}")
-        print(f"HedgingSpot init kwargs: {kwargs}")
-
         self.sum_my_trades_currency_strategy = get_transactions_sum(
             self.my_trades_currency_strategy
         )
@@ -322,8 +319,6 @@ class HedgingSpot(BasicStrategy):
             self.market_condition,
         )
 
-        print(f"sum_my_trades_currency_strategy {self.sum_my_trades_currency_strategy}")
-
     #        log.info(
     #            f" max_position {self.max_position} over_hedged_opening {self.over_hedged_opening}  over_hedged_closing {self.over_hedged_closing} sum_my_trades_currency_strategy {self.sum_my_trades_currency_strategy}"
     #        )
@@ -331,10 +326,6 @@ class HedgingSpot(BasicStrategy):
     def get_basic_params(self) -> dict:
         """ """
 
-        print(
-            f"strategy_label {self.strategy_label} strategy_parameters {self.strategy_parameters}"
-        )
-
         return BasicStrategy(self.strategy_label, self.strategy_parameters)
 
     async def understanding_the_market(self, threshold_market_condition) -> None:
@@ -644,8 +635,6 @@ class HedgingSpot(BasicStrategy):
         #        neutral = market_condition["neutral"]
         params: dict = self.get_basic_params().get_basic_opening_parameters(ask_price)
 
-        print(f"params {params}")
-
         weighted_factor = hedging_attributes["weighted_factor"]
 
         SIZE_FACTOR = get_waiting_time_factor(weighted_factor, strong_bearish, bearish)
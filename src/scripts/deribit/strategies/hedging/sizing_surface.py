@@ -0,0 +1,258 @@
+# src\scripts\deribit\strategies\hedging\sizing_surface.py
+
+"""
+Batched versions of the hedging_spot sizing functions, over numpy arrays
+
+Every function takes arrays (or scalars) broadcasting together and returns,
+element wise, exactly what its scalar namesake in hedging_spot.py returns
+for the same inputs: same branches, same order of the float operations.
+
+sweeping evaluates them over the cartesian product of its axes and returns
+the whole decision surface, e.g. for the risk reviews:
+
+    surface = sweeping(
+        notional=np.linspace(10_000, 1_000_000, 100),
+        sum_my_trades_currency_strategy=np.linspace(-1_000_000, 100_000, 100),
+        market_conditions=[NEUTRAL, BEARISH, STRONG_BEARISH, ...],
+        waiting_minute_before_cancel=[1, 3, 10],
+        ...
+    )
+    surface["opening_size"][i_notional, i_sum, i_condition, ...]
+"""
+
+# built ins
+from typing import Iterable
+
+# installed
+import numpy as np
+
+ONE_PCT = 1 / 100
+
+MARKET_CONDITION_KEYS = (
+    "strong_bullish",
+    "bullish",
+    "weak_bullish",
+    "neutral",
+    "weak_bearish",
+    "bearish",
+    "strong_bearish",
+)
+
+
+def size_multiply_factor(
+    strong_bullish,
+    bullish,
+    weak_bullish,
+    strong_bearish,
+    bearish,
+    weak_bearish,
+) -> np.ndarray:
+    """ """
+
+    return np.select(
+        [
+            np.logical_or(bullish, strong_bullish),
+            weak_bullish,
+            strong_bearish,
+            bearish,
+            weak_bearish,
+        ],
+        [0.0, 0.8, 1.5, 1.3, 1.1],
+        default=1.0,
+    )
+
+
+def size_to_be_hedged(
+    notional,
+    sum_my_trades_currency_strategy,
+    over_hedged_closing,
+    multiply_factor,
+) -> np.ndarray:
+    """
+    multiply_factor: of size_multiply_factor, for the market condition
+    """
+
+    notional = np.asarray(notional, dtype=float)
+
+    max_position = np.where(
+        over_hedged_closing,
+        (np.abs(notional) + sum_my_trades_currency_strategy) * -1,
+        notional,
+    )
+
+    return multiply_factor * max_position
+
+
+def size_rounding(
+    min_trade_amount,
+    proposed_size,
+) -> np.ndarray:
+    """ """
+
+    # np.round rounds half to even, as round does
+    rounded_size = np.round(proposed_size / min_trade_amount) * min_trade_amount
+
+    return np.maximum(min_trade_amount, rounded_size)
+
+
+def determine_opening_size(
+    min_trade_amount,
+    side,
+    max_position,
+    factor,
+) -> np.ndarray:
+    """
+    min_trade_amount: of the instrument, looked up by the scalar version
+    """
+
+    sign = np.where(np.asarray(side) == "sell", -1, 1)
+
+    proposed_size = np.maximum(1, np.trunc(np.abs(max_position) * factor))
+
+    return size_rounding(min_trade_amount, proposed_size) * sign
+
+
+def get_waiting_time_factor(
+    weighted_factor_medium,
+    weighted_factor_extreme,
+    strong_fluctuation,
+    some_fluctuation,
+) -> np.ndarray:
+    """ """
+
+    bearish_factor = np.where(
+        strong_fluctuation,
+        np.multiply(weighted_factor_extreme, ONE_PCT),
+        np.multiply(weighted_factor_medium, ONE_PCT),
+    )
+
+    return np.where(
+        np.logical_or(strong_fluctuation, some_fluctuation),
+        bearish_factor,
+        ONE_PCT,
+    )
+
+
+def get_timing_factor(
+    strong_bearish,
+    bearish,
+    threshold,
+) -> np.ndarray:
+    """ """
+
+    threshold = np.asarray(threshold, dtype=float)
+
+    bearish_interval_threshold = np.where(
+        strong_bearish,
+        threshold * ONE_PCT * 30,
+        threshold * ONE_PCT * 60,
+    )
+
+    return np.where(
+        np.logical_or(strong_bearish, bearish),
+        threshold * bearish_interval_threshold,
+        threshold,
+    )
+
+
+def get_market_condition_arrays(market_conditions: Iterable[dict]) -> dict:
+    """
+    return: {key: boolean array, one element per market condition}
+    """
+
+    market_conditions = list(market_conditions)
+
+    return {
+        key: np.array([bool(o.get(key)) for o in market_conditions])
+        for key in MARKET_CONDITION_KEYS
+    }
+
+
+def sweeping(
+    notional,
+    sum_my_trades_currency_strategy,
+    market_conditions: Iterable[dict],
+    weighted_factor_medium=5,
+    weighted_factor_extreme=10,
+    waiting_minute_before_cancel=3,
+    min_trade_amount=10,
+    side: str = "sell",
+) -> dict:
+    """
+    every argument but side is an axis (a scalar is an axis of one value)
+    return: the axes and, over their cartesian product (one dimension per
+        axis, in the order of the arguments):
+        max_position    HedgingSpot.max_position, for max_position = -notional
+        size_factor     SIZE_FACTOR of is_send_open_order_allowed
+        opening_size    signed size of opening_position
+        timing_factor   get_timing_factor of the open orders cancelling
+    """
+
+    conditions = get_market_condition_arrays(market_conditions)
+
+    axes = dict(
+        notional=np.atleast_1d(np.asarray(notional, dtype=float)),
+        sum_my_trades_currency_strategy=np.atleast_1d(
+            np.asarray(sum_my_trades_currency_strategy, dtype=float)
+        ),
+        market_condition=np.arange(len(conditions["neutral"])),
+        weighted_factor_medium=np.atleast_1d(weighted_factor_medium),
+        weighted_factor_extreme=np.atleast_1d(weighted_factor_extreme),
+        waiting_minute_before_cancel=np.atleast_1d(waiting_minute_before_cancel),
+        min_trade_amount=np.atleast_1d(min_trade_amount),
+    )
+
+    # open meshes: every array broadcasts to the full surface only when combined
+    (
+        notional,
+        sum_trades,
+        condition,
+        medium,
+        extreme,
+        threshold,
+        min_amount,
+    ) = np.meshgrid(*axes.values(), indexing="ij", sparse=True)
+
+    condition = {key: value[condition] for key, value in conditions.items()}
+
+    multiply_factor = size_multiply_factor(
+        condition["strong_bullish"],
+        condition["bullish"],
+        condition["weak_bullish"],
+        condition["strong_bearish"],
+        condition["bearish"],
+        condition["weak_bearish"],
+    )
+
+    # HedgingSpot receives the notional with the sign of a short hedge
+    max_position = size_to_be_hedged(
+        notional * -1,
+        sum_trades,
+        sum_trades > 0,
+        multiply_factor,
+    )
+
+    size_factor = get_waiting_time_factor(
+        medium,
+        extreme,
+        condition["strong_bearish"],
+        condition["bearish"],
+    )
+
+    opening_size = determine_opening_size(min_amount, side, max_position, size_factor)
+
+    timing_factor = get_timing_factor(
+        condition["strong_bearish"],
+        condition["bearish"],
+        threshold,
+    )
+
+    shape = tuple(len(o) for o in axes.values())
+
+    return dict(
+        axes=axes,
+        max_position=np.broadcast_to(max_position, shape),
+        size_factor=np.broadcast_to(size_factor, shape),
+        opening_size=np.broadcast_to(opening_size, shape),
+        timing_factor=np.broadcast_to(timing_factor, shape),
+    )
@@ -22,6 +22,7 @@ from src.shared.utils import (
     error_handling,
     template,
 )
+from src.shared.utils.labels import LabelIndex, parsed_label
 
 
 async def relabelling_trades(
@@ -289,17 +290,18 @@ async def relabelling_trades(
                                             cancellable_strategies,
                                         )
 
+                                    label_index = LabelIndex(
+                                        my_trades_currency_strategy
+                                    )
+
                                     #! closing active trades
                                     for label in labels:
 
-                                        label_integer: int = str_mod.parsing_label(
+                                        label_integer: int = parsed_label(label).int
+
+                                        selected_transaction = label_index.under_int(
                                             label
-                                        )["int"]
-                                        selected_transaction = [
-                                            o
-                                            for o in my_trades_currency_strategy
-                                            if str(label_integer) in o["label"]
-                                        ]
+                                        )
 
                                         selected_transaction_amount = [
                                             o["amount"] for o in selected_transaction
@@ -0,0 +1,310 @@
+# src\scripts\deribit\versioned_cache.py
+
+"""
+Snapshot-plus-delta protocol for cache broadcasts
+
+A publisher keeps the last state it broadcast per section (open_orders,
+positions, my_trades) and only sends the rows that changed, stamped with a
+sequence number. The number is counted in Redis, one per channel, so that
+several processes can publish on the same channel. Every
+`snapshot_interval` messages, on the first one and whenever another process
+published in between (its state is then stale), a full snapshot is sent
+instead and stored in a Redis hash, so late joiners and consumers that
+detect a gap can resync. Deltas are never stored: a consumer resyncing
+from an older snapshot waits for the next one.
+
+Message data layout:
+    {
+        "kind": "snapshot" | "delta",
+        "seq": int,
+        "sections": {
+            <section>: {"upserted": [rows], "removed": [keys]}   # delta
+            <section>: [rows]                                     # snapshot
+        },
+    }
+"""
+
+# installed
+import orjson
+from dataclassy import dataclass
+from loguru import logger as log
+
+# user defined formula
+from core.db import codecs, redis as redis_client
+from src.shared.utils import error_handling
+
+SNAPSHOT_KEY = "cache:snapshot"
+
+SEQ_KEY = "cache:seq"
+
+# identity of a row within each section
+SECTION_KEYS = dict(
+    open_orders="order_id",
+    positions="instrument_name",
+    my_trades="trade_id",
+)
+
+
+def get_row_key(
+    row: dict,
+    key: str,
+) -> str:
+    """ """
+
+    # rows without identity (e.g. not yet traded) fall back to their content
+    return row.get(key) or orjson.dumps(row, option=orjson.OPT_SORT_KEYS).decode()
+
+
+def indexing_rows(
+    rows: list,
+    key: str,
+) -> dict:
+    """ """
+
+    return {get_row_key(o, key): o for o in rows or []}
+
+
+def computing_delta(
+    previous: dict,
+    current: dict,
+) -> dict:
+    """
+    previous/current: rows indexed by their key (see indexing_rows)
+    """
+
+    upserted = [row for k, row in current.items() if previous.get(k) != row]
+    removed = [k for k in previous if k not in current]
+
+    return dict(upserted=upserted, removed=removed)
+
+
+def applying_delta(
+    indexed_rows: dict,
+    delta: dict,
+    key: str,
+) -> dict:
+    """mutate indexed_rows in place; cost is proportional to the delta size"""
+
+    for removed in delta["removed"]:
+        indexed_rows.pop(removed, None)
+
+    for row in delta["upserted"]:
+        indexed_rows[get_row_key(row, key)] = row
+
+    return indexed_rows
+
+
+@dataclass(unsafe_hash=True, slots=True)
+class VersionedPublisher:
+    """Producer side: emits snapshots periodically and deltas in between"""
+
+    channel: str
+    snapshot_interval: int = 100
+    snapshot_key: str = SNAPSHOT_KEY
+    seq_key: str = SEQ_KEY
+    seq: int = 0
+    state: dict = {}
+
+    async def numbering(
+        self,
+        client_redis: object,
+    ) -> int:
+        """the next sequence number of the channel, shared by its publishers"""
+
+        return await client_redis.hincrby(self.seq_key, self.channel, 1)
+
+    def building_message(
+        self,
+        sections: dict,
+        seq: int = None,
+    ) -> dict:
+        """
+        sections: {section: full current rows}
+        seq: from numbering, defaults to the next one of this publisher
+        return: message data to be put into params["data"]
+        """
+
+        seq = self.seq + 1 if seq is None else seq
+
+        # another publisher sent seq - 1: its changes are not in self.state
+        is_snapshot = (
+            seq == 1 or seq != self.seq + 1 or seq % self.snapshot_interval == 0
+        )
+
+        self.seq = seq
+
+        result = {}
+
+        for section, rows in sections.items():
+
+            current = indexing_rows(rows, SECTION_KEYS[section])
+
+            if is_snapshot:
+                result[section] = list(current.values())
+
+            else:
+                result[section] = computing_delta(
+                    self.state.get(section, {}),
+                    current,
+                )
+
+            self.state[section] = current
+
+        return dict(
+            kind="snapshot" if is_snapshot else "delta",
+            seq=self.seq,
+            sections=result,
+        )
+
+    def current_snapshot(self) -> dict:
+        """ """
+
+        return dict(
+            kind="snapshot",
+            seq=self.seq,
+            sections={k: list(v.values()) for k, v in self.state.items()},
+        )
+
+    async def saving_snapshot(
+        self,
+        client_redis: object,
+    ) -> None:
+        """with each snapshot message only, not on every delta"""
+
+        await client_redis.hset(
+            self.snapshot_key,
+            self.channel,
+            codecs.sealing(self.current_snapshot()),
+        )
+
+    async def publishing(
+        self,
+        client_redis: object,
+        message: dict,
+        sections: dict,
+    ) -> None:
+        """
+        message: redis message template (see template.redis_message_template)
+        """
+
+        try:
+
+            data = self.building_message(sections, await self.numbering(client_redis))
+
+            message["params"].update({"channel": self.channel})
+            message["params"].update({"data": data})
+
+            if data["kind"] == "snapshot":
+                await self.saving_snapshot(client_redis)
+
+            await redis_client.publishing_result(
+                client_redis,
+                message,
+            )
+
+        except Exception as error:
+
+            await error_handling.parse_error_message_with_redis(
+                client_redis,
+                error,
+            )
+
+
+@dataclass(unsafe_hash=True, slots=True)
+class VersionedSubscriber:
+    """Consumer side: rebuilds the full view, resyncing from redis on gaps"""
+
+    channel: str
+    snapshot_key: str = SNAPSHOT_KEY
+    seq: int = 0
+    state: dict = {}
+    # the stored snapshot was older than the gap, see receiving
+    is_behind: bool = False
+
+    def loading_snapshot(
+        self,
+        data: dict,
+    ) -> None:
+        """ """
+
+        self.state = {
+            section: indexing_rows(rows, SECTION_KEYS[section])
+            for section, rows in data["sections"].items()
+        }
+        self.seq = data["seq"]
+        self.is_behind = False
+
+    def applying(
+        self,
+        data: dict,
+    ) -> bool:
+        """
+        return: False when a gap is detected and a resync is needed
+        """
+
+        if data["kind"] == "snapshot":
+            self.loading_snapshot(data)
+            return True
+
+        # missed message(s), or the publisher restarted behind our back
+        if data["seq"] != self.seq + 1:
+            log.warning(
+                f"{self.channel} gap detected: expected {self.seq + 1}, got {data['seq']}"
+            )
+            return False
+
+        for section, delta in data["sections"].items():
+            applying_delta(
+                self.state.setdefault(section, {}),
+                delta,
+                SECTION_KEYS[section],
+            )
+
+        self.seq = data["seq"]
+
+        return True
+
+    async def resyncing(
+        self,
+        client_redis: object,
+    ) -> None:
+        """ """
+
+        cached = await redis_client.querying_data(
+            client_redis,
+            self.channel,
+            self.snapshot_key,
+        )
+
+        if cached:
+            self.loading_snapshot(codecs.unsealing(cached))
+
+    async def receiving(
+        self,
+        client_redis: object,
+        data: dict,
+    ) -> dict:
+        """
+        return: full view as {section: [rows]}, the shape consumers used to receive
+        """
+
+        if self.is_behind and data["kind"] != "snapshot":
+            return self.view()
+
+        if not self.applying(data):
+
+            await self.resyncing(client_redis)
+
+            if self.seq + 1 == data["seq"]:
+                self.applying(data)
+
+            # the deltas in between are lost, the view stays as of the
+            # snapshot until the next one
+            self.is_behind = self.seq < data["seq"]
+
+        return self.view()
+
+    def view(self) -> dict:
+        """ """
+
+        return {k: list(v.values()) for k, v in self.state.items()}
@@ -0,0 +1,315 @@
+# src\scripts\deribit\ws_rpc.py
+
+"""
+JSON-RPC request/response multiplexer over an authenticated Deribit WebSocket
+
+Many requests can be in flight on one connection: each one gets its own id
+and a future that the reader task resolves when the matching response
+arrives. Order placement, edits and cancels therefore skip the HTTP
+round-trip, and a batch of cancels is sent back to back without waiting
+for each reply.
+
+Responses keep the REST shape ({"result": ...} or {"error": ...}) so callers
+of SendApiRequest do not care which transport served them.
+"""
+
+# built ins
+import asyncio
+import itertools
+from typing import Any, Dict, List, Optional
+
+# installed
+import orjson
+import websockets
+from dataclassy import dataclass
+from loguru import logger as log
+
+# user defined formula
+from src.scripts.deribit.restful_api.rate_limiter import (
+    READ,
+    classifying_endpoint,
+    credit_scheduler,
+)
+from src.scripts.deribit.restful_api.request_cache import request_cache
+from src.shared.config.constants import AddressUrl, WebsocketParameters
+
+# ids below this are used by the receiver (0: heartbeat, 9929: auth)
+FIRST_REQUEST_ID = 10_000
+
+
+class WsNotConnected(ConnectionError):
+    """Raised when a request cannot be written to the socket"""
+
+
+class WsOutcomeUnknown(ConnectionError):
+    """Raised when the socket went away after a request was written to it"""
+
+
+@dataclass(unsafe_hash=True, slots=True)
+class WsRpcClient:
+    """Multiplexed JSON-RPC client for private Deribit requests"""
+
+    client_id: str = None
+    client_secret: str = None
+    ws_connection_url: str = AddressUrl.DERIBIT_WS
+    request_timeout: float = 5.0
+    reconnect_base_delay: int = WebsocketParameters.RECONNECT_BASE_DELAY
+    max_reconnect_delay: int = WebsocketParameters.MAX_RECONNECT_DELAY
+    websocket_client: Any = None
+    authenticated: bool = False
+    ids: Any = None
+    pending: Dict[int, asyncio.Future] = {}
+    running_task: Optional[asyncio.Task] = None
+    heartbeat_task: Optional[asyncio.Task] = None
+
+    def __post_init__(self):
+        """ """
+        self.ids = itertools.count(FIRST_REQUEST_ID)
+
+    @property
+    def is_ready(self) -> bool:
+        """ """
+        return self.websocket_client is not None and self.authenticated
+
+    def serves(self, client_id: str) -> bool:
+        """True when requests on behalf of client_id can go through this socket"""
+        return self.is_ready and self.client_id == client_id
+
+    async def request(
+        self,
+        method: str,
+        params: dict,
+        timeout: float = None,
+    ) -> dict:
+        """
+        Send one request and wait for its response.
+
+        Raises WsNotConnected when the request could not be sent (safe to
+        retry elsewhere). Once sent, a missing reply raises
+        asyncio.TimeoutError, or WsOutcomeUnknown when the socket closed
+        first: the request may have been executed either way.
+        """
+
+        if self.websocket_client is None:
+            raise WsNotConnected("WebSocket RPC not connected")
+
+        await credit_scheduler.acquiring(method)
+
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+
+        msg = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": method,
+            "params": params,
+        }
+
+        try:
+            await self.websocket_client.send(orjson.dumps(msg).decode("utf-8"))
+
+        except Exception as error:
+            self.pending.pop(request_id, None)
+            raise WsNotConnected(str(error)) from error
+
+        try:
+            return await asyncio.wait_for(
+                future,
+                timeout or self.request_timeout,
+            )
+
+        finally:
+            self.pending.pop(request_id, None)
+
+            # orders/edits/cancels change the account: cached reads are stale
+            if classifying_endpoint(method)[1] != READ:
+                request_cache.invalidating()
+
+    async def requesting_many(
+        self,
+        method: str,
+        params_list: List[dict],
+    ) -> list:
+        """Pipeline several requests, e.g. a batch of cancels"""
+
+        return await asyncio.gather(
+            *[self.request(method, params) for params in params_list],
+            return_exceptions=True,
+        )
+
+    async def send_order(
+        self,
+        side: str,
+        params: dict,
+    ) -> dict:
+        """ """
+        return await self.request(f"private/{side}", params)
+
+    async def edit_order(
+        self,
+        params: dict,
+    ) -> dict:
+        """ """
+        return await self.request("private/edit", params)
+
+    async def cancel_order(
+        self,
+        order_id: str,
+    ) -> dict:
+        """ """
+        return await self.request("private/cancel", {"order_id": order_id})
+
+    async def cancel_orders(
+        self,
+        order_ids: List[str],
+    ) -> list:
+        """ """
+        return await self.requesting_many(
+            "private/cancel",
+            [{"order_id": order_id} for order_id in order_ids],
+        )
+
+    def dispatching(
+        self,
+        message: dict,
+    ) -> None:
+        """Resolve the future waiting for this response, if any"""
+
+        future = self.pending.get(message.get("id"))
+
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    def failing_pending(
+        self,
+        error: Exception,
+    ) -> None:
+        """Wake up every waiter when the socket goes away"""
+
+        # every pending request was written already, see request
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(WsOutcomeUnknown(str(error)))
+
+        self.pending.clear()
+
+    async def authenticating(self) -> None:
+        """ """
+
+        result = await self.request(
+            "public/auth",
+            {
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+            },
+        )
+
+        if "error" in result:
+            raise ConnectionError(f"WebSocket RPC auth failed: {result['error']}")
+
+        await self.request("public/set_heartbeat", {"interval": 30})
+
+        self.authenticated = True
+
+    async def reading(self) -> None:
+        """Route responses to their waiters and answer heartbeats"""
+
+        async for raw in self.websocket_client:
+
+            message = orjson.loads(raw)
+
+            if message.get("method") == "heartbeat":
+
+                if message["params"]["type"] == "test_request":
+                    self.heartbeat_task = asyncio.create_task(
+                        self.request("public/test", {})
+                    )
+
+                continue
+
+            self.dispatching(message)
+
+    async def connecting(self) -> None:
+        """Connect, authenticate and serve responses until the socket closes"""
+
+        async with websockets.connect(
+            self.ws_connection_url,
+            ping_interval=None,
+            ping_timeout=None,
+            close_timeout=10,
+            compression=None,
+        ) as self.websocket_client:
+
+            reader = asyncio.create_task(self.reading())
+
+            try:
+                await self.authenticating()
+                log.info("WebSocket RPC connection authenticated")
+                await reader
+
+            finally:
+                reader.cancel()
+
+    async def running(self) -> None:
+        """Keep the connection alive, reconnecting with exponential backoff"""
+
+        attempts = 0
+
+        while True:
+
+            try:
+                await self.connecting()
+                attempts = 0
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as error:
+                log.warning(f"WebSocket RPC connection lost: {error}")
+
+            finally:
+                self.authenticated = False
+                self.websocket_client = None
+                self.failing_pending(ConnectionError("WebSocket RPC disconnected"))
+
+            attempts += 1
+            await asyncio.sleep(
+                min(
+                    self.reconnect_base_delay * 2 ** (attempts - 1),
+                    self.max_reconnect_delay,
+                )
+            )
+
+    def start(
+        self,
+        client_id: str,
+        client_secret: str,
+    ) -> asyncio.Task:
+        """ """
+
+        self.client_id = client_id
+        self.client_secret = client_secret
+
+        if self.running_task is None or self.running_task.done():
+            self.running_task = asyncio.create_task(self.running())
+
+        return self.running_task
+
+    async def close(self) -> None:
+        """Shutdown hook"""
+
+        if self.running_task is not None:
+            self.running_task.cancel()
+
+            try:
+                await self.running_task
+            except asyncio.CancelledError:
+                pass
+
+        self.running_task = None
+
+
+# Global WebSocket RPC client, started by services that trade
+rpc_client = WsRpcClient()
@@ -10,6 +10,7 @@ from loguru import logger as log
 # user defined formula
 from src.scripts.deribit import get_published_messages
 from core.db import sqlite as db_mgt, redis as redis_client
+from core.db.redis import redis_client as snapshot_store
 from src.shared.utils import error_handling, string_modification as str_mod
 
 
@@ -461,6 +462,11 @@ async def get_market_condition(
 
                                 market_analytics_data.append(pub_message)
 
+                                await snapshot_store.put_many(
+                                    market_condition_keys,
+                                    {instrument_name: pub_message},
+                                )
+
                                 message_byte_data["params"].update(
                                     {"data": market_analytics_data}
                                 )
@@ -493,6 +499,12 @@ async def get_market_condition(
 
                             market_analytics_data.append(pub_message)
 
+                        # strategies starting later load them in one round trip
+                        await snapshot_store.put_many(
+                            market_condition_keys,
+                            {o["instrument_name"]: o for o in market_analytics_data},
+                        )
+
                         message_byte_data["params"].update(
                             {"data": market_analytics_data}
                         )
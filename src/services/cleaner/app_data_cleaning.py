@@ -12,7 +12,7 @@ from streaming_helper.channel_management import get_published_messages
 from streaming_helper.channel_management.deribit import subscribing_to_channels
 from streaming_helper.data_cleaning import managing_closed_transactions, reconciling_db
 from core.db import sqlite as db_mgt, redis as redis_client
-from src.scripts.deribit import starter
+from src.scripts.deribit import starter, versioned_cache
 from src.shared.utils import (
     string_modification as str_mod,
     error_handling,
@@ -52,6 +52,11 @@ async def reconciling_size(
         positions_update_channel: str = redis_channels["position_cache_updating"]
         ticker_cached_channel: str = redis_channels["ticker_cache_updating"]
         sub_account_cached_channel: str = redis_channels["sub_account_cache_updating"]
+
+        # rebuilds the sub account view from snapshot/delta broadcasts
+        sub_account_subscriber = versioned_cache.VersionedSubscriber(
+            sub_account_cached_channel
+        )
         my_trade_receiving_channel: str = redis_channels["my_trade_receiving"]
         portfolio_channel: str = redis_channels["portfolio"]
 
@@ -89,6 +94,11 @@ async def reconciling_size(
 
         combined_order_allowed = initial_data_order_allowed["params"]["data"]
 
+        order_allowed_index = {o["instrument_name"]: o for o in combined_order_allowed}
+
+        # running per instrument totals, updated by every trade/position event
+        reconciliation = reconciling_db.ReconciliationEngine()
+
         sub_account_cached = initial_data_subaccount["params"]["data"]
 
         positions_cached = sub_account_cached["positions_cached"]
@@ -98,6 +108,18 @@ async def reconciling_size(
             initial_data_order_allowed,
         )
 
+        # seed the running totals from the db before any event updates them
+        await rechecking_reconciliation_regularly(
+            client_redis,
+            combined_order_allowed,
+            futures_instruments_name,
+            currencies,
+            order_allowed_channel,
+            positions_cached,
+            result_template,
+            reconciliation,
+        )
+
         query_variables = (
             f"instrument_name, label, amount_dir as amount, trade_id, timestamp"
         )
@@ -218,6 +240,7 @@ async def reconciling_size(
 
                     if delta_time > 5:
 
+                        # periodic full resync of the running totals from the db
                         await rechecking_reconciliation_regularly(
                             client_redis,
                             combined_order_allowed,
@@ -226,6 +249,7 @@ async def reconciling_size(
                             order_allowed_channel,
                             positions_cached,
                             result_template,
+                            reconciliation,
                         )
 
                         server_time = exchange_server_time
@@ -250,6 +274,12 @@ async def reconciling_size(
                         )
 
                     if sub_account_cached_channel in message_channel:
+
+                        data = await sub_account_subscriber.receiving(
+                            client_redis,
+                            data,
+                        )
+
                         positions_cached = data["positions"]
 
                     else:
@@ -260,13 +290,25 @@ async def reconciling_size(
 
                             positions_cached = positions_cached
 
-                    await rechecking_reconciliation_regularly(
+                    changed_instruments = reconciliation.updating_positions(
+                        positions_cached
+                    )
+
+                    if my_trade_receiving_channel in message_channel:
+
+                        changed_instruments += [
+                            o["instrument_name"]
+                            for o in data
+                            if reconciliation.adding_trade(o)
+                        ]
+
+                    await publishing_reconciliation_transitions(
                         client_redis,
-                        combined_order_allowed,
-                        futures_instruments_name,
-                        currencies,
+                        reconciliation,
+                        order_allowed_index,
+                        changed_instruments,
                         order_allowed_channel,
-                        positions_cached,
+                        combined_order_allowed,
                         result_template,
                     )
 
@@ -298,9 +340,12 @@ async def rechecking_reconciliation_regularly(
     order_allowed_channel: str,
     positions_cached: list,
     result,
+    reconciliation: object,
 ) -> None:
     """ """
 
+    reconciliation.updating_positions(positions_cached)
+
     positions_cached_all = str_mod.remove_redundant_elements(
         [o["instrument_name"] for o in positions_cached]
     )
@@ -324,9 +369,9 @@ async def rechecking_reconciliation_regularly(
         client_redis,
         combined_order_allowed,
         order_allowed_channel,
-        positions_cached,
         positions_cached_instrument,
         result,
+        reconciliation,
     )
 
     await rechecking_based_on_data_in_sqlite(
@@ -334,8 +379,8 @@ async def rechecking_reconciliation_regularly(
         combined_order_allowed,
         currencies,
         order_allowed_channel,
-        positions_cached,
         result,
+        reconciliation,
     )
 
 
@@ -369,9 +414,9 @@ async def rechecking_based_on_sub_account(
     client_redis: object,
     combined_order_allowed: list,
     order_allowed_channel: str,
-    positions_cached: list,
     positions_cached_instrument: list,
     result: dict,
+    reconciliation: object,
 ) -> None:
     """ """
 
@@ -408,12 +453,13 @@ async def rechecking_based_on_sub_account(
                 my_trades_instrument_name,
             )
 
-            my_trades_and_sub_account_size_reconciled = (
-                reconciling_db.is_my_trades_and_sub_account_size_reconciled_each_other(
-                    instrument_name,
-                    my_trades_instrument_name,
-                    positions_cached,
-                )
+            reconciliation.loading_trades(
+                instrument_name,
+                my_trades_instrument_name,
+            )
+
+            my_trades_and_sub_account_size_reconciled = reconciliation.is_reconciled(
+                instrument_name
             )
 
             log.critical(
@@ -440,8 +486,8 @@ async def rechecking_based_on_data_in_sqlite(
     combined_order_allowed: list,
     currencies: list,
     order_allowed_channel: str,
-    positions_cached: list,
     result: dict,
+    reconciliation: object,
 ) -> None:
     """ """
 
@@ -488,10 +534,13 @@ async def rechecking_based_on_data_in_sqlite(
 
                 if my_trades_active:
 
-                    my_trades_and_sub_account_size_reconciled = reconciling_db.is_my_trades_and_sub_account_size_reconciled_each_other(
+                    reconciliation.loading_trades(
                         instrument_name,
                         my_trades_active,
-                        positions_cached,
+                    )
+
+                    my_trades_and_sub_account_size_reconciled = (
+                        reconciliation.is_reconciled(instrument_name)
                     )
 
                     log.critical(
@@ -509,6 +558,49 @@ async def rechecking_based_on_data_in_sqlite(
                         my_trades_active,
                     )
 
+        # no active trade left: the stale totals would flag them not reconciled
+        for instrument_name in reconciliation.closing_instruments(
+            currency,
+            my_trades_active_instrument,
+        ):
+
+            updating_order_allowed_cache(
+                combined_order_allowed,
+                instrument_name,
+                reconciliation.is_reconciled(instrument_name),
+            )
+
+    result["params"].update({"channel": order_allowed_channel})
+    result["params"].update({"data": combined_order_allowed})
+
+    await redis_client.publishing_result(
+        client_redis,
+        result,
+    )
+
+
+async def publishing_reconciliation_transitions(
+    client_redis: object,
+    reconciliation: object,
+    order_allowed_index: dict,
+    changed_instruments: list,
+    order_allowed_channel: str,
+    combined_order_allowed: list,
+    result: dict,
+) -> None:
+    """only instruments whose status flipped are touched, and only then published"""
+
+    changed_instruments = [o for o in changed_instruments if o in order_allowed_index]
+
+    if not changed_instruments:
+        return
+
+    for instrument_name in changed_instruments:
+
+        order_allowed_index[instrument_name]["size_is_reconciled"] = (
+            1 if reconciliation.is_reconciled(instrument_name) else 0
+        )
+
     result["params"].update({"channel": order_allowed_channel})
     result["params"].update({"data": combined_order_allowed})
 
@@ -544,6 +636,30 @@ def updating_order_allowed_cache(
         ]["size_is_reconciled"] = order_allowed
 
 
+def enriching_trades_from_transaction_log(
+    trade_ids: set,
+    transaction_log: list,
+) -> list:
+    """
+    join the transaction log with the trades by trade_id
+
+    trade_ids: trades missing their transaction log fields
+    return: rows ready for db_mgt.update_data_many
+    """
+
+    return [
+        dict(
+            trade_id=transaction["trade_id"],
+            user_seq=int(transaction["user_seq"]),
+            side=transaction["side"],
+            timestamp=int(transaction["timestamp"]),
+            position=transaction["position"],
+        )
+        for transaction in transaction_log
+        if transaction["trade_id"] in trade_ids
+    ]
+
+
 async def inserting_transaction_log_data(
     api_request: object,
     archive_db_table: str,
@@ -562,12 +678,15 @@ async def inserting_transaction_log_data(
     if my_trades_currency:
 
         my_trades_currency_with_blanks_user_seq = [
-            o["timestamp"] for o in my_trades_currency if o["user_seq"] is None
+            o for o in my_trades_currency if o["user_seq"] is None
         ]
 
         if my_trades_currency_with_blanks_user_seq:
 
-            min_timestamp = min(my_trades_currency_with_blanks_user_seq) - 100000
+            min_timestamp = (
+                min([o["timestamp"] for o in my_trades_currency_with_blanks_user_seq])
+                - 100000
+            )
 
             transaction_log = await api_request.get_transaction_log(
                 currency,
@@ -576,47 +695,23 @@ async def inserting_transaction_log_data(
                 "trade",
             )
 
-            where_filter = f"trade_id"
-
             log.debug(
                 f"my_trades_currency_with_blanks_user_seq {my_trades_currency_with_blanks_user_seq}"
             )
-            log.warning(f"transaction_log {transaction_log}")
-            log.info([o for o in my_trades_currency if o["user_seq"] is None])
 
             if transaction_log:
-                for transaction in transaction_log:
-
-                    trade_id = transaction["trade_id"]
-                    user_seq = int(transaction["user_seq"])
-                    side = transaction["side"]
-                    timestamp = int(transaction["timestamp"])
-                    position = transaction["position"]
 
-                    components = ["user_seq", "side", "timestamp", "position"]
-
-                    for component in components:
-
-                        if component == "user_seq":
-                            sub_component = user_seq
-
-                        elif component == "side":
-                            sub_component = side
-
-                        elif component == "timestamp":
-                            sub_component = timestamp
-
-                        elif component == "position":
-                            sub_component = position
+                enriched_trades = enriching_trades_from_transaction_log(
+                    {o["trade_id"] for o in my_trades_currency_with_blanks_user_seq},
+                    transaction_log,
+                )
 
-                        await db_mgt.update_status_data(
-                            archive_db_table,
-                            component,
-                            where_filter,
-                            trade_id,
-                            sub_component,
-                            "=",
-                        )
+                # all fields of all rows in one transaction
+                await db_mgt.update_data_many(
+                    archive_db_table,
+                    "trade_id",
+                    enriched_trades,
+                )
 
 
 def get_custom_label(transaction: list) -> str:
@@ -635,95 +730,112 @@ def get_custom_label(transaction: list) -> str:
     return f"custom{side_label.title()}-open-{last_update}"
 
 
-async def distributing_transaction_log_from_exchange(
-    api_request,
-    archive_db_table: str,
+def joining_transaction_log_with_trades(
     instrument_name: str,
     transaction_log: list,
+    trades: list,
     trade_template: dict,
-) -> None:
+) -> list:
+    """
+    build the archive rows of the transaction log, labelled from the user trades
 
-    if transaction_log and "too_many_requests" not in transaction_log:
+    trades: user trades of the instrument, covering the whole log window
+    """
 
-        for transaction in transaction_log:
+    labels = {o["trade_id"]: o.get("label") for o in trades or []}
 
-            transaction_instrument_name = transaction["instrument_name"]
+    result = []
 
-            transaction_currency = transaction["currency"]
+    for transaction in transaction_log:
 
-            transaction_currency_usd = f"{transaction_currency.upper()}_USD"
+        transaction_instrument_name = transaction["instrument_name"]
 
-            log.info(f"transaction {transaction}")
+        transaction_currency = transaction["currency"]
 
-            if (
-                instrument_name in transaction_instrument_name
-                and transaction_currency_usd not in transaction_instrument_name
-            ):
+        transaction_currency_usd = f"{transaction_currency.upper()}_USD"
 
-                if "sell" in transaction["side"]:
-                    direction = "sell"
+        if (
+            instrument_name in transaction_instrument_name
+            and transaction_currency_usd not in transaction_instrument_name
+        ):
 
-                if "buy" in transaction["side"]:
-                    direction = "buy"
+            direction = "sell" if "sell" in transaction["side"] else "buy"
 
-                timestamp = transaction["timestamp"]
-                trade_id = transaction["trade_id"]
+            trade = dict(trade_template)
 
-                trade_template.update({"trade_id": trade_id})
-                trade_template.update({"user_seq": transaction["user_seq"]})
-                trade_template.update({"side": transaction["side"]})
-                trade_template.update({"timestamp": timestamp})
-                trade_template.update({"position": transaction["position"]})
-                trade_template.update({"amount": transaction["amount"]})
-                trade_template.update({"order_id": transaction["order_id"]})
-                trade_template.update({"price": transaction["price"]})
-                trade_template.update({"instrument_name": transaction_instrument_name})
-                trade_template.update({"direction": direction})
-                trade_template.update({"currency": transaction_currency})
+            trade.update({"trade_id": transaction["trade_id"]})
+            trade.update({"user_seq": transaction["user_seq"]})
+            trade.update({"side": transaction["side"]})
+            trade.update({"timestamp": transaction["timestamp"]})
+            trade.update({"position": transaction["position"]})
+            trade.update({"amount": transaction["amount"]})
+            trade.update({"order_id": transaction["order_id"]})
+            trade.update({"price": transaction["price"]})
+            trade.update({"instrument_name": transaction_instrument_name})
+            trade.update({"direction": direction})
+            trade.update({"currency": transaction_currency})
 
-                # just to ensure the time stamp is below the respective timestamp above
-                ARBITRARY_NUMBER = 1000000
-                timestamp_sometimes_ago = timestamp - ARBITRARY_NUMBER
+            label: str = labels.get(transaction["trade_id"])
 
-                trades = await api_request.get_user_trades_by_instrument_and_time(
-                    instrument_name,
-                    timestamp_sometimes_ago,
-                    False,
-                    1000,
-                )
+            if not label:
+                label: str = template.get_custom_label(trade)
 
-                log.error(f"trades {instrument_name} {trades}")
+            if label:
+                trade.update({"label": label})
 
-                if trades:
+                result.append(trade)
 
-                    trade_with_the_same_trade_id = [
-                        o for o in trades if o["trade_id"] == trade_id
-                    ]
+    return result
 
-                    log.warning(
-                        f"trade_with_the_same_trade_id {trade_with_the_same_trade_id}"
-                    )
 
-                    if trade_with_the_same_trade_id:
+async def distributing_transaction_log_from_exchange(
+    api_request,
+    archive_db_table: str,
+    instrument_name: str,
+    transaction_log: list,
+    trade_template: dict,
+) -> None:
+    """
+    one user trades request per instrument window and one batched insert,
+    instead of a request and an insert per transaction
+    """
 
-                        transaction = trade_with_the_same_trade_id[0]
+    if transaction_log and "too_many_requests" not in transaction_log:
 
-                        try:
-                            label: str = transaction["label"]
+        relevant_log = [
+            o
+            for o in transaction_log
+            if instrument_name in o["instrument_name"]
+            and f"{o['currency'].upper()}_USD" not in o["instrument_name"]
+        ]
 
-                        except:
-                            label: str = template.get_custom_label(transaction)
+        if not relevant_log:
+            return
 
-                    else:
-                        label: str = template.get_custom_label(transaction)
+        # just to ensure the time stamp is below the earliest timestamp above
+        ARBITRARY_NUMBER = 1000000
+        timestamp_sometimes_ago = (
+            min([o["timestamp"] for o in relevant_log]) - ARBITRARY_NUMBER
+        )
+
+        trades = await api_request.get_user_trades_by_instrument_and_time(
+            instrument_name,
+            timestamp_sometimes_ago,
+            False,
+            1000,
+        )
 
-                else:
-                    label: str = template.get_custom_label(transaction)
+        rows = joining_transaction_log_with_trades(
+            instrument_name,
+            relevant_log,
+            trades,
+            trade_template,
+        )
 
-                if label:
-                    trade_template.update({"label": label})
+        log.info(f"distributing {len(rows)} transactions of {instrument_name}")
 
-                    await db_mgt.insert_tables(
-                        archive_db_table,
-                        trade_template,
-                    )
+        if rows:
+            await db_mgt.insert_tables(
+                archive_db_table,
+                rows,
+            )
@@ -3,6 +3,7 @@
 """_summary_"""
 # built ins
 import asyncio
+from collections import defaultdict
 
 # installed
 from loguru import logger as log
@@ -12,11 +13,11 @@ from core.db import sqlite as db_mgt
 from core.db.sqlite import (
     executing_query_based_on_currency_or_instrument_and_strategy as get_query,
 )
-from src.scripts.deribit.strategies.basic_strategy import get_label_integer
 from src.shared.utils import (
     string_modification as str_mod,
     error_handling,
 )
+from src.shared.utils.labels import LabelIndex, parsed_label
 
 
 def get_label_main(
@@ -25,12 +26,9 @@ def get_label_main(
 ) -> list:
     """ """
 
-    return [
-        o
-        for o in result
-        if str_mod.parsing_label(strategy_label)["main"]
-        == str_mod.parsing_label(o["label"])["main"]
-    ]
+    main = parsed_label(strategy_label).main
+
+    return [o for o in result if parsed_label(o["label"]).main == main]
 
 
 async def get_unrecorded_trade_id(instrument_name: str) -> dict:
@@ -205,7 +203,11 @@ def get_transactions_with_closed_label(transactions_all: list) -> list:
 def transactions_under_label_int(label_integer: int, transactions_all: list) -> str:
     """ """
 
-    transactions = [o for o in transactions_all if str(label_integer) in o["label"]]
+    label_integer = str(label_integer)
+
+    transactions = [
+        o for o in transactions_all if parsed_label(o["label"]).int == label_integer
+    ]
 
     return dict(
         closed_transactions=transactions,
@@ -217,9 +219,7 @@ def get_closed_open_transactions_under_same_label_int(
     transactions_all: list, label: str
 ) -> list:
     """ """
-    label_integer = get_label_integer(label)
-
-    return [o for o in transactions_all if str(label_integer) in o["label"]]
+    return LabelIndex(transactions_all).under_int(label)
 
 
 async def closing_orphan_order(
@@ -393,6 +393,77 @@ async def closing_one_to_many(
             )
 
 
+def matching_closed_transactions(transaction_all: list) -> list:
+    """
+    Find every transaction that can be flagged as closed, in one pass.
+
+    Transactions are grouped by label (main, int), only groups holding a
+    closing label are considered:
+        - one-to-many: when the whole group nets to zero, every instrument
+            of the group that nets to zero is closed
+        - one-to-one: otherwise, open and closed transactions of the same
+            instrument and opposite amount are paired off, bucketed by
+            (instrument, |amount|)
+
+    Returns:
+        list: transactions to be flagged as closed
+    """
+
+    label_index = LabelIndex(transaction_all)
+
+    closed_groups = {
+        (parsed.main, parsed.int)
+        for parsed in (
+            parsed_label(o["label"])
+            for o in get_transactions_with_closed_label(transaction_all)
+        )
+    }
+
+    matched = []
+
+    for group_key in closed_groups:
+
+        group = label_index.by_main_and_int[group_key]
+
+        if sum(o["amount"] for o in group) == 0:
+
+            per_instrument = defaultdict(list)
+
+            for transaction in group:
+                per_instrument[transaction["instrument_name"]].append(transaction)
+
+            for instrument_transactions in per_instrument.values():
+
+                if sum(o["amount"] for o in instrument_transactions) == 0:
+                    matched.extend(instrument_transactions)
+
+            continue
+
+        # (instrument, |amount|, is long) -> transactions
+        opens, closeds = defaultdict(list), defaultdict(list)
+
+        for transaction in group:
+
+            amount = transaction["amount"]
+            key = (transaction["instrument_name"], abs(amount), amount > 0)
+
+            if "closed" in transaction["label"]:
+                closeds[key].append(transaction)
+
+            elif "open" in transaction["label"]:
+                opens[key].append(transaction)
+
+        for (instrument_name, size, is_long), open_transactions in opens.items():
+
+            # a closing transaction offsets an open one of the opposite sign
+            closed_transactions = closeds.get((instrument_name, size, not is_long), [])
+
+            for pair in zip(open_transactions, closed_transactions):
+                matched.extend(pair)
+
+    return matched
+
+
 async def clean_up_closed_transactions(
     trade_table: str,
     transaction_all: list = None,
@@ -403,144 +474,30 @@ async def clean_up_closed_transactions(
     2. delete them from active trade db
     """
 
-    # prepare basic parameters for table query
-
-    # log.critical(f" {"clean_up_closed_transactions".upper()} {instrument_name} START")
-
     where_filter = f"trade_id"
 
     try:
 
-        # filtered transactions with closing labels
         if transaction_all:
 
-            transaction_with_closed_labels = get_transactions_with_closed_label(
-                transaction_all
-            )
+            matched = matching_closed_transactions(transaction_all)
 
-            if transaction_with_closed_labels:
+            if matched:
 
-                labels_only = str_mod.remove_redundant_elements(
-                    [o["label"] for o in transaction_with_closed_labels]
+                trade_ids = str_mod.remove_redundant_elements(
+                    [o[where_filter] for o in matched]
                 )
 
-                for label in labels_only:
+                log.info(f"closing {len(trade_ids)} transactions")
 
-                    transactions_under_label_main = get_label_main(
-                        transaction_all, label
-                    )
-
-                    label_integer = get_label_integer(label)
-
-                    closed_transactions_all = transactions_under_label_int(
-                        label_integer, transactions_under_label_main
-                    )
-
-                    size_to_close = closed_transactions_all[
-                        "summing_closed_transaction"
-                    ]
-
-                    transaction_closed_under_the_same_label_int = (
-                        closed_transactions_all["closed_transactions"]
-                    )
-
-                    # log.error(f"closed_transactions_all {closed_transactions_all}")
-
-                    if size_to_close == 0:
-
-                        instrument_name_under_the_same_label_int = [
-                            o["instrument_name"]
-                            for o in transaction_closed_under_the_same_label_int
-                        ]
-
-                        for instrument_name in instrument_name_under_the_same_label_int:
-
-                            instrument_transactions = [
-                                o
-                                for o in transaction_closed_under_the_same_label_int
-                                if instrument_name in o["instrument_name"]
-                            ]
-
-                            sum_instrument_transactions = sum(
-                                [o["amount"] for o in instrument_transactions]
-                            )
-
-                            if sum_instrument_transactions == 0:
-                                # log.info(F" instrument_transactions {instrument_transactions}")
-
-                                await closing_one_to_one(
-                                    instrument_transactions,
-                                    where_filter,
-                                    trade_table,
-                                )
-
-                    if size_to_close != 0:
-
-                        open_label = [
-                            o
-                            for o in transaction_closed_under_the_same_label_int
-                            if "open" in o["label"]
-                        ]
-
-                        transactions = []
-                        for open_transaction in open_label:
-
-                            open_transaction_size = open_transaction["amount"]
-                            open_transaction_instrument_name = open_transaction[
-                                "instrument_name"
-                            ]
-
-                            closed_transaction_with_same_size_as_open_label = [
-                                o
-                                for o in transaction_closed_under_the_same_label_int
-                                if "closed" in o["label"]
-                                and abs(o["amount"]) == abs(open_transaction_size)
-                            ]
-
-                            if closed_transaction_with_same_size_as_open_label:
-
-                                for (
-                                    closed_transaction
-                                ) in closed_transaction_with_same_size_as_open_label:
-
-                                    closed_transaction_size = closed_transaction[
-                                        "amount"
-                                    ]
-                                    closed_transaction_instrument_name = (
-                                        closed_transaction["instrument_name"]
-                                    )
-
-                                    if (
-                                        closed_transaction_instrument_name
-                                        == open_transaction_instrument_name
-                                        and closed_transaction_size
-                                        + open_transaction_size
-                                        == 0
-                                    ):
-
-                                        transactions.append(open_transaction)
-                                        transactions.append(closed_transaction)
-
-                                        log.critical(f"transactions {transactions}")
-                                        log.warning(
-                                            f"closed_transaction_instrument_name {closed_transaction_instrument_name}"
-                                        )
-                                        log.error(
-                                            f"open_transaction_instrument_name {open_transaction_instrument_name}"
-                                        )
-
-                                        await closing_one_to_one(
-                                            transactions,
-                                            where_filter,
-                                            trade_table,
-                                        )
-
-                                        if (
-                                            closed_transaction_instrument_name
-                                            == open_transaction_instrument_name
-                                        ):
-
-                                            break
+                # one batched update per cleanup cycle
+                await db_mgt.update_status_data_many(
+                    trade_table,
+                    "is_open",
+                    where_filter,
+                    trade_ids,
+                    0,
+                )
 
     except Exception as error:
 
@@ -0,0 +1,281 @@
+# src\services\cleaner\partitioning_db.py
+
+"""
+Partition maintenance for the time partitioned Postgres tables (see init.sql)
+
+OHLC tables are range partitioned by tick, in unix ms (UTC). The job
+creates the current partition plus a few ahead of time and drops the ones
+that expired entirely, so retention is a metadata operation: no row
+deletes, no vacuum, and queries over recent candles only touch recent
+partitions.
+
+Partition names carry their lower bound: <table>_p20250131 (daily) or
+<table>_p202501 (monthly).
+"""
+
+# built ins
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+# installed
+from dataclassy import dataclass
+from loguru import logger as log
+
+# user defined formula
+from core.db.postgres import postgres_client
+from src.shared.utils import error_handling
+
+DAILY = "daily"
+MONTHLY = "monthly"
+
+NAME_FORMATS = {DAILY: "%Y%m%d", MONTHLY: "%Y%m"}
+
+
+@dataclass(unsafe_hash=True, slots=True)
+class PartitionPolicy:
+    """ """
+
+    table: str
+    interval: str = DAILY
+    retention_days: int = None  # None: partitions are never dropped
+    ahead: int = 3
+
+
+def get_default_policies(currencies: list = ("btc", "eth")) -> list:
+    """roughly the same history as the max_rows caps of pruning_db"""
+
+    policies = []
+
+    for currency in currencies:
+        policies += [
+            PartitionPolicy(f"ohlc1_{currency}_perp", DAILY, 7),
+            PartitionPolicy(f"ohlc5_{currency}_perp", DAILY, 35),
+            PartitionPolicy(f"ohlc15_{currency}_perp", MONTHLY, 105),
+            PartitionPolicy(f"ohlc60_{currency}_perp", MONTHLY, 420),
+        ]
+
+    return policies
+
+
+def truncating(
+    moment: datetime,
+    interval: str,
+) -> datetime:
+    """start of the partition containing moment"""
+
+    day = moment.astimezone(timezone.utc).replace(
+        hour=0,
+        minute=0,
+        second=0,
+        microsecond=0,
+    )
+
+    return day if interval == DAILY else day.replace(day=1)
+
+
+def get_next_start(
+    start: datetime,
+    interval: str,
+) -> datetime:
+    """ """
+
+    if interval == DAILY:
+        return start + timedelta(days=1)
+
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def to_unix_ms(moment: datetime) -> int:
+    """ """
+
+    return int(moment.timestamp() * 1000)
+
+
+def get_partition_name(
+    table: str,
+    start: datetime,
+    interval: str,
+) -> str:
+    """ """
+
+    return f"{table}_p{start.strftime(NAME_FORMATS[interval])}"
+
+
+def parsing_partition_start(
+    table: str,
+    partition_name: str,
+    interval: str,
+) -> datetime:
+    """return: None for partitions not managed here, e.g. the default one"""
+
+    prefix = f"{table}_p"
+
+    if not partition_name.startswith(prefix):
+        return None
+
+    try:
+        return datetime.strptime(
+            partition_name[len(prefix) :],
+            NAME_FORMATS[interval],
+        ).replace(tzinfo=timezone.utc)
+
+    except ValueError:
+        return None
+
+
+def planning_partitions(
+    policy: PartitionPolicy,
+    now: datetime,
+) -> list:
+    """
+    without a default partition, a row needs its partition to exist: the plan
+    runs from the retention horizon, covering the history loaded by the
+    catch-up, up to the current partition and the ones ahead
+
+    return: [(name, from_ms, to_ms)]
+    """
+
+    result = []
+
+    start = truncating(now, policy.interval)
+
+    for _ in range(policy.ahead + 1):
+        start = get_next_start(start, policy.interval)
+
+    last = start
+
+    start = truncating(
+        (
+            now
+            if policy.retention_days is None
+            else now - timedelta(days=policy.retention_days)
+        ),
+        policy.interval,
+    )
+
+    while start < last:
+
+        end = get_next_start(start, policy.interval)
+
+        result.append(
+            (
+                get_partition_name(policy.table, start, policy.interval),
+                to_unix_ms(start),
+                to_unix_ms(end),
+            )
+        )
+
+        start = end
+
+    return result
+
+
+def selecting_expired_partitions(
+    policy: PartitionPolicy,
+    partition_names: list,
+    now: datetime,
+) -> list:
+    """partitions whose whole range is older than the retention"""
+
+    if policy.retention_days is None:
+        return []
+
+    horizon = now - timedelta(days=policy.retention_days)
+
+    result = []
+
+    for partition_name in partition_names:
+
+        start = parsing_partition_start(policy.table, partition_name, policy.interval)
+
+        if start is not None and get_next_start(start, policy.interval) <= horizon:
+            result.append(partition_name)
+
+    return result
+
+
+async def fetching_partition_names(table: str) -> dict:
+    """
+    return: {name: detach_pending}, pending when a concurrent detach was
+    interrupted and still has to be finalized
+    """
+
+    rows = await postgres_client.fetch(
+        """
+        SELECT child.relname, pg_inherits.inhdetachpending
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = $1
+        """,
+        table,
+    )
+
+    return {o["relname"]: o["inhdetachpending"] for o in rows}
+
+
+async def maintaining_partitions(
+    policy: PartitionPolicy,
+    now: datetime = None,
+) -> dict:
+    """
+    return: names of the partitions created and dropped
+    """
+
+    now = now or datetime.now(timezone.utc)
+
+    existing = await fetching_partition_names(policy.table)
+
+    created = []
+
+    for partition_name, from_ms, to_ms in planning_partitions(policy, now):
+
+        if partition_name in existing:
+            continue
+
+        await postgres_client.execute(
+            f"CREATE TABLE IF NOT EXISTS {partition_name} PARTITION OF {policy.table} FOR VALUES FROM ({from_ms}) TO ({to_ms})"
+        )
+
+        created.append(partition_name)
+
+    dropped = selecting_expired_partitions(policy, existing, now)
+
+    for partition_name in dropped:
+
+        # CONCURRENTLY: readers and writers of the parent are not blocked.
+        # Postgres rejects it when the table has a default partition, hence
+        # none in init.sql, and inside a transaction block: execute runs
+        # outside of one
+        await postgres_client.execute(
+            f"ALTER TABLE {policy.table} DETACH PARTITION {partition_name} "
+            + ("FINALIZE" if existing[partition_name] else "CONCURRENTLY")
+        )
+
+        await postgres_client.execute(f"DROP TABLE IF EXISTS {partition_name}")
+
+    if created or dropped:
+        log.info(f"{policy.table} partitions created {created} dropped {dropped}")
+
+    return dict(created=created, dropped=dropped)
+
+
+async def running_partition_maintenance(
+    idle_time: int = 3600,
+    policies: list = None,
+) -> None:
+    """ """
+
+    policies = policies or get_default_policies()
+
+    while True:
+
+        for policy in policies:
+
+            try:
+                await maintaining_partitions(policy)
+
+            except Exception as error:
+                error_handling.parse_error_message(error)
+
+        await asyncio.sleep(idle_time)
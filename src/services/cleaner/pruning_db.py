@@ -1,108 +1,276 @@
 # src\services\cleaner\pruning_db.py
 
+"""
+Retention engine for OHLC and other append-only tables
+
+Each table has a policy: keep at most max_rows rows and/or rows younger
+than max_age_ms. A cycle computes one cutoff per table and deletes every
+row below it, either in bounded chunks of ascending tick ranges (short
+write locks, the loop yields between chunks) or as a single statement.
+A table therefore converges to its policy in one cycle, whatever its
+backlog. Works against SQLite and Postgres.
+"""
+
 # built ins
 import asyncio
+import time
+from typing import Any
+
+# installed
+from dataclassy import dataclass
+from loguru import logger as log
 
 # user defined formula
 from core.db import sqlite as db_mgt
+from core.db.postgres import postgres_client
 from src.shared.utils import error_handling
 
+SQLITE = "sqlite"
+POSTGRES = "postgres"
+
+# tables pruned by default, per backend: sqlite keeps json rows in *_json
+# tables, postgres has the ohlc tables of init.sql
+DEFAULT_TABLES = {
+    SQLITE: [
+        "market_analytics_json",
+        # "account_summary_json",
+        "ohlc1_eth_perp_json",
+        "ohlc1_btc_perp_json",
+        "ohlc15_eth_perp_json",
+        "ohlc15_btc_perp_json",
+        # "ohlc30_eth_perp_json",
+        "ohlc60_eth_perp_json",
+        # "ohlc3_eth_perp_json",
+        # "ohlc3_btc_perp_json",
+        "ohlc5_eth_perp_json",
+        "ohlc5_btc_perp_json",
+    ],
+    POSTGRES: [
+        f"ohlc{resolution}_{currency}_perp"
+        for currency in ("btc", "eth")
+        for resolution in (1, 5, 15, 60)
+    ],
+}
+
+
+def max_rows(table) -> int:
+    """ """
+    if "market_analytics_json" in table:
+        threshold = 10
+    if "ohlc" in table:
+        threshold = 10000
+    if "supporting_items_json" in table:
+        threshold = 200
+    if "account_summary_json" in table:
+        downloading_times = 2  # every 30 seconds
+        currencies = 2
+        instruments = 8
+        threshold = (
+            downloading_times * currencies * instruments
+        ) * 120  # roughly = 2 hours
+
+    return threshold
+
+
+@dataclass(unsafe_hash=True, slots=True)
+class RetentionPolicy:
+    """ """
+
+    table: str
+    column: str = "tick"
+    max_rows: int = None
+    max_age_ms: int = None  # only meaningful for tick (unix ms) columns
+    chunk_size: int = 5_000
+    single_statement: bool = False
+
 
-async def count_and_delete_ohlc_rows(
-    database: str,
+def get_retention_policy(
     table: str,
-) -> None:
+    max_age_ms: int = None,
+    chunk_size: int = 5_000,
+    single_statement: bool = False,
+) -> RetentionPolicy:
+    """ """
 
-    try:
-        rows_threshold = max_rows(table)
+    if "supporting_items_json" in table or "account_summary_json" in table:
+        column = "id"
 
-        if "supporting_items_json" in table or "account_summary_json" in table:
-            where_filter = f"id"
+    else:
+        column = "tick"
 
-        else:
-            where_filter = f"tick"
+    return RetentionPolicy(
+        table=table,
+        column=column,
+        max_rows=max_rows(table),
+        max_age_ms=max_age_ms if column == "tick" else None,
+        chunk_size=chunk_size,
+        single_statement=single_statement,
+    )
 
-        count_rows_query = db_mgt.querying_arithmetic_operator(
-            where_filter, "COUNT", table
-        )
 
-        rows = await db_mgt.executing_query_with_return(count_rows_query)
+@dataclass(unsafe_hash=True, slots=True)
+class RetentionEngine:
+    """Applies retention policies against one database"""
+
+    policies: list
+    backend: str = SQLITE
+    database: str = None  # sqlite only, defaults to db_mgt.get_db_path()
+
+    async def fetching_value(
+        self,
+        query: str,
+        column: str,
+    ) -> Any:
+        """first column of the first row, None when there is no row"""
 
-        rows = (
-            rows[0]["COUNT (tick)"] if where_filter == "tick" else rows[0]["COUNT (id)"]
+        if self.backend == POSTGRES:
+            return await postgres_client.fetch_value(query)
+
+        result = await db_mgt.executing_query_with_return(
+            query,
+            database=self.database,
         )
 
-        if rows > rows_threshold:
+        return result[0][column] if result else None
 
-            first_tick_query = db_mgt.querying_arithmetic_operator(
-                where_filter, "MIN", table
-            )
+    async def deleting_below(
+        self,
+        policy: RetentionPolicy,
+        bound: int,
+    ) -> int:
+        """ """
 
-            first_tick_fr_sqlite = await db_mgt.executing_query_with_return(
-                first_tick_query
+        if self.backend == POSTGRES:
+            return await postgres_client.delete_rows_below(
+                policy.table,
+                policy.column,
+                bound,
             )
 
-            if where_filter == "tick":
-                first_tick = first_tick_fr_sqlite[0]["MIN (tick)"]
+        return await db_mgt.deleting_rows_below(
+            policy.table,
+            policy.column,
+            bound,
+            self.database,
+        )
+
+    async def computing_cutoff(
+        self,
+        policy: RetentionPolicy,
+    ) -> int:
+        """
+        return: rows whose column is below the cutoff are expired, None if nothing is
+        """
+
+        cutoffs = []
 
-            if where_filter == "id":
-                first_tick = first_tick_fr_sqlite[0]["MIN (id)"]
+        if policy.max_rows:
 
-            await db_mgt.deleting_row(
-                table,
-                database,
-                where_filter,
-                "=",
-                first_tick,
+            # value of the max_rows-th newest row: everything older goes
+            cutoffs.append(
+                await self.fetching_value(
+                    f"SELECT {policy.column} FROM {policy.table} ORDER BY {policy.column} DESC LIMIT 1 OFFSET {int(policy.max_rows) - 1}",
+                    policy.column,
+                )
             )
 
-    except Exception as error:
-        error_handling.parse_error_message(error)
+        if policy.max_age_ms:
+            cutoffs.append(int(time.time() * 1000) - policy.max_age_ms)
 
+        cutoffs = [o for o in cutoffs if o is not None]
 
-def max_rows(table) -> int:
-    """ """
-    if "market_analytics_json" in table:
-        threshold = 10
-    if "ohlc" in table:
-        threshold = 10000
-    if "supporting_items_json" in table:
-        threshold = 200
-    if "account_summary_json" in table:
-        downloading_times = 2  # every 30 seconds
-        currencies = 2
-        instruments = 8
-        threshold = (
-            downloading_times * currencies * instruments
-        ) * 120  # roughly = 2 hours
+        return max(cutoffs) if cutoffs else None
 
-    return threshold
+    async def pruning(
+        self,
+        policy: RetentionPolicy,
+    ) -> dict:
+        """
+        return: rows pruned, elapsed seconds and rows pruned per second
+        """
+
+        started = time.monotonic()
+
+        rows_pruned = 0
+
+        cutoff = await self.computing_cutoff(policy)
+
+        if cutoff is not None:
+
+            if policy.single_statement:
+                rows_pruned = await self.deleting_below(policy, cutoff)
+
+            else:
 
+                while True:
 
-async def clean_up_databases(idle_time) -> None:
+                    # upper bound of the next chunk: the chunk_size-th oldest expired row
+                    bound = await self.fetching_value(
+                        f"SELECT {policy.column} FROM {policy.table} WHERE {policy.column} < {int(cutoff)} ORDER BY {policy.column} LIMIT 1 OFFSET {policy.chunk_size}",
+                        policy.column,
+                    )
+
+                    deleted = await self.deleting_below(
+                        policy,
+                        cutoff if bound is None else bound,
+                    )
+
+                    rows_pruned += deleted
+
+                    if bound is None or not deleted:
+                        break
+
+                    # let other tasks write between chunks
+                    await asyncio.sleep(0)
+
+        elapsed = time.monotonic() - started
+
+        return dict(
+            table=policy.table,
+            rows_pruned=rows_pruned,
+            seconds=round(elapsed, 6),
+            rows_per_second=round(rows_pruned / elapsed, 2) if elapsed else 0.0,
+        )
+
+    async def running_cycle(self) -> list:
+        """ """
+
+        result = []
+
+        for policy in self.policies:
+
+            try:
+                stats = await self.pruning(policy)
+
+            except Exception as error:
+                error_handling.parse_error_message(error)
+                continue
+
+            if stats["rows_pruned"]:
+                log.info(
+                    f"pruned {stats['rows_pruned']} rows of {stats['table']} in {stats['seconds']}s ({stats['rows_per_second']} rows/s)"
+                )
+
+            result.append(stats)
+
+        return result
+
+
+async def clean_up_databases(
+    idle_time,
+    backend: str = SQLITE,
+    policies: list = None,
+) -> None:
     """ """
 
+    engine = RetentionEngine(
+        policies=policies
+        or [get_retention_policy(o) for o in DEFAULT_TABLES[backend]],
+        backend=backend,
+    )
+
     while True:
 
-        tables = [
-            "market_analytics_json",
-            # "account_summary_json",
-            "ohlc1_eth_perp_json",
-            "ohlc1_btc_perp_json",
-            "ohlc15_eth_perp_json",
-            "ohlc15_btc_perp_json",
-            # "ohlc30_eth_perp_json",
-            "ohlc60_eth_perp_json",
-            # "ohlc3_eth_perp_json",
-            # "ohlc3_btc_perp_json",
-            "ohlc5_eth_perp_json",
-            "ohlc5_btc_perp_json",
-        ]
-
-        database: str = "databases/trading.sqlite3"
-
-        for table in tables:
-
-            await count_and_delete_ohlc_rows(database, table)
+        await engine.running_cycle()
 
         await asyncio.sleep(idle_time)
@@ -5,6 +5,7 @@
 import asyncio
 
 # installed
+from dataclassy import dataclass
 from loguru import logger as log
 
 # user defined formula
@@ -12,6 +13,192 @@ from core.db import sqlite as db_mgt
 from src.shared.utils import string_modification as str_mod
 
 
+@dataclass(unsafe_hash=True, slots=True)
+class InstrumentTotals:
+    """Running sizes of one instrument, as seen by each source"""
+
+    my_trades: dict = {}  # trade_id: signed amount
+    my_trades_size: float = 0
+    sub_account_size: float = 0
+    is_reconciled: bool = None
+
+
+def get_signed_amount(trade: dict) -> float:
+    """db rows carry amount_dir (aliased as amount), ws trades carry a direction"""
+
+    if "direction" not in trade:
+        return trade["amount"]
+
+    return trade["amount"] if trade["direction"] == "buy" else -trade["amount"]
+
+
+@dataclass(unsafe_hash=True, slots=True)
+class ReconciliationEngine:
+    """
+    Incremental size reconciliation
+
+    Keeps per instrument running totals of the active trades and the sub
+    account size. Every trade or position event costs O(1) per instrument it
+    touches, and is_reconciled only flips on an actual transition, so the
+    order allowed decisions no longer rescan the trading history.
+    """
+
+    instruments: dict = {}
+
+    def getting(
+        self,
+        instrument_name: str,
+    ) -> InstrumentTotals:
+        """ """
+
+        totals = self.instruments.get(instrument_name)
+
+        if totals is None:
+            totals = self.instruments[instrument_name] = InstrumentTotals()
+
+        return totals
+
+    def is_reconciled(
+        self,
+        instrument_name: str,
+    ) -> bool:
+        """ """
+
+        return bool(self.getting(instrument_name).is_reconciled)
+
+    def evaluating(
+        self,
+        instrument_name: str,
+    ) -> bool:
+        """
+        return: True when the reconciliation status of the instrument changed
+        """
+
+        totals = self.getting(instrument_name)
+
+        reconciled = totals.my_trades_size == totals.sub_account_size
+
+        if reconciled == totals.is_reconciled:
+            return False
+
+        totals.is_reconciled = reconciled
+
+        if not reconciled:
+            log.critical(
+                f"{instrument_name} reconciled {reconciled} sub_account_size_instrument {totals.sub_account_size} my_trades_size_instrument {totals.my_trades_size}"
+            )
+
+        return True
+
+    def adding_trade(
+        self,
+        trade: dict,
+    ) -> bool:
+        """idempotent: a trade_id already counted is ignored"""
+
+        instrument_name = trade["instrument_name"]
+
+        # combo transactions are not recorded in the book
+        if "-FS-" in instrument_name:
+            return False
+
+        totals = self.getting(instrument_name)
+
+        trade_id = trade["trade_id"]
+
+        if trade_id not in totals.my_trades:
+
+            amount = get_signed_amount(trade)
+
+            totals.my_trades[trade_id] = amount
+            totals.my_trades_size += amount
+
+        return self.evaluating(instrument_name)
+
+    def removing_trade(
+        self,
+        instrument_name: str,
+        trade_id: str,
+    ) -> bool:
+        """ """
+
+        totals = self.getting(instrument_name)
+
+        amount = totals.my_trades.pop(trade_id, None)
+
+        if amount is not None:
+            totals.my_trades_size -= amount
+
+        return self.evaluating(instrument_name)
+
+    def loading_trades(
+        self,
+        instrument_name: str,
+        my_trades: list,
+    ) -> bool:
+        """Replace the running total with the active trades read from the db"""
+
+        totals = self.getting(instrument_name)
+
+        totals.my_trades = {o["trade_id"]: get_signed_amount(o) for o in my_trades or []}
+        totals.my_trades_size = sum(totals.my_trades.values())
+
+        return self.evaluating(instrument_name)
+
+    def closing_instruments(
+        self,
+        currency: str,
+        instruments_name: list,
+    ) -> list:
+        """
+        instruments_name: the instruments of the currency with active trades
+
+        return: the other instruments of the currency tracked so far, all
+            their trades closed: their totals are back to 0
+        """
+
+        closed = [
+            o
+            for o in self.instruments
+            if currency.upper() in o and o not in instruments_name
+        ]
+
+        for instrument_name in closed:
+            self.loading_trades(instrument_name, [])
+
+        return closed
+
+    def updating_positions(
+        self,
+        positions: list,
+    ) -> list:
+        """
+        positions: sub account positions, the full current list
+
+        return: instruments whose reconciliation status changed
+        """
+
+        sizes = {
+            o["instrument_name"]: o["size"] or 0
+            for o in positions or []
+            if "-FS-" not in o["instrument_name"]
+        }
+
+        changed = []
+
+        # closed positions disappear from the list: their size is back to 0
+        for instrument_name in set(sizes) | set(self.instruments):
+
+            self.getting(instrument_name).sub_account_size = sizes.get(
+                instrument_name, 0
+            )
+
+            if self.evaluating(instrument_name):
+                changed.append(instrument_name)
+
+        return changed
+
+
 def get_sub_account_size_per_instrument(
     instrument_name: str,
     sub_account: list,
@@ -2,28 +2,25 @@
 
 # built ins
 import asyncio
+from typing import Optional
 
 # installed
-import orjson
 from loguru import logger as log
 
 # user defined formula
+from core.db import codecs
 from core.db.redis import publishing_result
-from core.db.sqlite import (
-    insert_tables,
-)
 from core.db.postgres import (
     fetch,
-    insert_trade_or_order,
-    delete_row,
-    update_status_data,
+    postgres_client,
     querying_by_arithmetic,
+    update_status as update_status_data,
 )
-from src.scripts.deribit.restful_api import (
-    end_point_params_template as end_point,
-    connector,
-)
-from src.shared.utils import error_handling, string_modification as str_mod
+from src.services.distributor.deribit.catching_up_ohlc import TABLE_OHLC, catching_up
+from src.shared.utils import error_handling
+from src.shared.utils.resampling import ONE_MINUTE
+
+CATCH_UP_LOOKBACK_MINUTES = 6000
 
 
 async def last_tick_fr_sqlite(last_tick_query_ohlc1: str) -> int:
@@ -33,6 +30,117 @@ async def last_tick_fr_sqlite(last_tick_query_ohlc1: str) -> int:
     return last_tick[0]["MAX (tick)"]
 
 
+def getting_ohlc_state() -> dict:
+    """state of allocating_candle, kept by the caller across candles"""
+
+    return dict(
+        # {(instrument_name, resolution): last live tick}
+        ticks={},
+        # {(instrument_name, resolution): refill task running}
+        refills={},
+        # {(instrument_name, resolution): {tick: candle}} received meanwhile
+        held={},
+    )
+
+
+async def refilling(
+    ohlc_state: dict,
+    key: tuple,
+    currency: str,
+    end_timestamp: int,
+    start_timestamp: int = None,
+) -> None:
+    """Catch the table up, then store the live candles held meanwhile"""
+
+    instrument_name, resolution = key
+
+    table_ohlc = TABLE_OHLC.format(resolution=resolution, currency=currency.lower())
+
+    try:
+        if start_timestamp is None:
+            start_timestamp = await postgres_client.fetch_value(
+                f"SELECT MAX(tick) FROM {table_ohlc}"
+            )
+
+        delta_time = end_timestamp - start_timestamp if start_timestamp else 0
+
+        await catching_up(
+            currency,
+            [instrument_name],
+            [resolution],
+            lookback_minutes=max(
+                CATCH_UP_LOOKBACK_MINUTES,
+                delta_time // ONE_MINUTE + resolution,
+            ),
+            table_name=TABLE_OHLC,
+            now=end_timestamp,
+        )
+
+    except Exception as error:
+        log.error(f"ohlc refill {instrument_name} {resolution}: {error}")
+
+    try:
+        # newer than the refill, held ones included while these are stored
+        while ohlc_state["held"].get(key):
+            held = ohlc_state["held"].pop(key)
+            await postgres_client.upsert_ohlc(table_ohlc, list(held.values()))
+
+    except Exception as error:
+        log.error(f"ohlc held candles {instrument_name} {resolution}: {error}")
+
+    finally:
+        ohlc_state["refills"].pop(key, None)
+
+
+async def allocating_candle(
+    ohlc_state: dict,
+    instrument_name: str,
+    currency: str,
+    resolution: int,
+    candle: dict,
+) -> Optional[asyncio.Task]:
+    """
+    Store a live candle, new or still forming
+
+    The first candle since start, or one after missed ones, starts the
+    refill of its table in the background: the live candles of that chart
+    are held until it is done, the rest of the stream goes on.
+
+    ohlc_state: see getting_ohlc_state
+    return: the refill started, if any
+    """
+
+    key = (instrument_name, resolution)
+
+    end_timestamp = candle["tick"]
+
+    start_timestamp = ohlc_state["ticks"].get(key)
+
+    ohlc_state["ticks"][key] = end_timestamp
+
+    if key in ohlc_state["refills"]:
+        ohlc_state["held"].setdefault(key, {})[end_timestamp] = candle
+        return None
+
+    if (
+        start_timestamp is not None
+        and end_timestamp - start_timestamp <= resolution * ONE_MINUTE
+    ):
+        await postgres_client.upsert_ohlc(
+            TABLE_OHLC.format(resolution=resolution, currency=currency.lower()),
+            [candle],
+        )
+        return None
+
+    ohlc_state["held"][key] = {end_timestamp: candle}
+
+    task = ohlc_state["refills"][key] = asyncio.create_task(
+        refilling(ohlc_state, key, currency, end_timestamp, start_timestamp)
+    )
+
+    return task
+
+
 async def updating_ohlc(
     client_redis: object,
     redis_channels: list,
@@ -55,15 +163,9 @@ async def updating_ohlc(
         # subscribe to channels
         [await pubsub.subscribe(o) for o in channels]
 
-        WHERE_FILTER_TICK: str = "tick"
-
         is_updated = True
 
-        start_timestamp = 0
-
-        basic_https_connection_url = end_point.basic_https()
-
-        endpoint_tradingview = end_point.endpoint_tradingview()
+        ohlc_state = getting_ohlc_state()
 
         while is_updated:
 
@@ -75,7 +177,7 @@ async def updating_ohlc(
 
                 if message_byte and message_byte["type"] == "message":
 
-                    message_byte_data = orjson.loads(message_byte["data"])
+                    message_byte_data = codecs.unsealing(message_byte["data"])
 
                     message_channel = message_byte["channel"]
 
@@ -89,89 +191,23 @@ async def updating_ohlc(
 
                         resolution = message_byte_data["resolution"]
 
-                        end_timestamp = data["tick"]
-
-                        table_ohlc = f"ohlc{resolution}_{currency.lower()}_perp_json"
-
-                        last_tick_query_ohlc_resolution: str = (
-                            await querying_arithmetic_operator(
-                                WHERE_FILTER_TICK,
-                                "MAX",
-                                table_ohlc,
-                            )
-                        )
-
-                        # need cached
-                        start_timestamp: int = await last_tick_fr_sqlite(
-                            last_tick_query_ohlc_resolution
-                        )
-
-                        delta_time = end_timestamp - start_timestamp
-
                         pub_message = dict(
                             instrument_name=instrument_name,
                             currency=currency,
                             resolution=resolution,
                         )
 
-                        if delta_time == 0:
-
-                            # refilling current ohlc table with updated data
-                            await update_status_data(
-                                table_ohlc,
-                                "data",
-                                end_timestamp,
-                                WHERE_FILTER_TICK,
-                                data,
-                                "is",
-                            )
-
-                            if resolution != 1:
-
-                                table_ohlc = (
-                                    f"ohlc{resolution}_{currency.lower()}_perp_json"
-                                )
-
-                                ohlc_query = f"SELECT data FROM {table_ohlc} WHERE tick = {end_timestamp}"
-
-                                result_from_sqlite = await fetch(ohlc_query)
-
-                                high_from_ws = data["high"]
-                                low_from_ws = data["low"]
-
-                                ohlc_from_sqlite = str_mod.remove_apostrophes_from_json(
-                                    o["data"] for o in result_from_sqlite
-                                )[0]
-
-                                high_from_db = ohlc_from_sqlite["high"]
-                                low_from_db = ohlc_from_sqlite["low"]
-
-                                if (
-                                    high_from_ws > high_from_db
-                                    or low_from_ws < low_from_db
-                                ):
-                                    pass
-
-                        else:
-
-                            endpoint_ohlc = end_point.get_ohlc_end_point(
-                                endpoint_tradingview,
-                                instrument_name,
-                                resolution,
-                                start_timestamp,
-                                end_timestamp,
-                                False,
-                            )
+                        refill = await allocating_candle(
+                            ohlc_state,
+                            instrument_name,
+                            currency,
+                            resolution,
+                            data,
+                        )
 
-                            # catch up data through FIX
-                            ohlc = await connector.get_connected(
-                                basic_https_connection_url,
-                                endpoint_ohlc,
-                            )
+                        if refill is not None:
 
-                            result_all = str_mod.transform_nested_dict_to_list_ohlc(
-                                ohlc
-                            )
+                            await refill
 
                             await publishing_result(
                                 client_redis,
@@ -179,15 +215,6 @@ async def updating_ohlc(
                                 pub_message,
                             )
 
-                            for result in result_all:
-
-                                log.info(f"result {result}")
-
-                                await insert_tables(
-                                    table_ohlc,
-                                    result,
-                                )
-
             except Exception as error:
 
                 await error_handling.parse_error_message(
@@ -0,0 +1,191 @@
+# src\services\distributor\deribit\catching_up_ohlc.py
+
+"""
+Refilling the ohlc tables after the chart stream stopped for a while
+(reconnect, Deribit maintenance, service restart)
+
+For every (instrument, resolution), the ticks stored over the lookback are
+compared with the ticks a continuous chart would have, up to the candle
+still forming. The missing ranges are cut into requests of at most
+MAX_CANDLES_PER_REQUEST candles and fetched from
+public/get_tradingview_chart_data concurrently: at most max_workers at a
+time, over the shared http session and through the credit scheduler.
+Each table is then refilled in one bulk upsert.
+
+Live updates should only resume once catching_up returned, so that
+candles_analysis never sees a hole.
+"""
+
+# built ins
+import asyncio
+from collections import defaultdict
+
+# installed
+import numpy as np
+from loguru import logger as log
+
+# user defined formula
+from core.db.postgres import postgres_client
+from src.scripts.deribit.restful_api import (
+    connector,
+    end_point_params_template as end_point,
+)
+from src.scripts.deribit.restful_api.rate_limiter import credit_scheduler
+from src.shared.utils import (
+    string_modification as str_mod,
+    time_modification as time_mod,
+)
+from src.shared.utils.resampling import ONE_MINUTE, get_bucket
+
+MAX_CANDLES_PER_REQUEST = 5000
+
+TABLE_OHLC = "ohlc{resolution}_{currency}_perp"
+
+
+def finding_gaps(
+    ticks: list,
+    resolution: int,
+    start_tick: int,
+    end_tick: int,
+) -> list:
+    """
+    ticks: stored ticks, any order
+    return: [(first missing tick, last missing tick)] within start_tick and
+        end_tick, both aligned on the resolution
+    """
+
+    step = resolution * ONE_MINUTE
+
+    ticks = np.unique(np.asarray(ticks, dtype=np.int64))
+    ticks = ticks[(ticks >= start_tick) & (ticks <= end_tick)]
+
+    # sentinels one step outside the range turn its edges into inner gaps
+    ticks = np.r_[start_tick - step, ticks, end_tick + step]
+
+    gaps = np.flatnonzero(np.diff(ticks) > step)
+
+    return [(int(ticks[i]) + step, int(ticks[i + 1]) - step) for i in gaps]
+
+
+def splitting(
+    gaps: list,
+    resolution: int,
+    max_candles: int = MAX_CANDLES_PER_REQUEST,
+) -> list:
+    """
+    return: the gaps cut in ranges of at most max_candles candles
+    """
+
+    step = resolution * ONE_MINUTE
+
+    return [
+        (start, min(start + (max_candles - 1) * step, last))
+        for first, last in gaps
+        for start in range(first, last + 1, max_candles * step)
+    ]
+
+
+async def fetching_candles(
+    instrument_name: str,
+    resolution: int,
+    start_tick: int,
+    end_tick: int,
+) -> list:
+    """ """
+
+    endpoint = end_point.get_ohlc_end_point(
+        instrument_name,
+        resolution,
+        start_tick,
+        end_tick,
+    )
+
+    await credit_scheduler.acquiring(endpoint)
+
+    response = await connector.get_connected(end_point.get_basic_https(), endpoint)
+
+    result = response.get("result") or {}
+
+    if result.get("status") != "ok":
+        return []
+
+    return str_mod.transform_nested_dict_to_list_ohlc(result)
+
+
+async def catching_up(
+    currency: str,
+    instruments_name: list,
+    resolutions: list,
+    lookback_minutes: int = 6000,
+    max_workers: int = 8,
+    table_name: str = TABLE_OHLC,
+    now: int = None,
+) -> dict:
+    """
+    instruments_name: perpetuals of the currency, one chart each
+    table_name: template of the tables, formatted with resolution, currency
+    return: {(instrument_name, resolution): candles refilled}
+    """
+
+    now = now or time_mod.get_now_unix_time()
+
+    semaphore = asyncio.Semaphore(max_workers)
+
+    requests = []
+
+    for instrument_name in instruments_name:
+        for resolution in resolutions:
+
+            table = table_name.format(
+                resolution=resolution, currency=currency.lower()
+            )
+
+            end_tick = get_bucket(now, resolution)
+            start_tick = get_bucket(now - lookback_minutes * ONE_MINUTE, resolution)
+
+            stored = await postgres_client.fetch(
+                f"SELECT tick FROM {table} WHERE tick >= $1", start_tick
+            )
+
+            gaps = finding_gaps(
+                [o["tick"] for o in stored], resolution, start_tick, end_tick
+            )
+
+            requests += [
+                (instrument_name, resolution, table, first, last)
+                for first, last in splitting(gaps, resolution)
+            ]
+
+    async def fetching(request: tuple) -> list:
+
+        instrument_name, resolution, _, first, last = request
+
+        async with semaphore:
+            try:
+                return await fetching_candles(instrument_name, resolution, first, last)
+
+            except Exception as error:
+                log.error(f"ohlc {instrument_name} {resolution} {first}: {error}")
+                return []
+
+    fetched = await asyncio.gather(*[fetching(o) for o in requests])
+
+    refilled = defaultdict(int)
+    by_table = defaultdict(dict)
+
+    for (instrument_name, resolution, table, first, last), candles in zip(
+        requests, fetched
+    ):
+        candles = [o for o in candles if first <= o["tick"] <= last]
+
+        by_table[table].update({o["tick"]: o for o in candles})
+        refilled[(instrument_name, resolution)] += len(candles)
+
+    for table, candles in by_table.items():
+        if candles:
+            await postgres_client.upsert_ohlc(table, list(candles.values()))
+
+    if requests:
+        log.info(f"ohlc catch up {currency}: {len(requests)} requests {dict(refilled)}")
+
+    return dict(refilled)
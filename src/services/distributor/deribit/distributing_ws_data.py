@@ -3,20 +3,61 @@
 """Data distribution service with enhanced stream processing"""
 import asyncio
 import orjson
+from cachetools import TTLCache
 from collections import defaultdict
 from typing import Dict, List, Any, Tuple
 
 # Application imports
 from core.db import postgres as pg
-from core.db.redis import redis_client
+from core.db.redis import publishing_result, redis_client
 from core.error_handler import error_handler
+from core.latency import (
+    HANDLER_END,
+    HANDLER_START,
+    XREADGROUP,
+    latency_tracer,
+    loading_trace,
+    now_ns,
+)
+from core.metrics import registry
 from src.scripts.deribit import caching
-from src.shared.config.constants import ServiceConstants
+from src.services.distributor.deribit import allocating_ohlc
+from src.shared.config.constants import RedisChannels, RedisKeys, ServiceConstants
 from src.shared.utils import error_handling, string_modification as str_mod
 
 # Configure logger
 from loguru import logger as log
 
+messages_processed = registry.counter(
+    "stream_messages_total", "Stream entries processed", ("channel", "outcome")
+)
+handler_duration = registry.histogram(
+    "handler_duration_microseconds", "Time spent in a message handler", ("handler",)
+)
+
+
+def get_initial_state() -> Dict[str, Any]:
+    """state shared by the batches of stream_consumer"""
+
+    return {
+        "locks": defaultdict(asyncio.Lock),
+        "caches": {
+            "portfolio": TTLCache(maxsize=1000, ttl=300),
+            "ticker": TTLCache(maxsize=1000, ttl=300),
+        },
+        # full tickers, merged from the incremental ones
+        "tickers": {},
+        # updated within the batch, see flushing_snapshots
+        "snapshots": {
+            RedisKeys.PORTFOLIO: {},
+            RedisKeys.TICKER: {},
+        },
+        # {currency: trace of its last ticker in the batch}, see publishing_tickers
+        "ticker_traces": {},
+        # live candles and table refills, see handle_chart
+        "ohlc": allocating_ohlc.getting_ohlc_state(),
+    }
+
 
 def parse_redis_message(message_data: dict) -> dict:
     """Efficient parser for Redis stream messages"""
@@ -45,9 +86,14 @@ def parse_redis_message(message_data: dict) -> dict:
 
 @error_handler.wrap_async
 async def process_message(
-    message_id: str, message_data: Dict[bytes, bytes], state: Dict[str, Any]
+    message_id: str,
+    message_data: Dict[bytes, bytes],
+    state: Dict[str, Any],
+    read_ns: int = None,
 ) -> bool:
     """Process single message with error handling and retries"""
+    channel = "unparsed"
+
     try:
         # Deserialize message
         payload = redis_client.parse_stream_message(message_data)
@@ -55,6 +101,12 @@ async def process_message(
         data = payload["data"]
         currency = str_mod.extract_currency_from_text(channel)
 
+        trace = loading_trace(payload.get("trace"))
+        latency_tracer.stamping(trace, XREADGROUP, read_ns)
+        latency_tracer.stamping(trace, HANDLER_START)
+
+        started_ns = now_ns()
+
         # Add detailed logging
         log.debug(f"Message payload: {payload}")
 
@@ -64,14 +116,21 @@ async def process_message(
             if "user.portfolio" in channel:
                 await handle_portfolio(currency, data, state)
             elif "incremental_ticker" in channel:
-                await handle_ticker(currency, data, state)
+                await handle_ticker(currency, data, state, trace)
             elif "chart.trades" in channel:
-                pass
-                #await handle_chart(currency, data, state)
+                await handle_chart(currency, channel, data, state)
             # Add other handlers as needed
 
+        latency_tracer.stamping(trace, HANDLER_END)
+
+        handler_duration.labels(channel.split(".", 1)[0]).recording(
+            (now_ns() - started_ns) // 1000
+        )
+        messages_processed.labels(channel, "ok").increment()
+
         return True
     except Exception as error:
+        messages_processed.labels(channel, "failed").increment()
         log.error(f"Message processing failed: {error}")
         return False
 
@@ -80,26 +139,109 @@ async def handle_portfolio(currency: str, data: Dict, state: Dict[str, Any]) ->
     """Handle portfolio updates"""
     # Update in-memory cache
     state["caches"]["portfolio"][currency] = data
+    state["snapshots"][RedisKeys.PORTFOLIO][currency] = data
 
     # Persist to PostgreSQL
     await pg.update_portfolio(currency, data)
 
 
-async def handle_ticker(currency: str, data: Dict, state: Dict[str, Any]) -> None:
+async def handle_ticker(
+    currency: str,
+    data: Dict,
+    state: Dict[str, Any],
+    trace: Dict = None,
+) -> None:
     """Handle ticker updates"""
     # Update in-memory cache
     state["caches"]["ticker"][currency] = data
-    
+
+    # incremental_ticker only carries the fields that changed
+    instrument_name = data["instrument_name"]
+    state["tickers"].setdefault(instrument_name, {}).update(data)
+    state["snapshots"][RedisKeys.TICKER][instrument_name] = state["tickers"][
+        instrument_name
+    ]
+
     log.info(f"data {data}")
 
+    state["ticker_traces"][currency] = trace or {}
+
     # Update OHLC data
     #await pg.update_ohlc(currency, data)
 
 
-async def handle_chart(currency: str, data: Dict, state: Dict[str, Any]) -> None:
-    """Handle chart data updates"""
-    # Process chart data
-    await pg.insert_ohlc(currency, data)
+async def handle_chart(
+    currency: str,
+    channel: str,
+    data: Dict,
+    state: Dict[str, Any],
+) -> None:
+    """Store the candle, the refill of the ones missed runs in the background"""
+    _, _, instrument_name, resolution = channel.split(".", 3)
+
+    # the ohlc tables are per minutes resolution, "1D" has none
+    if not resolution.isdigit():
+        return
+
+    await allocating_ohlc.allocating_candle(
+        state["ohlc"],
+        instrument_name,
+        currency,
+        int(resolution),
+        data,
+    )
+
+
+async def flushing_snapshots(state: Dict[str, Any]) -> None:
+    """Store the snapshots updated by a batch, one HSET per hash"""
+
+    for key, snapshots in state["snapshots"].items():
+        if snapshots:
+            await redis_client.put_many(
+                key,
+                snapshots,
+                {
+                    field: o["timestamp"]
+                    for field, o in snapshots.items()
+                    if "timestamp" in o
+                },
+            )
+            snapshots.clear()
+
+
+async def publishing_tickers(state: Dict[str, Any]) -> None:
+    """
+    Publish the tickers of the currencies updated by a batch, once each
+
+    The strategies decide on this message: the trace of the last stream
+    entry goes along, so that the order ack closes the tick to order trace.
+    """
+
+    for currency, trace in state["ticker_traces"].items():
+
+        tickers = [
+            o
+            for o in state["tickers"].values()
+            if currency.upper() in o["instrument_name"]
+        ]
+
+        await publishing_result(
+            redis_client,
+            dict(
+                params=dict(
+                    channel=RedisChannels.TICKER_CACHE_UPDATING,
+                    data=dict(
+                        data=tickers,
+                        currency=currency,
+                        currency_upper=currency.upper(),
+                        server_time=max(o.get("timestamp", 0) for o in tickers),
+                        trace=trace,
+                    ),
+                )
+            ),
+        )
+
+    state["ticker_traces"].clear()
 
 
 async def stream_consumer(redis: Any, state: Dict[str, Any]) -> None:
@@ -126,16 +268,23 @@ async def stream_consumer(redis: Any, state: Dict[str, Any]) -> None:
                 block=5000,
             )
 
+            read_ns = now_ns()
+
             # Process messages in parallel
             if messages:
                 tasks = []
                 for stream, message_list in messages:
                     for message_id, message_data in message_list:
 
-                        tasks.append(process_message(message_id, message_data, state))
+                        tasks.append(
+                            process_message(message_id, message_data, state, read_ns)
+                        )
 
                 results = await asyncio.gather(*tasks)
 
+                await flushing_snapshots(state)
+                await publishing_tickers(state)
+
                 # Acknowledge successful messages
                 ack_ids = [
                     message_id
@@ -4,16 +4,17 @@
 import asyncio
 import uvloop
 import logging
-from collections import defaultdict
 
 from loguru import logger as log
-from cachetools import TTLCache
 
 asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 # Application imports
 from core.db.redis import redis_client
 from core.error_handler import error_handler
+from core.health import serving_metrics, stopping_metrics
+from src.scripts.deribit.restful_api import connector
+from src.services.cleaner.partitioning_db import running_partition_maintenance
 from src.services.distributor.deribit import distributing_ws_data
 from src.shared.config.constants import ServiceConstants
 from src.shared.config.config import config
@@ -46,6 +47,9 @@ async def stream_consumer():
 
     batch_size = 10
 
+    # kept across batches: the tickers are merged from incremental updates
+    state = distributing_ws_data.get_initial_state()
+
     while True:
         try:
             # Read messages from stream
@@ -74,16 +78,7 @@ async def stream_consumer():
                     )
 
                 # Process messages
-                await distributing_ws_data.stream_consumer(
-                    redis,
-                    {
-                        "locks": defaultdict(asyncio.Lock),
-                        "caches": {
-                            "portfolio": TTLCache(maxsize=1000, ttl=300),
-                            "ticker": TTLCache(maxsize=1000, ttl=300),
-                        },
-                    },
-                )
+                await distributing_ws_data.stream_consumer(redis, state)
 
         except ConnectionError:
             log.error("Redis connection lost, reconnecting...")
@@ -97,9 +92,17 @@ async def main():
     """Service entry point"""
     log.info("Starting distributor service")
 
+    metrics_server = await serving_metrics()
+
+    # creates the ohlc and trade archive partitions ahead of the writes
+    partition_task = asyncio.create_task(running_partition_maintenance())
+
     try:
         await stream_consumer()
     finally:
+        partition_task.cancel()
+        await stopping_metrics(metrics_server)
+        await connector.http_pool.close()
         await pg.shutdown()  # Close all connections
 
 
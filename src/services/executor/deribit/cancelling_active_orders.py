@@ -11,7 +11,7 @@ from core.db.postgres import fetch, delete_row
 from core.error_handler import error_handler
 from src.scripts.deribit import get_instrument_summary, starter
 from src.scripts.deribit import get_published_messages
-from src.scripts.deribit import subscribing_to_channels
+from src.scripts.deribit import subscribing_to_channels, versioned_cache
 from src.scripts.deribit.restful_api import end_point_params_template
 from src.scripts.deribit.strategies.cash_carry import combo_auto as combo
 from src.scripts.deribit.strategies.hedging import hedging_spot
@@ -83,6 +83,11 @@ async def cancelling_orders(
         order_update_channel: str = redis_channels["order_cache_updating"]
         sub_account_cached_channel: str = redis_channels["sub_account_cache_updating"]
 
+        # rebuilds the sub account view from snapshot/delta broadcasts
+        sub_account_subscriber = versioned_cache.VersionedSubscriber(
+            sub_account_cached_channel
+        )
+
         cached_ticker_all = []
 
         not_cancel = True
@@ -140,6 +145,11 @@ async def cancelling_orders(
 
                 if sub_account_cached_channel in message_channel:
 
+                    data = await sub_account_subscriber.receiving(
+                        client_redis,
+                        data,
+                    )
+
                     cached_orders = data["open_orders"]
 
                     my_trades_active_all = data["my_trades"]
@@ -408,13 +418,17 @@ async def cancel_the_cancellables(
                     o["order_id"] for o in open_orders_cancellables
                 ]
 
-                for order_id in open_orders_cancellables_id:
-
-                    await cancel_by_order_id(
-                        api_request,
-                        order_db_table,
-                        order_id,
-                    )
+                # pipelined: over the WS RPC all cancels are in flight at once
+                await asyncio.gather(
+                    *[
+                        cancel_by_order_id(
+                            api_request,
+                            order_db_table,
+                            order_id,
+                        )
+                        for order_id in open_orders_cancellables_id
+                    ]
+                )
 
 
 async def cancel_by_order_id(
@@ -15,6 +15,7 @@ asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 # Application imports
 from core.error_handler import error_handler
+from core.health import serving_metrics, stopping_metrics
 from core.db.redis import redis_client as global_redis_client
 from core.security import get_secret
 from src.shared.config.settings import (
@@ -25,8 +26,8 @@ from src.shared.config.settings import (
     DERIBIT_MAINTENANCE_THRESHOLD,
     DERIBIT_HEARTBEAT_INTERVAL,
 )
-from src.scripts.deribit import get_instrument_summary, starter
-from src.scripts.deribit.restful_api import end_point_params_template
+from src.scripts.deribit import get_instrument_summary, starter, ws_rpc
+from src.scripts.deribit.restful_api import connector, end_point_params_template
 from src.scripts.deribit.strategies import relabelling_trading_result
 from src.scripts.market_understanding.price_action.candles_analysis import (
     get_market_condition,
@@ -43,6 +44,8 @@ from src.shared.utils import (
 async def run_services() -> None:
     log.info("Starting service orchestration")
 
+    metrics_server = await serving_metrics()
+
     try:
         while True:
             if app_state.maintenance_mode:
@@ -58,6 +61,8 @@ async def run_services() -> None:
     except Exception as error:
         log.exception("Unhandled error in service orchestration")
         await enter_maintenance_mode("Unhandled error in service orchestration")
+    finally:
+        await stopping_metrics(metrics_server)
 
 
 class ApplicationState:
@@ -204,6 +209,9 @@ async def trading_main() -> None:
             return
 
         api_request = end_point_params_template.SendApiRequest(client_id, client_secret)
+
+        # orders and cancels go over the authenticated WS, REST is the fallback
+        ws_rpc.rpc_client.start(client_id, client_secret)
         currencies = DERIBIT_CURRENCIES
         resolutions = [1, 5, 15, 60]
 
@@ -324,6 +332,10 @@ async def trading_main() -> None:
                 except asyncio.CancelledError:
                     log.info("Background task cancelled")
 
+        # release pooled REST connections and the WS RPC socket
+        await ws_rpc.rpc_client.close()
+        await connector.http_pool.close()
+
 
 async def main():
     register_services()
@@ -7,16 +7,27 @@ import asyncio
 from loguru import logger as log
 
 # user defined formula
-from core.db import redis as redis_client
 from core.error_handler import error_handler
+from core.latency import (
+    ORDER_ACK,
+    STRATEGY_DECISION,
+    latency_tracer,
+    loading_trace,
+)
 from core.db.postgres import (
     fetch,
     insert_trade_or_order,
     delete_row,
     update_status_data,
 )
-from src.scripts.deribit import get_published_messages, caching, subscribing_to_channels
+from src.scripts.deribit import (
+    get_published_messages,
+    caching,
+    subscribing_to_channels,
+    versioned_cache,
+)
 from src.scripts.deribit.restful_api import end_point_params_template
+from src.scripts.deribit.restful_api.request_cache import request_cache
 from src.scripts.deribit.strategies import basic_strategy
 from src.services.executor.deribit import (
     cancelling_active_orders as cancel_order,
@@ -78,6 +89,11 @@ async def processing_orders(
         sqlite_updating_channel: str = redis_channels["sqlite_record_updating"]
         sub_account_cached_channel: str = redis_channels["sub_account_cache_updating"]
 
+        # broadcast sub account changes as deltas between periodic snapshots
+        sub_account_publisher = versioned_cache.VersionedPublisher(
+            sub_account_cached_channel
+        )
+
         not_cancel = True
 
         query_trades = f"SELECT * FROM  v_trading_active"
@@ -108,6 +124,9 @@ async def processing_orders(
 
                 if my_trade_receiving_channel in message_channel:
 
+                    # a fill changed the account: cached REST reads are stale
+                    request_cache.invalidating()
+
                     log.critical(message_channel)
                     log.error(data)
 
@@ -141,7 +160,7 @@ async def processing_orders(
                                 positions_cached,
                                 query_trades,
                                 result,
-                                sub_account_cached_channel,
+                                sub_account_publisher,
                                 message_byte_data,
                             )
 
@@ -150,17 +169,28 @@ async def processing_orders(
                     log.critical(message_channel)
                     log.warning(data)
 
+                    # traced since the ticker the strategy decided on, else
+                    # since the decision itself
+                    trace = loading_trace(data.get("trace")) or latency_tracer.starting(
+                        STRATEGY_DECISION
+                    )
+
                     if data["order_allowed"]:
 
-                        await if_order_is_true(
+                        order_result = await if_order_is_true(
                             api_request,
                             non_checked_strategies,
                             data,
                             ordered,
                         )
 
+                        if order_result:
+                            latency_tracer.stamping(trace, ORDER_ACK)
+
                 if order_update_channel in message_channel:
 
+                    request_cache.invalidating()
+
                     data = data["current_order"]
 
                     log.critical(message_channel)
@@ -243,7 +273,7 @@ async def processing_orders(
                             positions_cached,
                             query_trades,
                             result,
-                            sub_account_cached_channel,
+                            sub_account_publisher,
                             message_byte_data,
                         )
 
@@ -261,7 +291,7 @@ async def processing_orders(
                             positions_cached,
                             query_trades,
                             result,
-                            sub_account_cached_channel,
+                            sub_account_publisher,
                             message_byte_data,
                         )
 
@@ -721,7 +751,7 @@ async def updating_sub_account(
     positions_cached: list,
     query_trades: str,
     subaccounts_details_result: list,
-    sub_account_cached_channel: str,
+    sub_account_publisher: object,
     message_byte_data: dict,
 ) -> None:
 
@@ -752,12 +782,10 @@ async def updating_sub_account(
         my_trades=my_trades_active_all,
     )
 
-    message_byte_data["params"].update({"channel": sub_account_cached_channel})
-    message_byte_data["params"].update({"data": data})
-
-    await redis_client.publishing_result(
+    await sub_account_publisher.publishing(
         client_redis,
         message_byte_data,
+        data,
     )
 
 
@@ -21,14 +21,24 @@ from loguru import logger as log
 
 # Application imports
 from core.error_handler import error_handler
+from core.latency import WS_RECEIVE, XADD, latency_tracer, now_ns
+from core.metrics import registry
 from src.scripts.deribit.restful_api import end_point_params_template
 from src.shared.utils import string_modification as str_mod
+from src.shared.utils.resampling import get_subscribed_resolutions
 from src.shared.config.constants import (
     ServiceConstants,
     WebsocketParameters,
     AddressUrl,
 )
 
+messages_received = registry.counter(
+    "ws_messages_total", "WebSocket data messages received", ("channel",)
+)
+stream_entries_added = registry.counter(
+    "stream_entries_added_total", "Entries handed to XADD"
+)
+
 
 @dataclass(unsafe_hash=True, slots=True)
 class StreamingAccountData:
@@ -53,6 +63,8 @@ class StreamingAccountData:
     maintenance_mode: bool = False
     refresh_task: Optional[asyncio.Task] = None
     heartbeat_task: Optional[asyncio.Task] = None
+    recorder: Any = None  # recording_frames.FrameRecorder, to replay offline
+    resampler: Any = None  # resampling.OhlcResampler, charts built from 1 min
 
     def __post_init__(self):
         """Initialize event loop reference"""
@@ -157,6 +169,36 @@ class StreamingAccountData:
             source="ws-combination",
         )
 
+    async def seeding_resampler(self, instruments_name: List[str]) -> None:
+        """
+        Refetch the minutes of the buckets forming, so that the resampler
+        never builds them from the minutes received since (re)connecting
+        """
+
+        if self.resampler is None:
+            return
+
+        minutes = max(self.resampler.resolutions, default=0)
+
+        for instrument_name in instruments_name:
+
+            if "PERPETUAL" not in instrument_name or not minutes:
+                continue
+
+            try:
+                result = await end_point_params_template.get_ohlc(
+                    instrument_name, 1, minutes, qty_as_start_time_stamp=True
+                )
+
+                self.resampler.seeding(
+                    instrument_name, str_mod.transform_nested_dict_to_list_ohlc(result)
+                )
+
+            except Exception as error:
+                # the buckets forming are then skipped, not built from a hole
+                self.resampler.resetting(instrument_name)
+                log.warning(f"Seeding the resampler {instrument_name} failed: {error}")
+
     async def cancel_background_tasks(self) -> None:
         """Safely cancel background tasks"""
         for task in [self.heartbeat_task, self.refresh_task]:
@@ -218,10 +260,32 @@ class StreamingAccountData:
         )
         await asyncio.sleep(delay)
 
+    async def sending_batch(
+        self,
+        client_redis: Any,
+        batch: List[dict],
+    ) -> None:
+        """
+        raise: when the batch was not added, it is left to the caller to retry
+        """
+
+        # the entries carry the stamp of the attempt that succeeds, recorded
+        # once that attempt went through: a retried batch is counted once
+        xadd_ns = now_ns()
+
+        for item in batch:
+            item["trace"][XADD] = xadd_ns
+
+        await client_redis.xadd_bulk(ServiceConstants.REDIS_STREAM_MARKET, batch)
+
+        for item in batch:
+            latency_tracer.recording_stamp(item["trace"], XADD)
+
+        stream_entries_added.labels().increment(len(batch))
+
     async def process_messages(self, client_redis, exchange):
         """Process incoming messages with state recovery"""
 
-        STREAM_NAME = ServiceConstants.REDIS_STREAM_MARKET
         MAX_BATCH_ITEMS = 5000  # Hard limit of 5000 messages
         BATCH_SIZE = 50
         batch = []
@@ -233,7 +297,14 @@ class StreamingAccountData:
             self.last_message_time = current_time
             
             async for message in self.websocket_client:
-                
+
+                received_ns = now_ns()
+                current_time = time.time()
+
+                # recordings are replayed as epoch times, see recording_frames
+                if self.recorder is not None:
+                    self.recorder.recording(time.time_ns(), message)
+
                 try:
                     message_dict = orjson.loads(message)
 
@@ -259,19 +330,51 @@ class StreamingAccountData:
                     if "params" in message_dict and "channel" in message_dict["params"]:
                         channel = message_dict["params"]["channel"]
                         data = message_dict["params"]["data"]
-                        serialized_data = orjson.dumps(data).decode("utf-8")
+                        messages_received.labels(channel).increment()
                         timestamp = str(int(current_time * 1000))
 
                         # Add to batch
                         batch.append(
                             {
                                 "channel": channel,
-                                "data": serialized_data,
+                                "data": data,
                                 "timestamp": timestamp,
                                 "exchange": exchange,
+                                "trace": latency_tracer.starting(
+                                    WS_RECEIVE,
+                                    received_ns,
+                                ),
                             }
                         )
 
+                        # higher resolutions, published as if subscribed
+                        if self.resampler is not None and channel.startswith(
+                            "chart.trades."
+                        ):
+                            _, _, instrument_name, resolution = channel.split(".", 3)
+
+                            if resolution == "1":
+                                resampled = self.resampler.updating(
+                                    instrument_name, data
+                                )
+
+                                for resolution, candle in resampled:
+                                    batch.append(
+                                        {
+                                            "channel": (
+                                                "chart.trades."
+                                                f"{instrument_name}.{resolution}"
+                                            ),
+                                            "data": candle,
+                                            "timestamp": timestamp,
+                                            "exchange": exchange,
+                                            "trace": latency_tracer.starting(
+                                                WS_RECEIVE,
+                                                received_ns,
+                                            ),
+                                        }
+                                    )
+
                 except Exception as e:
                     log.error(f"Message processing failed: {e}")
 
@@ -286,7 +389,7 @@ class StreamingAccountData:
 
                 if should_send:
                     try:
-                        await client_redis.xadd_bulk(STREAM_NAME, batch)
+                        await self.sending_batch(client_redis, batch)
                         batch = []
                         last_flush_time = current_time
                     except Exception as e:
@@ -297,7 +400,7 @@ class StreamingAccountData:
             if batch:
                 try:
                     log.debug(f"Sending final batch of {len(batch)} messages")
-                    await client_redis.xadd_bulk(STREAM_NAME, batch)
+                    await self.sending_batch(client_redis, batch)
                 except Exception as e:
             
                     import traceback
@@ -341,6 +444,11 @@ class StreamingAccountData:
                         client_redis, exchange, futures_instruments, resolutions
                     )
 
+                    # the minutes missed while disconnected, before the live ones
+                    await self.seeding_resampler(
+                        futures_instruments["instruments_name"]
+                    )
+
                     # Process incoming messages
                     await self.process_messages(client_redis, exchange)
 
@@ -393,6 +501,10 @@ class StreamingAccountData:
         """Generate list of channels to subscribe to"""
         ws_instruments = []
 
+        # the resampler builds the other resolutions from the 1 minute chart
+        if self.resampler is not None:
+            resolutions = get_subscribed_resolutions(resolutions)
+
         # Add account-related channels
         instrument_kinds = ["future", "future_combo"]
         for kind in instrument_kinds:
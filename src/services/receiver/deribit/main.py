@@ -15,14 +15,18 @@ asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 # Application imports
 from core.db.redis import redis_client as global_redis_client
+from core.db.stream_retention import StreamRetention
 from core.error_handler import error_handler
+from core.health import serving_metrics, stopping_metrics
 from src.scripts.deribit import get_instrument_summary
 from src.scripts.deribit.restful_api import end_point_params_template
 from core.security import get_secret
 from src.services.receiver.deribit import deribit_ws
+from src.services.receiver.deribit.recording_frames import FrameRecorder
 from src.shared.config.config import config
 from src.shared.utils import system_tools, template
-from src.shared.config.constants import AccountId
+from src.shared.utils.resampling import OhlcResampler, is_derivable
+from src.shared.config.constants import AccountId, ServiceConstants
 
 
 async def setup_redis():
@@ -49,6 +53,9 @@ async def run_receiver():
     """Core receiver workflow with isolated error handling"""
     log.info("Starting Deribit receiver service")
 
+    recorder = None
+    retention_task = None
+
     try:
         # Get Redis client wrapper instance
         client_redis = global_redis_client
@@ -78,11 +85,38 @@ async def run_receiver():
             currencies, ["perpetual"]
         )
 
+        # Record the raw frames, to replay them offline (replay_server.py)
+        record_path = os.getenv("WS_RECORD_PATH")
+
+        if record_path:
+            recorder = FrameRecorder(
+                record_path,
+                dict(
+                    exchange="deribit",
+                    currencies=currencies,
+                    resolutions=resolutions,
+                    resampled_resolutions=[o for o in resolutions if is_derivable(o)],
+                    instruments=futures_instruments["active_futures"]
+                    + futures_instruments["active_combo"],
+                ),
+            )
+            log.info(f"Recording WebSocket frames in {record_path}")
+
         # Initialize WebSocket client
         stream = deribit_ws.StreamingAccountData(
             sub_account_id=AccountId.DERIBIT_MAIN,
             client_id=client_id,
             client_secret=client_secret,
+            ws_connection_url=config["deribit"]["ws_url"],
+            recorder=recorder,
+            resampler=OhlcResampler(resolutions),
+        )
+
+        # the stream is trimmed on a timer, never on the write path
+        retention_task = asyncio.create_task(
+            StreamRetention(ServiceConstants.REDIS_STREAM_MARKET).running(
+                global_redis_client
+            )
         )
 
         await stream.manage_connection(
@@ -96,10 +130,19 @@ async def run_receiver():
         log.exception(f"Receiver service failed: {error}")
         raise
 
+    finally:
+        if retention_task is not None:
+            retention_task.cancel()
+
+        if recorder is not None:
+            recorder.closing()
+
 
 async def main():
     """Service entry point with graceful shutdown"""
 
+    metrics_server = await serving_metrics()
+
     try:
         await run_receiver()
     except (KeyboardInterrupt, SystemExit):
@@ -107,6 +150,8 @@ async def main():
     except Exception as error:
         log.exception(f"Fatal error in receiver service: {error}")
         raise SystemExit(1)
+    finally:
+        await stopping_metrics(metrics_server)
 
 
 if __name__ == "__main__":
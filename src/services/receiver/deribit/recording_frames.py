@@ -0,0 +1,210 @@
+# src\services\receiver\deribit\recording_frames.py
+
+"""
+Recording of the raw Deribit WebSocket frames, for offline replays
+
+A recording is a directory:
+    manifest.json               exchange, start time and the instruments the
+                                receiver resolved at startup (served back by
+                                the replay server as public/get_instruments)
+    segment_00000.frames.gz     one frame per line:
+                                "<receipt unix ns>\\t<raw frame>"
+    segment_00001.frames.gz     ...
+
+Receipt times are wall clock (time.time_ns), not the monotonic clock of
+the latency traces: replays read them as epoch times, and segments
+appended after a reboot stay in order.
+
+The receiver only appends frames to a list. Full chunks are handed to a
+writer thread that compresses them and rotates the segments, so recording
+does not add disk or zlib work to the event loop.
+"""
+
+# built ins
+import glob
+import gzip
+import os
+import queue
+import threading
+import time
+from typing import Iterator, Tuple
+
+# installed
+import orjson
+from loguru import logger as log
+
+MANIFEST = "manifest.json"
+SEGMENT_PATTERN = "segment_*.frames.gz"
+
+
+def get_segment_path(
+    path: str,
+    sequence: int,
+) -> str:
+    """ """
+
+    return os.path.join(path, f"segment_{sequence:05d}.frames.gz")
+
+
+def writing_manifest(
+    path: str,
+    manifest: dict,
+) -> None:
+    """ """
+
+    os.makedirs(path, exist_ok=True)
+
+    with open(os.path.join(path, MANIFEST), "wb") as f:
+        f.write(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
+
+
+def reading_manifest(path: str) -> dict:
+    """return: {} for recordings without manifest"""
+
+    try:
+        with open(os.path.join(path, MANIFEST), "rb") as f:
+            return orjson.loads(f.read())
+
+    except FileNotFoundError:
+        return {}
+
+
+def reading_frames(path: str) -> Iterator[Tuple[int, str]]:
+    """
+    return: (receipt unix ns, raw frame) of every segment, in recording order
+    """
+
+    for segment in sorted(glob.glob(os.path.join(path, SEGMENT_PATTERN))):
+
+        with gzip.open(segment, "rt", encoding="utf-8") as f:
+
+            for line in f:
+
+                received_ns, _, frame = line.rstrip("\n").partition("\t")
+
+                # a truncated last line (crash while writing) is skipped
+                if frame:
+                    yield int(received_ns), frame
+
+
+class FrameRecorder:
+    """Appends frames from the event loop, writes them from a thread"""
+
+    def __init__(
+        self,
+        path: str,
+        manifest: dict = None,
+        segment_frames: int = 200_000,
+        flush_frames: int = 1_000,
+        flush_seconds: float = 5,
+        compress_level: int = 3,
+    ):
+        self.path = path
+        self.segment_frames = segment_frames
+        self.flush_frames = flush_frames
+        self.flush_ns = int(flush_seconds * 1_000_000_000)
+        self.compress_level = compress_level
+
+        self.buffer = []
+        self.last_flush_ns = time.time_ns()
+        self.recorded = 0
+
+        # continue after the segments of a previous run into the same path
+        self.sequence = len(glob.glob(os.path.join(path, SEGMENT_PATTERN)))
+
+        writing_manifest(
+            path,
+            dict(
+                started_at=int(time.time() * 1000),
+                **(manifest or {}),
+            ),
+        )
+
+        self.chunks = queue.Queue()
+        self.writer = threading.Thread(
+            target=self.writing,
+            name="frame-recorder",
+            daemon=True,
+        )
+        self.writer.start()
+
+    def recording(
+        self,
+        received_ns: int,
+        frame: str,
+    ) -> None:
+        """
+        called for every frame, on the event loop
+        received_ns: time.time_ns() at receipt
+        """
+
+        # json holds no raw new line inside strings: replacing keeps it valid
+        frame = frame.replace("\n", " ")
+
+        self.buffer.append(f"{received_ns}\t{frame}\n")
+
+        if (
+            len(self.buffer) >= self.flush_frames
+            or received_ns - self.last_flush_ns > self.flush_ns
+        ):
+            self.flushing(received_ns)
+
+    def flushing(
+        self,
+        at_ns: int = None,
+    ) -> None:
+        """ """
+
+        if self.buffer:
+            self.chunks.put(self.buffer)
+            self.buffer = []
+
+        self.last_flush_ns = at_ns or time.time_ns()
+
+    def writing(self) -> None:
+        """runs in the writer thread until closing puts None"""
+
+        segment = None
+        in_segment = 0
+
+        while True:
+
+            chunk = self.chunks.get()
+
+            if chunk is None:
+                break
+
+            if segment is None or in_segment >= self.segment_frames:
+
+                if segment is not None:
+                    segment.close()
+
+                segment = gzip.open(
+                    get_segment_path(self.path, self.sequence),
+                    "wb",
+                    compresslevel=self.compress_level,
+                )
+                self.sequence += 1
+                in_segment = 0
+
+            try:
+                segment.write("".join(chunk).encode("utf-8"))
+
+            except Exception as error:
+                log.error(f"frame recorder failed writing {len(chunk)} frames: {error}")
+                continue
+
+            in_segment += len(chunk)
+            self.recorded += len(chunk)
+
+        if segment is not None:
+            segment.close()
+
+    def closing(self) -> None:
+        """flushes the pending frames and waits for the writer"""
+
+        self.flushing()
+        self.chunks.put(None)
+        self.writer.join()
+
+        log.info(f"frame recorder closed, {self.recorded} frames in {self.path}")
@@ -0,0 +1,380 @@
+# src\services\receiver\deribit\replay_server.py
+
+"""
+Local stand-in for Deribit, replaying a recording (see recording_frames.py)
+
+Speaks just enough of the exchange for the unmodified receiver:
+    WebSocket JSON-RPC  public/auth, public/set_heartbeat (then test_request
+                        heartbeats), public/test, public|private/subscribe,
+                        public|private/unsubscribe
+    REST                GET /api/v2/public/get_instruments?currency=BTC,
+                        answered from the instruments of the manifest
+
+Once the client subscribed, the recorded subscription frames of its channels
+are sent with their original spacing divided by speed (speed 0: as fast as
+the socket takes them). Frames are sent byte for byte as recorded, so two
+replays of a recording feed the pipeline exactly the same data.
+
+    python -m src.services.receiver.deribit.replay_server /app/data/recordings/session --speed 10
+
+    receiver with DERIBIT_WS_URL=ws://localhost:8765 DERIBIT_API_URL=http://localhost:8766/api/v2/
+"""
+
+# built ins
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+# installed
+import orjson
+import uvloop
+import websockets
+from dataclassy import dataclass
+from loguru import logger as log
+
+# user defined formula
+from src.services.receiver.deribit.recording_frames import (
+    reading_frames,
+    reading_manifest,
+)
+
+METHOD_NOT_FOUND = -32601
+
+
+def get_frame_channel(frame: str) -> Optional[str]:
+    """return: channel of a subscription notification, None for other frames"""
+
+    try:
+        message = orjson.loads(frame)
+
+    except orjson.JSONDecodeError:
+        return None
+
+    if message.get("method") != "subscription":
+        return None
+
+    return message.get("params", {}).get("channel")
+
+
+def building_response(
+    request_id: Any,
+    result: Any = None,
+    error: dict = None,
+) -> str:
+    """text frames, as sent by the exchange"""
+
+    now_us = time.time_ns() // 1000
+
+    response = {"jsonrpc": "2.0", "id": request_id}
+
+    if error is None:
+        response["result"] = result
+
+    else:
+        response["error"] = error
+
+    response.update(usIn=now_us, usOut=now_us, usDiff=0)
+
+    return orjson.dumps(response).decode()
+
+
+def authenticating(params: dict) -> dict:
+    """any credentials are accepted"""
+
+    return dict(
+        access_token="replay-access-token",
+        refresh_token="replay-refresh-token",
+        expires_in=31_536_000,
+        token_type="bearer",
+        scope="connection mainaccount",
+    )
+
+
+@dataclass(unsafe_hash=True, slots=True)
+class ReplayServer:
+    """Serves one recording to every client that connects"""
+
+    path: str
+    speed: float = 1.0
+    looping: bool = False
+    host: str = "127.0.0.1"
+    port: int = 8765
+    rest_port: int = 8766
+    manifest: Dict = {}
+    stats: Dict = {}
+
+    def __post_init__(self):
+        """ """
+        self.manifest = reading_manifest(self.path)
+
+    def getting_instruments(
+        self,
+        currency: str,
+    ) -> list:
+        """ """
+
+        return [
+            o
+            for o in self.manifest.get("instruments", [])
+            if o.get("base_currency", "").upper() == currency.upper()
+        ]
+
+    async def replaying(
+        self,
+        websocket: Any,
+        subscribed: set,
+    ) -> dict:
+        """
+        return: frames sent and skipped, elapsed seconds and frames per second
+        """
+
+        sent = skipped = 0
+        started = time.monotonic()
+
+        while True:
+
+            first_ns = None
+            pass_started = time.monotonic()
+
+            for received_ns, frame in reading_frames(self.path):
+
+                channel = get_frame_channel(frame)
+
+                if channel not in subscribed:
+                    skipped += 1
+                    continue
+
+                first_ns = first_ns or received_ns
+
+                if self.speed > 0:
+
+                    due = pass_started + (received_ns - first_ns) / 1e9 / self.speed
+                    delay = due - time.monotonic()
+
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                await websocket.send(frame)
+                sent += 1
+
+                # at full speed, still let the control messages through
+                if not sent % 1000:
+                    await asyncio.sleep(0)
+
+            if not self.looping or not sent:
+                break
+
+        elapsed = time.monotonic() - started
+
+        self.stats = dict(
+            sent=sent,
+            skipped=skipped,
+            elapsed=round(elapsed, 3),
+            rate=round(sent / elapsed, 1) if elapsed else 0,
+        )
+
+        log.info(f"replay finished {self.stats}")
+
+        return self.stats
+
+    async def beating(
+        self,
+        websocket: Any,
+        interval: float,
+    ) -> None:
+        """test_request heartbeats, as set by public/set_heartbeat"""
+
+        message = orjson.dumps(
+            {
+                "jsonrpc": "2.0",
+                "method": "heartbeat",
+                "params": {"type": "test_request"},
+            }
+        ).decode()
+
+        while True:
+            await asyncio.sleep(interval)
+            await websocket.send(message)
+
+    async def handling_connection(
+        self,
+        websocket: Any,
+        path: str = None,  # passed by the legacy server of websockets < 14
+    ) -> None:
+        """ """
+
+        subscribed = set()
+        tasks = {}
+
+        log.info("replay client connected")
+
+        try:
+            async for raw in websocket:
+
+                try:
+                    request = orjson.loads(raw)
+
+                except orjson.JSONDecodeError:
+                    continue
+
+                request_id = request.get("id")
+                method = request.get("method", "")
+                params = request.get("params") or {}
+
+                if method == "public/auth":
+                    response = building_response(request_id, authenticating(params))
+
+                elif method == "public/set_heartbeat":
+
+                    if "heartbeat" in tasks:
+                        tasks["heartbeat"].cancel()
+
+                    tasks["heartbeat"] = asyncio.create_task(
+                        self.beating(websocket, max(params.get("interval", 30), 10))
+                    )
+                    response = building_response(request_id, "ok")
+
+                elif method == "public/test":
+                    response = building_response(request_id, {"version": "replay"})
+
+                elif method.endswith("/subscribe"):
+
+                    channels = params.get("channels", [])
+                    subscribed.update(channels)
+
+                    if "replay" not in tasks:
+                        tasks["replay"] = asyncio.create_task(
+                            self.replaying(websocket, subscribed)
+                        )
+
+                    response = building_response(request_id, channels)
+
+                elif method.endswith("/unsubscribe"):
+
+                    channels = params.get("channels", [])
+                    subscribed.difference_update(channels)
+                    response = building_response(request_id, channels)
+
+                else:
+                    response = building_response(
+                        request_id,
+                        error=dict(code=METHOD_NOT_FOUND, message="Method not found"),
+                    )
+
+                await websocket.send(response)
+
+        except websockets.ConnectionClosed:
+            pass
+
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+            log.info("replay client disconnected")
+
+    async def handling_rest(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """ """
+
+        try:
+            request_line = await reader.readline()
+
+            # drain the headers, the requests we serve have no body
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            url = urlsplit(parts[1] if len(parts) > 1 else "")
+
+            if url.path.endswith("public/get_instruments"):
+                currency = parse_qs(url.query).get("currency", [""])[0]
+                status = "200 OK"
+                body = orjson.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "result": self.getting_instruments(currency),
+                    }
+                )
+
+            else:
+                status = "404 Not Found"
+                body = orjson.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "error": dict(code=METHOD_NOT_FOUND, message="Method not found"),
+                    }
+                )
+
+            writer.write(
+                (
+                    f"HTTP/1.1 {status}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode()
+                + body
+            )
+            await writer.drain()
+
+        except Exception as error:
+            log.warning(f"replay rest request failed: {error}")
+
+        finally:
+            writer.close()
+
+    async def serving(self) -> None:
+        """runs until cancelled"""
+
+        rest_server = await asyncio.start_server(
+            self.handling_rest,
+            self.host,
+            self.rest_port,
+        )
+
+        async with websockets.serve(
+            self.handling_connection,
+            self.host,
+            self.port,
+            compression=None,
+            max_size=None,
+        ):
+            log.info(
+                f"replaying {self.path} at {self.speed or 'max'}x on ws://{self.host}:{self.port}, rest on http://{self.host}:{self.rest_port}/api/v2/"
+            )
+
+            async with rest_server:
+                await asyncio.Future()
+
+
+def main() -> None:
+    """ """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="recording directory")
+    parser.add_argument("--speed", type=float, default=1.0, help="0: max speed")
+    parser.add_argument("--loop", action="store_true", help="replay forever")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rest-port", type=int, default=8766)
+
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        args.path,
+        args.speed,
+        args.loop,
+        args.host,
+        args.port,
+        args.rest_port,
+    )
+
+    uvloop.run(server.serving())
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ Primary configuration loader
 import os
 import tomli
 from core.security import get_secret
+from src.shared.config.constants import AddressUrl
 
 
 class ConfigLoader:
@@ -83,6 +84,12 @@ class ConfigLoader:
             "environment": os.getenv("ENVIRONMENT", "production"),
         }
 
+        # Build exchange endpoints configuration (overridden to replay recordings)
+        deribit_config = {
+            "ws_url": os.getenv("DERIBIT_WS_URL", AddressUrl.DERIBIT_WS),
+            "api_url": os.getenv("DERIBIT_API_URL", AddressUrl.DERIBIT_HTTPS),
+        }
+
         # Build error handling configuration
         error_handling_config = {
             "telegram": {
@@ -97,6 +104,7 @@ class ConfigLoader:
             "redis": redis_config,
             "postgres": postgres_config,
             "services": services_config,
+            "deribit": deribit_config,
             "strategies": strategy_config,
             "error_handling": error_handling_config,
         }
@@ -43,12 +43,23 @@ class ExchangeConstants:
 
 class AddressUrl:
     DERIBIT_WS = "wss://www.deribit.com/ws/api/v2"
+    DERIBIT_HTTPS = "https://www.deribit.com/api/v2/"
 
 
 class AccountId:
     DERIBIT_MAIN = "deribit-148510"
 
 
+class RedisKeys:
+    # hashes of the latest snapshots, one field per instrument or currency
+    ORDERS = "order"
+    PORTFOLIO = "account:portfolio"
+    TICKER = "market:ticker"
+    CHART = "market:chart"
+    USER_CHANGES = "user_changes"
+    MARKET_CONDITION = "market:market_condition"
+
+
 class RedisChannels:
     CHART_UPDATE = "market.chart.all"
     CHART_LOW_HIGH_TICK = "market.chart.low_high_tick"
@@ -70,6 +81,8 @@ class RedisChannels:
     MARKET_SUMMARY_UPDATING = "others.summary.cached_all"
     ACCOUNT_SUMMARY_UPDATING = "others.summary.cached_all"
     SQLITE_RECORD_UPDATING = "others.sqlite_record_updating"
+    SYSTEM_CONTROL = "system_control"
+    SYSTEM_CONTROL_REPLY = "system_control.reply"
 
 
 # Usage example:
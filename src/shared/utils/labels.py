@@ -0,0 +1,175 @@
+# src\shared\utils\labels.py
+
+"""
+Transaction label parsing and indexing
+
+Labels look like '<main>-<status>-<int>', e.g. 'hedgingSpot-open-1671189554374'
+or 'futureSpreadLong-closed-1729232152632'. The same few hundred labels are
+parsed over and over by the strategy, relabelling and cleaning loops, so
+each distinct string is parsed once into an immutable ParsedLabel and the
+record is memoised. LabelIndex groups transactions by label int and label
+main so callers do dict lookups instead of rescanning lists by substring.
+"""
+
+# built ins
+import sys
+from collections import defaultdict
+from functools import lru_cache
+
+# installed
+from dataclassy import dataclass
+
+SIDES = ("Short", "Long")
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedLabel:
+    """
+    Example:
+        'every5mtestLong-open-1681617021717'
+        main: 'every5mtestLong'
+        super_main: 'every5mtest'
+        side: 'Long'
+        status: 'open'
+        int: '1681617021717'
+        transaction_status: 'every5mtestLong-open'
+        transaction_net: 'every5mtestLong-1681617021717'
+        closed_to_open: 'every5mtestLong-open-1681617021717'
+    """
+
+    label: str = None
+    main: str = None
+    super_main: str = None
+    side: str = None
+    status: str = None
+    int: str = None
+    transaction_status: str = None
+    transaction_net: str = None
+    closed_to_open: str = None
+
+    def flipping_closed(
+        self,
+        integer: int = None,
+    ) -> str:
+        """open label of the opposite side, e.g. for a contra order"""
+
+        if not self.side:
+            return None
+
+        flip = "Long" if self.side == "Short" else "Short"
+
+        return f"{self.main.replace(self.side, flip)}-open-{integer}"
+
+    def as_dict(
+        self,
+        integer: int = None,
+    ) -> dict:
+        """shape returned by string_modification.parsing_label"""
+
+        return {
+            "super_main": self.super_main,
+            "main": self.main,
+            "int": self.int,
+            "transaction_status": self.transaction_status,
+            "transaction_net": self.transaction_net,
+            "flipping_closed": self.flipping_closed(integer),
+            "closed_to_open": self.closed_to_open,
+        }
+
+
+def _interning(text: str) -> str:
+    """ """
+
+    return None if text is None else sys.intern(text)
+
+
+@lru_cache(maxsize=65_536)
+def parsed_label(label: str) -> ParsedLabel:
+    """
+    Single pass parser. Memoised: the same label string always returns
+    the very same ParsedLabel instance.
+    """
+
+    if not isinstance(label, str):
+        return ParsedLabel(label=label, closed_to_open=f"{None}-open-{None}")
+
+    parts = label.split("-")
+    len_parts = len(parts)
+
+    main = parts[0]
+    status = parts[1] if len_parts > 1 else None
+    integer = parts[2] if len_parts > 2 else status
+
+    side = next((o for o in SIDES if o in main), None)
+
+    return ParsedLabel(
+        label=label,
+        main=_interning(main),
+        super_main=_interning(main.replace(side, "") if side else main),
+        side=side,
+        status=_interning(status),
+        int=integer,
+        transaction_status=None if status is None else f"{main}-{status}",
+        transaction_net=f"{main}-{parts[2]}" if len_parts > 2 else None,
+        closed_to_open=f"{main}-open-{integer}",
+    )
+
+
+class LabelIndex:
+    """Transactions grouped by label int and label main, built in one pass"""
+
+    __slots__ = ("by_int", "by_main", "by_main_and_int")
+
+    def __init__(
+        self,
+        transactions: list = None,
+    ):
+        self.by_int = defaultdict(list)
+        self.by_main = defaultdict(list)
+        self.by_main_and_int = defaultdict(list)
+
+        for transaction in transactions or []:
+            self.adding(transaction)
+
+    def adding(
+        self,
+        transaction: dict,
+    ) -> None:
+        """ """
+
+        label = transaction.get("label")
+
+        if not label:
+            return
+
+        parsed = parsed_label(label)
+
+        self.by_int[parsed.int].append(transaction)
+        self.by_main[parsed.main].append(transaction)
+        self.by_main_and_int[(parsed.main, parsed.int)].append(transaction)
+
+    def under_int(
+        self,
+        label: str,
+    ) -> list:
+        """transactions sharing the label int of label"""
+
+        return self.by_int.get(parsed_label(label).int, [])
+
+    def under_main(
+        self,
+        label: str,
+    ) -> list:
+        """transactions sharing the label main of label"""
+
+        return self.by_main.get(parsed_label(label).main, [])
+
+    def under_main_and_int(
+        self,
+        label: str,
+    ) -> list:
+        """ """
+
+        parsed = parsed_label(label)
+
+        return self.by_main_and_int.get((parsed.main, parsed.int), [])
@@ -0,0 +1,218 @@
+# src\shared\utils\resampling.py
+
+"""
+OHLC candles of any N minutes resolution, built from the 1 minute ones
+
+Candles are keyed by tick, the ms timestamp of their start, as in
+chart.trades and public/get_tradingview_chart_data. A N minutes candle
+gathers the 1 minute candles whose tick falls in [bucket, bucket + N min),
+bucket being aligned on the epoch as the exchange does:
+    open first, high max, low min, close last, volume and cost summed
+
+resampling does it for a whole history at once (backfills), OhlcResampler
+one update at a time on the live stream, so that only the 1 minute chart
+has to be subscribed and fetched. Both give the same prices; the summed
+volume and cost may differ in the last float digit.
+"""
+
+# built ins
+from collections import defaultdict
+
+# installed
+import numpy as np
+
+ONE_MINUTE = 60_000
+
+SUMMED = ("volume", "cost")
+
+
+def get_bucket(
+    tick: int,
+    resolution: int,
+) -> int:
+    """ """
+
+    period = resolution * ONE_MINUTE
+
+    return tick - tick % period
+
+
+def is_derivable(
+    resolution,
+    base_resolution: int = 1,
+) -> bool:
+    """'1D' and the like are left to the exchange"""
+
+    return (
+        isinstance(resolution, int)
+        and resolution > base_resolution
+        and resolution % base_resolution == 0
+    )
+
+
+def get_subscribed_resolutions(
+    resolutions: list,
+    base_resolution: int = 1,
+) -> list:
+    """the chart resolutions still needed from the exchange"""
+
+    return [base_resolution] + [
+        o
+        for o in resolutions
+        if o != base_resolution and not is_derivable(o, base_resolution)
+    ]
+
+
+def resampling(
+    candles: list,
+    resolution: int,
+) -> list:
+    """
+    candles: 1 minute candles, any order, the last one of a tick wins
+    return: candles of the resolution, oldest first
+    """
+
+    if not candles:
+        return []
+
+    by_tick = {o["tick"]: o for o in candles}
+
+    ticks = np.array(sorted(by_tick), dtype=np.int64)
+    rows = [by_tick[o] for o in ticks.tolist()]
+
+    buckets = ticks - ticks % (resolution * ONE_MINUTE)
+
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ticks)] - 1
+
+    def column(key: str) -> np.ndarray:
+        return np.array([o[key] for o in rows], dtype=float)
+
+    columns = dict(
+        tick=buckets[starts],
+        open=column("open")[starts],
+        high=np.maximum.reduceat(column("high"), starts),
+        low=np.minimum.reduceat(column("low"), starts),
+        close=column("close")[ends],
+    )
+
+    for key in SUMMED:
+        if all(key in o for o in rows):
+            columns[key] = np.add.reduceat(column(key), starts)
+
+    columns = {key: value.tolist() for key, value in columns.items()}
+
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def aggregating(
+    tick: int,
+    rows: list,
+) -> dict:
+    """rows: the 1 minute candles of a bucket, oldest first"""
+
+    candle = dict(
+        tick=tick,
+        open=rows[0]["open"],
+        high=max(o["high"] for o in rows),
+        low=min(o["low"] for o in rows),
+        close=rows[-1]["close"],
+    )
+
+    for key in SUMMED:
+        if all(key in o for o in rows):
+            candle[key] = sum(o[key] for o in rows)
+
+    return candle
+
+
+class OhlcResampler:
+    """Higher resolution candles, updated with each 1 minute chart update"""
+
+    def __init__(
+        self,
+        resolutions: list = (5, 15, 60),
+    ):
+        self.resolutions = [o for o in resolutions if is_derivable(o)]
+
+        # one bucket of the largest resolution is kept behind the current
+        # one, for the last update of a minute arriving after the next one
+        self.horizon = 2 * max(self.resolutions, default=1) * ONE_MINUTE
+
+        self.minutes = defaultdict(dict)
+
+        # first minute known per instrument: a bucket starting before it
+        # would be published from its last minutes only, as if complete
+        self.started = {}
+
+    def resetting(
+        self,
+        instrument_name: str,
+    ) -> None:
+        """
+        Forget the instrument, e.g. after a disconnection: the minutes missed
+        meanwhile would leave a hole in the bucket forming
+        """
+
+        self.minutes.pop(instrument_name, None)
+        self.started.pop(instrument_name, None)
+
+    def seeding(
+        self,
+        instrument_name: str,
+        candles: list,
+    ) -> None:
+        """candles: the latest 1 minute candles, replacing what was known"""
+
+        self.resetting(instrument_name)
+
+        minutes = self.minutes[instrument_name]
+
+        for candle in candles:
+            minutes[candle["tick"]] = candle
+
+        if minutes:
+            self.started[instrument_name] = min(minutes)
+
+    def updating(
+        self,
+        instrument_name: str,
+        candle: dict,
+    ) -> list:
+        """
+        candle: chart.trades.<instrument_name>.1 data
+        return: [(resolution, candle)] of the buckets the update falls in,
+            but those which started before the first minute known
+        """
+
+        minutes = self.minutes[instrument_name]
+
+        tick = candle["tick"]
+
+        started = self.started.setdefault(instrument_name, tick)
+
+        if tick not in minutes and len(minutes) * ONE_MINUTE > self.horizon:
+            oldest = max(minutes) - self.horizon
+            for o in [o for o in minutes if o <= oldest]:
+                del minutes[o]
+
+        minutes[tick] = candle
+
+        result = []
+
+        for resolution in self.resolutions:
+
+            bucket = get_bucket(tick, resolution)
+
+            if bucket < started:
+                continue
+
+            rows = [
+                minutes[o]
+                for o in range(bucket, bucket + resolution * ONE_MINUTE, ONE_MINUTE)
+                if o in minutes
+            ]
+
+            result.append((resolution, aggregating(bucket, rows)))
+
+        return result
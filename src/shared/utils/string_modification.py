@@ -1,5 +1,9 @@
 # src\shared\utils\string_modification.py
 
+# user defined formula
+from src.shared.utils.labels import parsed_label
+from src.shared.utils.time_modification import get_now_unix_time
+
 
 def remove_double_brackets_in_list(data: list) -> list:
     """_summary_
@@ -323,65 +327,8 @@ def parsing_label(
         transaction_net:'every5mtestLong-1681617021717''
 
     """
-    try:
-        try:
-            get_integer = get_strings_before_character(label, "-", 2)
-        except:
-            get_integer = get_strings_before_character(label, "-", 1)
-    except:
-        get_integer = None
-
-    try:
-        status = get_strings_before_character(label, "-", [0, 1])
-    except:
-        status = None
-
-    try:
-        net = get_strings_before_character(label)
-    except:
-        net = None
-
-    try:
-        main = get_strings_before_character(label, "-", 0)
-    except:
-        main = None
-
-    try:
-        side = ["Short", "Long"]
-        super_main = [main.replace(o, "") for o in side if o in main]
-    except:
-        super_main = None
-
-    try:
-        closed_to_open = f"{main}-open-{get_integer}"
-
-    except:
-        closed_to_open = None
-
-    try:
-        if "Short" in main:
-            flip = main.replace("Short", "Long")
-
-        if "Long" in main:
-            flip = main.replace("Long", "Short")
-        flipping_closed = f"{flip}-open-{integer}"
-    except:
-        flipping_closed = None
-
-    return {
-        # "super_main":  bool([o not in main for o in side]),
-        "super_main": (
-            None
-            if super_main == None
-            else (main if all([o not in main for o in side]) else super_main[0])
-        ),
-        "main": main,
-        "int": get_integer,
-        "transaction_status": status,
-        "transaction_net": net,
-        "flipping_closed": flipping_closed,
-        "closed_to_open": closed_to_open,
-    }
+    # parsed once per distinct label, see labels.parsed_label
+    return parsed_label(label).as_dict(integer)
 
 
 def transform_nested_dict_to_list(list_example) -> dict:
@@ -1,9 +1,12 @@
 # src\shared\utils\time_modification.py
 
 import calendar
+import re
 import time
 from datetime import datetime, timedelta, timezone
 
+from src.shared.utils.resampling import resampling
+
 
 def get_current_local_date_time():
     """ """
@@ -270,41 +273,36 @@ def check_alarm_clock(
     return False
 
 
+def get_time_frame_minutes(time_frame: str) -> int:
+    """
+    '5min', '15T', '1h', '60' -> 5, 15, 60, 60
+    """
+
+    matched = re.fullmatch(r"\s*(\d+)\s*(min|m|t|h)?\s*", str(time_frame), re.I)
+
+    if not matched:
+        raise ValueError(f"unsupported time frame {time_frame}")
+
+    minutes, unit = int(matched[1]), (matched[2] or "min").lower()
+
+    return minutes * 60 if unit == "h" else minutes
+
+
 def resampling_time_frame(
     ohlc_data: list,
     time_frame: str = "5min",
-):
+) -> list:
     """
-
-
     Args:
-        triggerHour (int)
-        triggerMinute (int)
+        ohlc_data (list): 1 minute candles, with their tick (ms)
+        time_frame (str): '5min', '15min', '1h' ...
 
     Returns:
-        str
+        list: candles of the time frame, oldest first
 
     Example:
-        data_original = 'hedgingSpot-open-1671189554374' become 'hedgingSpot'
-
-    Reference:
-        https://stackoverflow.com/questions/69350436/how-do-i-resample-to-5-min-correctly
-        https://neel-81024.medium.com/resampling-and-ohlc-in-d967cfafc657
-        https://stackoverflow.com/questions/70143660/pandas-ohlc-aggregation-resample-with-time-of-ohlc
-        https://stackoverflow.com/questions/36681945/group-dataframe-in-5-minute-intervals
-        https://stackoverflow.com/questions/36222928/pandas-ohlc-aggregation-on-ohlc-data
+        resampling_time_frame(ohlc1, "15min") gives the chart.trades.<>.15
+        candles of the same minutes
     """
-    import pandas as pd
-
-    df = pd.DataFrame(ohlc_data)
-    df.set_index(df["Datetime"], inplace=True)
-    d = {
-        "open": "first",
-        "high": "max",
-        "low": "min",
-        "close": "last",
-        "volume": "sum",
-    }
-    df.resample(time_frame, closed="right", label="right").agg(d)
 
-    return False
+    return resampling(ohlc_data, get_time_frame_minutes(time_frame))
@@ -0,0 +1,84 @@
+import pytest
+
+from benchmarks.harness import (
+    IMPROVEMENT,
+    NEW,
+    OK,
+    REGRESSION,
+    SKIPPED,
+    Benchmark,
+    comparing,
+    loading_baseline,
+    running_benchmark,
+    saving_baseline,
+)
+
+
+def test_comparing_against_the_baseline():
+    baseline = {
+        "slower": {"ops_per_second": 100.0},
+        "steady": {"ops_per_second": 100.0},
+        "faster": {"ops_per_second": 100.0},
+    }
+
+    current = {
+        "slower": {"ops_per_second": 85.0},
+        "steady": {"ops_per_second": 95.0},
+        "faster": {"ops_per_second": 150.0},
+        "added": {"ops_per_second": 1.0},
+        "offline": {"skipped": "redis unavailable"},
+    }
+
+    assert comparing(current, baseline, threshold=10) == {
+        "slower": (REGRESSION, -15.0),
+        "steady": (OK, -5.0),
+        "faster": (IMPROVEMENT, 50.0),
+        "added": (NEW, None),
+        "offline": (SKIPPED, None),
+    }
+
+
+@pytest.mark.asyncio
+async def test_running_a_benchmark_and_saving_its_baseline(tmp_path):
+    calls = []
+
+    async def factory():
+        def running():
+            calls.append("run")
+            return 1000
+
+        return running, lambda: calls.append("clean")
+
+    result = await running_benchmark(Benchmark("noop", factory, repeat=3))
+
+    assert calls == ["run"] * 4 + ["clean"]
+    assert result["min"] <= result["ops_per_second"] <= result["max"]
+    assert result["best"] == result["max"]
+    assert result["relative"] > 0
+
+    path = str(tmp_path / "baseline.json")
+
+    saving_baseline({"noop": result, "offline": {"skipped": "no redis"}}, path)
+    saving_baseline({"other": result}, path)
+
+    assert set(loading_baseline(path)["results"]) == {"noop", "other"}
+
+
+def test_comparing_the_calibrated_medians():
+    # the machine ran slower overall, the calibrated rates did not move
+    baseline = {"noisy": {"relative": 0.5, "ops_per_second": 90.0}}
+    current = {"noisy": {"relative": 0.49, "ops_per_second": 60.0}}
+
+    assert comparing(current, baseline, threshold=10) == {"noisy": (OK, -2.0)}
+
+    # the threshold is the gate, whatever the spread of the rounds
+    current = {"noisy": {"relative": 0.35, "ops_per_second": 90.0}}
+
+    assert comparing(current, baseline, threshold=10) == {
+        "noisy": (REGRESSION, -30.0)
+    }
+
+    # baselines saved before the rounds were calibrated
+    assert comparing(current, {"noisy": {"ops_per_second": 100.0}}, 10) == {
+        "noisy": (OK, -10.0)
+    }
@@ -0,0 +1,63 @@
+import pytest
+
+from core.db import codecs
+from core.db.redis import CustomRedisClient
+
+PAYLOAD = {
+    "instrument_name": "BTC-PERPETUAL",
+    "best_bid_price": 60_000.5,
+    "stats": {"volume": 1.25, "high": None},
+    "timestamp": 1_700_000_000_000,
+    "trades": [1, "a", True],
+}
+
+
+def test_json_stays_readable_by_older_consumers():
+    sealed = codecs.sealing(PAYLOAD, codecs.JSON)
+
+    assert sealed.startswith(b"{")
+    assert codecs.unsealing(sealed) == PAYLOAD
+    assert codecs.unsealing(sealed.decode()) == PAYLOAD
+
+
+def test_stream_entry_names_its_codec():
+    encoded = CustomRedisClient.encode_stream_message(
+        dict(channel="ticker.BTC-PERPETUAL", data=PAYLOAD, timestamp=1),
+        codecs.JSON,
+    )
+
+    assert encoded["codec"] == codecs.JSON
+
+    parsed = CustomRedisClient.parse_stream_message(
+        {
+            key.encode(): value if isinstance(value, bytes) else value.encode()
+            for key, value in encoded.items()
+        }
+    )
+
+    assert parsed == dict(channel="ticker.BTC-PERPETUAL", data=PAYLOAD, timestamp="1")
+
+    # entries written before the codec field
+    legacy = CustomRedisClient.parse_stream_message(
+        {b"channel": b"x", b"data": b'{"a": 1}'}
+    )
+
+    assert legacy == dict(channel="x", data={"a": 1})
+
+
+def test_msgpack_and_zstd(monkeypatch):
+    pytest.importorskip("msgpack")
+
+    sealed = codecs.sealing(PAYLOAD, codecs.MSGPACK)
+
+    assert sealed[:1] == codecs.MAGIC
+    assert codecs.unsealing(sealed) == PAYLOAD
+
+    pytest.importorskip("zstandard")
+    monkeypatch.setattr(codecs, "COMPRESS_MIN_BYTES", 1)
+
+    codec, payload = codecs.encoding(PAYLOAD, codecs.MSGPACK)
+
+    assert codec == "msgpack+zstd"
+    assert codecs.decoding(payload, codec) == PAYLOAD
+    assert codecs.unsealing(codecs.sealing(PAYLOAD, codecs.MSGPACK)) == PAYLOAD
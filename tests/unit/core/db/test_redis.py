@@ -0,0 +1,248 @@
+import time
+
+import pytest
+
+import redis
+
+from core.db.redis import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CustomRedisClient,
+)
+
+
+class Pipeline:
+    def __init__(self, pool):
+        self.pool = pool
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def execute(self):
+        self.pool.round_trips += 1
+        return [
+            await getattr(self.pool, name)(*args, counted=False, **kwargs)
+            for name, args, kwargs in self.commands
+        ]
+
+
+class Pool:
+    """the hash commands of redis.asyncio.Redis, in memory"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.round_trips = 0
+
+    def counting(self, counted):
+        self.round_trips += counted
+
+    async def hset(self, key, mapping, counted=True):
+        self.counting(counted)
+        self.hashes.setdefault(key, {}).update(
+            {field.encode(): value for field, value in mapping.items()}
+        )
+
+    async def hmget(self, key, fields, counted=True):
+        self.counting(counted)
+        return [self.hashes.get(key, {}).get(o.encode()) for o in fields]
+
+    async def hgetall(self, key, counted=True):
+        self.counting(counted)
+        return dict(self.hashes.get(key, {}))
+
+    def pipeline(self, transaction=False):
+        return Pipeline(self)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = CustomRedisClient()
+    pool = Pool()
+
+    async def get_pool():
+        return pool
+
+    monkeypatch.setattr(client, "get_pool", get_pool)
+    monkeypatch.setattr(client, "_versions", {})
+    monkeypatch.setattr(client, "breaker", CircuitBreaker())
+
+    return client
+
+
+@pytest.mark.asyncio
+async def test_put_many_skips_stale_versions(client):
+    pool = await client.get_pool()
+
+    tickers = {
+        "BTC-PERPETUAL": {"mark_price": 60_000.0, "timestamp": 2},
+        "ETH-PERPETUAL": {"mark_price": 3_000.0, "timestamp": 2},
+    }
+
+    assert await client.put_many("market:ticker", tickers, {"BTC-PERPETUAL": 2}) == 2
+
+    written = await client.put_many(
+        "market:ticker",
+        {
+            "BTC-PERPETUAL": {"mark_price": 59_000.0, "timestamp": 1},
+            "ETH-PERPETUAL": {"mark_price": 3_100.0, "timestamp": 3},
+        },
+        {"BTC-PERPETUAL": 1, "ETH-PERPETUAL": 3},
+    )
+
+    assert written == 1
+    assert pool.round_trips == 2
+
+    snapshots = await client.get_many("market:ticker", ["BTC-PERPETUAL", "SOL"])
+
+    assert snapshots == {"BTC-PERPETUAL": tickers["BTC-PERPETUAL"], "SOL": None}
+    assert (await client.get_many("market:ticker"))["ETH-PERPETUAL"]["timestamp"] == 3
+
+
+@pytest.mark.asyncio
+async def test_get_many_keys_is_one_round_trip(client):
+    pool = await client.get_pool()
+
+    await client.put_many("market:ticker", {"BTC-PERPETUAL": {"mark_price": 1.0}})
+    await client.put_many("account:portfolio", {"btc": {"equity": 2.0}})
+
+    pool.round_trips = 0
+
+    snapshots = await client.get_many_keys(
+        {"market:ticker": ["BTC-PERPETUAL"], "account:portfolio": None}
+    )
+
+    assert snapshots == {
+        "market:ticker": {"BTC-PERPETUAL": {"mark_price": 1.0}},
+        "account:portfolio": {"btc": {"equity": 2.0}},
+    }
+    assert pool.round_trips == 1
+
+
+def test_breaker_opens_then_recovers_through_half_open():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0)
+
+    breaker.recording_failure()
+    assert breaker.state == CLOSED
+
+    breaker.recording_failure()
+    assert breaker.state == OPEN
+
+    # cooldown over: one command is let through
+    assert breaker.allowing()
+    assert breaker.state == HALF_OPEN
+
+    breaker.recording_failure()
+    assert breaker.state == OPEN
+
+    assert breaker.allowing()
+    breaker.recording_success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+
+
+def test_open_breaker_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+
+    breaker.recording_failure()
+
+    assert not breaker.allowing()
+    assert breaker.state == OPEN
+
+
+@pytest.mark.asyncio
+async def test_connection_failure_drops_the_pool(monkeypatch):
+    client = CustomRedisClient()
+
+    class Dead(Pool):
+        async def hgetall(self, key, counted=True):
+            raise redis.exceptions.ConnectionError("reset by peer")
+
+    pool = Dead()
+
+    async def get_pool():
+        client.pool = pool
+        return pool
+
+    monkeypatch.setattr(client, "get_pool", get_pool)
+    monkeypatch.setattr(client, "pool", None)
+    monkeypatch.setattr(client, "breaker", CircuitBreaker(failure_threshold=1))
+
+    with pytest.raises(redis.exceptions.ConnectionError):
+        await client.get_many("market:ticker")
+
+    assert client.pool is None
+    assert client.breaker.state == OPEN
+
+
+@pytest.mark.asyncio
+async def test_commands_take_a_single_round_trip(client):
+    pool = await client.get_pool()
+
+    await client.put_many("market:ticker", {"BTC-PERPETUAL": {"mark_price": 1.0}})
+    await client.get_many("market:ticker")
+
+    # no PING ahead of the commands
+    assert pool.round_trips == 2
+    assert client.breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_breaker_half_opens_under_constant_writes(monkeypatch):
+    client = CustomRedisClient()
+
+    class Stream(Pool):
+        down = True
+        entries = 0
+
+        async def xadd(self, name, fields, counted=True, **kwargs):
+            if self.down:
+                raise redis.exceptions.ConnectionError("connection refused")
+            self.entries += 1
+
+    pool = Stream()
+
+    async def get_pool():
+        if not client.breaker.allowing():
+            raise ConnectionError("Redis circuit breaker open")
+        return pool
+
+    async def sleep(delay):
+        pass
+
+    monkeypatch.setattr(client, "get_pool", get_pool)
+    monkeypatch.setattr(client, "pool", None)
+    monkeypatch.setattr(client, "breaker", CircuitBreaker(2, cooldown=0.05))
+    monkeypatch.setattr("core.db.redis.asyncio.sleep", sleep)
+
+    messages = [{"channel": "chart.trades.BTC-PERPETUAL.1", "data": {"tick": 1}}]
+
+    with pytest.raises(ConnectionError):
+        await client.xadd_bulk("stream:market_data", messages)
+
+    opened_at = client.breaker.opened_at
+
+    # the writes failing fast neither count nor push the cooldown back
+    for _ in range(5):
+        with pytest.raises(ConnectionError):
+            await client.xadd_bulk("stream:market_data", messages)
+
+    assert client.breaker.state == OPEN
+    assert client.breaker.failures == 2
+    assert client.breaker.opened_at == opened_at
+
+    pool.down = False
+    time.sleep(0.06)
+
+    await client.xadd_bulk("stream:market_data", messages)
+
+    assert pool.entries == 1
+    assert client.breaker.state == CLOSED
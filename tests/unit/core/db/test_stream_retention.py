@@ -0,0 +1,68 @@
+import pytest
+
+from core.db.stream_retention import StreamRetention, computing_minid
+
+MINUTE = 60_000
+
+
+class Pool:
+    """a stream and its consumer groups, as redis.asyncio.Redis sees them"""
+
+    def __init__(self, ids, groups):
+        self.ids = ids
+        self.groups = groups
+
+    async def xinfo_groups(self, stream):
+        return [
+            {
+                "name": name,
+                "pending": len(group["pending"]),
+                "last-delivered-id": group["last_delivered"],
+                "lag": 0,
+            }
+            for name, group in self.groups.items()
+        ]
+
+    async def xpending(self, stream, name):
+        return {"min": min(self.groups[name]["pending"])}
+
+    async def xtrim(self, stream, minid, approximate):
+        minid = tuple(int(o) for o in minid.split("-"))
+        kept = [o for o in self.ids if tuple(map(int, o.split("-"))) >= minid]
+        trimmed, self.ids = len(self.ids) - len(kept), kept
+        return trimmed
+
+
+def test_computing_minid():
+    window = (10 * MINUTE, 0)
+
+    assert computing_minid(window, []) == window
+    assert computing_minid(window, [((20 * MINUTE, 0), None)]) == window
+    assert computing_minid(window, [((2 * MINUTE, 5), None)]) == (2 * MINUTE, 6)
+    assert computing_minid(
+        window, [((20 * MINUTE, 0), (MINUTE, 1)), ((3 * MINUTE, 0), None)]
+    ) == (MINUTE, 1)
+
+
+@pytest.mark.asyncio
+async def test_unconsumed_entries_are_never_trimmed():
+    ids = [f"{o * MINUTE}-0" for o in range(1, 21)]
+
+    # the slow group still has minute 5 to acknowledge and never read past 8
+    pool = Pool(
+        list(ids),
+        {
+            "dispatcher_group": {"last_delivered": ids[-1], "pending": []},
+            "slow_group": {"last_delivered": ids[7], "pending": [ids[4]]},
+        },
+    )
+
+    retention = StreamRetention("stream:market_data", window_ms=5 * MINUTE)
+
+    assert await retention.trimming(pool, now=20 * MINUTE) == 4
+    assert pool.ids[0] == ids[4]
+
+    pool.groups["slow_group"] = {"last_delivered": ids[-1], "pending": []}
+
+    assert await retention.trimming(pool, now=20 * MINUTE) == 10
+    assert pool.ids[0] == f"{15 * MINUTE}-0"
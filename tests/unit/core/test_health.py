@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+import pytest
+
+from core import health
+
+
+class Writer:
+    def __init__(self):
+        self.written = b""
+        self.closed = False
+
+    def write(self, data):
+        self.written += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_idle_client_is_dropped(monkeypatch):
+    monkeypatch.setattr(health, "REQUEST_TIMEOUT", 0.01)
+
+    # nothing is ever sent on this connection
+    reader = asyncio.StreamReader()
+    writer = Writer()
+
+    await asyncio.wait_for(health.handling_request(reader, writer), 1)
+
+    assert writer.closed
+    assert not writer.written
+
+
+@pytest.mark.asyncio
+async def test_unknown_path_is_not_found():
+    reader = asyncio.StreamReader()
+    reader.feed_data(b"GET /nothing HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    writer = Writer()
+
+    await health.handling_request(reader, writer)
+
+    assert writer.written.startswith(b"HTTP/1.1 404 Not Found")
+
+
+@pytest.mark.asyncio
+async def test_process_stats_are_read_off_the_event_loop(monkeypatch):
+    threads = []
+    getting_process_stats = health.getting_process_stats
+
+    def getting_stats():
+        threads.append(threading.get_ident())
+        return getting_process_stats()
+
+    async def get_stream_stats():
+        raise ConnectionError
+
+    monkeypatch.setattr(health, "getting_process_stats", getting_stats)
+    monkeypatch.setattr(health, "get_stream_stats", get_stream_stats)
+
+    result = await health.health_check()
+
+    assert threads and threads[0] != threading.get_ident()
+    assert result["memory"]["rss_mb"] > 0
+    assert result["connections"]["threads"] >= 1
@@ -0,0 +1,54 @@
+from core.latency import (
+    HANDLER_START,
+    WS_RECEIVE,
+    XADD,
+    HdrHistogram,
+    LatencyTracer,
+    loading_trace,
+)
+
+
+def test_histogram_percentiles_within_relative_error():
+    histogram = HdrHistogram()
+
+    for value in range(1, 10_001):
+        histogram.recording(value)
+
+    assert histogram.count == 10_000
+    assert histogram.min == 1
+    assert histogram.max == 10_000
+
+    for percentile, expected in ((50, 5_000), (99, 9_900)):
+        assert abs(histogram.percentile(percentile) - expected) / expected < 0.02
+
+
+def test_histogram_small_values_are_exact():
+    histogram = HdrHistogram()
+
+    for value in (3, 3, 7):
+        histogram.recording(value)
+
+    assert histogram.percentile(50) == 3
+    assert histogram.percentile(100) == 7
+
+
+def test_trace_records_stage_and_end_to_end_latency():
+    tracer = LatencyTracer()
+
+    trace = tracer.starting(WS_RECEIVE, at=1_000_000)
+    tracer.stamping(trace, XADD, at=3_000_000)
+    tracer.stamping(trace, HANDLER_START, at=4_000_000)
+
+    stats = tracer.stats()
+
+    assert stats["stages"][HANDLER_START]["max"] >= 1_000
+    assert stats["end_to_end"][HANDLER_START]["max"] >= 3_000
+    assert set(trace) == {WS_RECEIVE, XADD, HANDLER_START}
+
+
+def test_missing_trace_is_ignored():
+    tracer = LatencyTracer()
+
+    assert loading_trace(None) == {}
+    assert loading_trace(b'{"ws_receive": 1}') == {"ws_receive": 1}
+    assert tracer.stamping({}, XADD) == {}
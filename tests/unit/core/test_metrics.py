@@ -0,0 +1,54 @@
+import pytest
+
+from core.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    # a fresh instance, the process registry is left untouched
+    monkeypatch.setattr(MetricsRegistry, "_instance", None)
+    return MetricsRegistry()
+
+
+def test_rendering_prometheus_text(registry):
+
+    messages = registry.counter("test_messages_total", "messages", ("channel",))
+    messages.labels("ticker").increment()
+    messages.labels("ticker").increment(2)
+    messages.labels('odd"channel').increment()
+
+    durations = registry.histogram("test_duration_microseconds", "durations")
+    for value in (10, 20, 30):
+        durations.labels().recording(value)
+
+    text = registry.rendering()
+
+    assert "# TYPE test_messages_total counter" in text
+    assert 'test_messages_total{channel="ticker"} 3' in text
+    assert 'test_messages_total{channel="odd\\"channel"} 1' in text
+    assert '# TYPE test_duration_microseconds summary' in text
+    assert 'test_duration_microseconds{quantile="0.5"} 20' in text
+    assert "test_duration_microseconds_sum 60" in text
+    assert "test_duration_microseconds_count 3" in text
+
+
+def test_registering_twice_returns_the_same_metric(registry):
+    assert registry.gauge("test_gauge") is registry.gauge("test_gauge")
+
+
+@pytest.mark.asyncio
+async def test_failing_collector_does_not_break_the_scrape(registry):
+    gauge = registry.gauge("test_collected")
+
+    async def failing():
+        raise ConnectionError
+
+    async def collecting():
+        gauge.labels().setting(7)
+
+    registry.adding_collector(failing)
+    registry.adding_collector(collecting)
+
+    await registry.collecting()
+
+    assert "test_collected 7" in registry.rendering()
@@ -0,0 +1,102 @@
+import asyncio
+import collections
+import os
+import time
+
+import pytest
+
+from core.profiling import (
+    COLLAPSED,
+    rendering_collapsed,
+    rendering_speedscope,
+    runtime_profiler,
+)
+
+
+def spinning(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def test_rendering_collapsed_and_speedscope():
+    outer = ("main", "app.py", 1)
+    inner = ("handler", "app.py", 10)
+
+    samples = collections.Counter({(outer, inner): 3, (outer,): 1})
+
+    assert rendering_collapsed(samples) == (
+        "main (app.py:1);handler (app.py:10) 3\nmain (app.py:1) 1\n"
+    )
+
+    document = rendering_speedscope(samples, 0.01, "test")
+    profile = document["profiles"][0]
+
+    assert [o["name"] for o in document["shared"]["frames"]] == ["main", "handler"]
+    assert profile["samples"] == [[0, 1], [0]]
+    assert profile["weights"] == [0.03, 0.01]
+    assert profile["endValue"] == pytest.approx(0.04)
+
+
+@pytest.mark.asyncio
+async def test_profile_command_samples_the_loop_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(runtime_profiler, "directory", str(tmp_path))
+    monkeypatch.setattr(runtime_profiler, "loop_thread_id", None)
+
+    task = asyncio.create_task(
+        runtime_profiler.handling_command(
+            {"command": "profile", "seconds": 0.3, "format": COLLAPSED}
+        )
+    )
+
+    await asyncio.sleep(0.05)
+    spinning(0.2)
+
+    reply = await task
+
+    assert reply["command"] == "profile"
+    assert os.path.dirname(reply["path"]) == str(tmp_path)
+
+    with open(reply["path"]) as f:
+        assert "spinning (" in f.read()
+
+
+@pytest.mark.asyncio
+async def test_tracemalloc_command_and_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(runtime_profiler, "directory", str(tmp_path))
+
+    task = asyncio.create_task(
+        runtime_profiler.handling_command({"command": "tracemalloc", "seconds": 0.1})
+    )
+
+    await asyncio.sleep(0)
+
+    busy = await runtime_profiler.handling_command({"command": "tracemalloc"})
+    unknown = await runtime_profiler.handling_command({"command": "reboot"})
+    bad_format = await runtime_profiler.handling_command(
+        {"command": "profile", "seconds": 0, "format": "pprof"}
+    )
+
+    reply = await task
+
+    assert busy["error"] == "tracemalloc already running"
+    assert unknown["error"] == "unknown command reboot"
+    assert "pprof" in bad_format["error"]
+
+    with open(reply["path"]) as f:
+        assert f.read().startswith("total traced:")
+
+    assert not runtime_profiler.running
+
+
+@pytest.mark.asyncio
+async def test_malformed_arguments_get_an_error_reply():
+    for seconds in ("x", None):
+        reply = await runtime_profiler.handling_command(
+            dict(command="profile", seconds=seconds, request_id=1)
+        )
+
+        assert reply["request_id"] == 1
+        assert reply["error"].startswith("invalid arguments")
+
+    assert not runtime_profiler.running
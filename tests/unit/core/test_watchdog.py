@@ -0,0 +1,30 @@
+import asyncio
+import time
+
+import pytest
+
+from core.watchdog import loop_watchdog, slow_callbacks
+
+
+def blocking_call():
+    time.sleep(0.4)
+
+
+@pytest.mark.asyncio
+async def test_blocked_loop_is_reported_with_its_stack():
+    loop_watchdog.starting(interval=0.02, threshold=0.1)
+
+    try:
+        await asyncio.sleep(0.05)
+
+        blocking_call()
+
+        await asyncio.sleep(0.2)
+
+    finally:
+        loop_watchdog.stopping()
+
+    locations = [o[0] for o in slow_callbacks.children]
+
+    assert any("blocking_call" in o for o in locations)
+    assert sum(o.value for o in slow_callbacks.children.values()) == 1
@@ -0,0 +1,155 @@
+import math
+
+import orjson
+import pytest
+
+from src.scripts.deribit.backtesting.backtester import (
+    Backtester,
+    expanding_grid,
+    sweeping,
+)
+from src.scripts.deribit.backtesting.events import (
+    CANDLE,
+    TICKER,
+    building_ohlc_events,
+    merging,
+    parsing_frame,
+)
+
+HEDGING_SPOT = dict(
+    strategy_label="hedgingSpot",
+    is_active=True,
+    contribute_to_hedging=True,
+    non_checked_for_size_label_consistency=False,
+    side="sell",
+    weighted_factor=dict(minimum=1, medium=5, extreme=10, flash_crash=20),
+    waiting_minute_before_cancel=3,
+)
+
+INSTRUMENTS = [
+    dict(
+        instrument_name="BTC-PERPETUAL",
+        min_trade_amount=10,
+        tick_size=0.5,
+        expiration_timestamp=32_503_680_000_000,
+    )
+]
+
+
+def get_candles(qty):
+    """an oscillating price, in 5 minutes candles"""
+
+    candles = []
+
+    for i in range(qty):
+        open, close = (60_000 + 500 * math.sin(o / 5) for o in (i, i + 1))
+        candles.append(
+            dict(
+                tick=1_700_000_000_000 + i * 300_000,
+                open=open,
+                high=max(open, close) + 5,
+                low=min(open, close) - 5,
+                close=close,
+            )
+        )
+
+    return candles
+
+
+def test_incremental_tickers_are_merged():
+    tickers = {}
+
+    def frame(channel, data):
+        return orjson.dumps(
+            dict(method="subscription", params=dict(channel=channel, data=data))
+        ).decode()
+
+    parsing_frame(
+        1,
+        frame(
+            "incremental_ticker.BTC-PERPETUAL",
+            dict(instrument_name="BTC-PERPETUAL", best_bid_price=1, best_ask_price=2),
+        ),
+        tickers,
+    )
+    event = parsing_frame(
+        2,
+        frame(
+            "incremental_ticker.BTC-PERPETUAL",
+            dict(instrument_name="BTC-PERPETUAL", best_ask_price=3),
+        ),
+        tickers,
+    )
+
+    assert event.kind == TICKER
+    assert event.data["best_bid_price"] == 1 and event.data["best_ask_price"] == 3
+
+    event = parsing_frame(
+        3, frame("chart.trades.BTC-PERPETUAL.5", dict(tick=0, close=1)), tickers
+    )
+
+    assert (event.kind, event.instrument_name, event.resolution) == (
+        CANDLE,
+        "BTC-PERPETUAL",
+        5,
+    )
+    assert parsing_frame(4, '{"id": 1, "result": []}', tickers) is None
+
+
+@pytest.mark.asyncio
+async def test_hedging_spot_hedges_up_to_the_notional():
+    events = merging(building_ohlc_events("BTC-PERPETUAL", 5, get_candles(300)))
+
+    result = await Backtester("hedgingSpot", HEDGING_SPOT, INSTRUMENTS).running(events)
+
+    assert result["filled"] > 0
+    assert result["decisions"] == 300
+
+    # short, never past the 1 BTC of equity
+    assert -62_000 < result["positions"]["BTC-PERPETUAL"] < 0
+
+
+def test_grid_overrides_nested_parameters():
+    grid = expanding_grid(
+        HEDGING_SPOT,
+        {"weighted_factor.medium": [3, 8], "waiting_minute_before_cancel": [1]},
+    )
+
+    assert [o for o, _ in grid] == [
+        {"weighted_factor.medium": 3, "waiting_minute_before_cancel": 1},
+        {"weighted_factor.medium": 8, "waiting_minute_before_cancel": 1},
+    ]
+    assert grid[1][1]["weighted_factor"]["medium"] == 8
+    assert HEDGING_SPOT["weighted_factor"]["medium"] == 5
+
+
+def test_sweep_runs_every_parameter_set(tmp_path):
+    source = tmp_path / "ohlc.json"
+    source.write_bytes(
+        orjson.dumps(
+            dict(
+                instruments=INSTRUMENTS,
+                ohlc=[
+                    dict(
+                        instrument_name="BTC-PERPETUAL",
+                        resolution=5,
+                        candles=get_candles(100),
+                    )
+                ],
+            )
+        )
+    )
+
+    results = sweeping(
+        str(source),
+        [HEDGING_SPOT],
+        "hedgingSpot",
+        {"waiting_minute_before_cancel": [1, 10]},
+        processes=2,
+    )
+
+    assert sorted(o["overrides"]["waiting_minute_before_cancel"] for o in results) == [
+        1,
+        10,
+    ]
+    assert results[0]["pnl"] >= results[1]["pnl"]
@@ -0,0 +1,103 @@
+import pytest
+
+from src.scripts.deribit.backtesting.simulated_exchange import (
+    SimulatedExchange,
+    get_combo_legs,
+)
+
+
+def ticker(bid, ask, instrument_name="BTC-PERPETUAL"):
+    return dict(
+        instrument_name=instrument_name,
+        best_bid_price=bid,
+        best_ask_price=ask,
+        mark_price=(bid + ask) / 2,
+    )
+
+
+def test_resting_orders_fill_when_the_book_reaches_them():
+    exchange = SimulatedExchange(equity=1.0)
+
+    order = exchange.placing(
+        dict(
+            instrument_name="BTC-PERPETUAL",
+            label="hedgingSpot-open-1",
+            side="sell",
+            size=100,
+            entry_price=50_000,
+        ),
+        server_time=1_000,
+    )
+
+    # labels are numbered from the simulated time
+    assert order["label"] == "hedgingSpot-open-1000"
+    assert order["amount"] == -100
+
+    assert exchange.matching(ticker(49_990, 50_010), 2_000) == []
+    assert exchange.matching(ticker(50_000, 50_010), 3_000) == [order]
+
+    assert exchange.orders == []
+    assert exchange.positions["BTC-PERPETUAL"] == -100
+
+    exchange.matching(ticker(39_990, 40_010), 4_000)
+
+    # short 100 usd from 50k, marked at 40k
+    assert exchange.computing_pnl() == pytest.approx(100 / 40_000 - 100 / 50_000)
+
+
+def test_netted_labels_move_to_the_archive():
+    exchange = SimulatedExchange(equity=1.0)
+
+    exchange.tickers["BTC-PERPETUAL"] = ticker(50_000, 50_010)
+
+    opening = exchange.placing(
+        dict(
+            instrument_name="BTC-PERPETUAL",
+            label="hedgingSpot-open-1",
+            side="sell",
+            size=100,
+            entry_price=50_000,
+        ),
+        1_000,
+    )
+    exchange.matching(ticker(50_000, 50_010), 1_000)
+
+    exchange.placing(
+        dict(
+            instrument_name="BTC-PERPETUAL",
+            label=opening["label"].replace("open", "closed"),
+            side="buy",
+            size=100,
+            entry_price=49_000,
+        ),
+        2_000,
+    )
+    exchange.matching(ticker(48_990, 49_000), 2_000)
+
+    assert exchange.trades == []
+    assert len(exchange.archive) == 2
+    assert exchange.computing_pnl() == pytest.approx(100 / 49_000 - 100 / 50_000)
+
+
+def test_combo_fills_as_its_two_legs():
+    exchange = SimulatedExchange(equity=1.0)
+
+    exchange.matching(ticker(50_000, 50_000), 1_000)
+
+    exchange.placing(
+        dict(
+            instrument_name="BTC-FS-27DEC24_PERP",
+            label="comboAutoAuto-open-1",
+            side="sell",
+            size=100,
+            entry_price=500,
+        ),
+        1_000,
+    )
+    exchange.matching(ticker(500, 505, "BTC-FS-27DEC24_PERP"), 2_000)
+
+    assert get_combo_legs("BTC-FS-27DEC24_PERP") == ("BTC-27DEC24", "BTC-PERPETUAL")
+    assert [(o["instrument_name"], o["amount"], o["price"]) for o in exchange.trades] == [
+        ("BTC-27DEC24", -100, 50_500),
+        ("BTC-PERPETUAL", 100, 50_000),
+    ]
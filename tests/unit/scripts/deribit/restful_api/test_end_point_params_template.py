@@ -0,0 +1,35 @@
+import pytest
+
+from src.scripts.deribit.restful_api.end_point_params_template import (
+    SendApiRequest,
+)
+
+
+@pytest.mark.asyncio
+async def test_user_trades_are_paged_while_has_more(monkeypatch):
+    trades = [
+        dict(trade_id=f"ETH-{i}", timestamp=1_000 + i // 2, label=None)
+        for i in range(7)
+    ]
+    requests = []
+
+    async def requesting(self, endpoint, params):
+        requests.append(params["start_timestamp"])
+        page = [o for o in trades if o["timestamp"] >= params["start_timestamp"]]
+        return dict(
+            result=dict(
+                trades=page[: params["count"]],
+                has_more=len(page) > params["count"],
+            )
+        )
+
+    monkeypatch.setattr(SendApiRequest, "requesting", requesting)
+
+    api_request = SendApiRequest("id", "secret")
+
+    result = await api_request.get_user_trades_by_instrument_and_time(
+        "ETH-PERPETUAL", 1_000, False, 3
+    )
+
+    assert sorted(o["trade_id"] for o in result) == [o["trade_id"] for o in trades]
+    assert requests == [1_000, 1_001, 1_002]
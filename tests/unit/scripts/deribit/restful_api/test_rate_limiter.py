@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from src.scripts.deribit.restful_api import rate_limiter
+
+
+def test_classifying_endpoint():
+    assert rate_limiter.classifying_endpoint("private/cancel") == (
+        rate_limiter.MATCHING_ENGINE,
+        rate_limiter.CANCEL,
+    )
+    assert rate_limiter.classifying_endpoint("private/buy") == (
+        rate_limiter.MATCHING_ENGINE,
+        rate_limiter.ORDER,
+    )
+    assert rate_limiter.classifying_endpoint("private/get_transaction_log") == (
+        rate_limiter.NON_MATCHING_ENGINE,
+        rate_limiter.READ,
+    )
+
+
+@pytest.mark.asyncio
+async def test_cancel_jumps_the_queue(monkeypatch):
+    scheduler = rate_limiter.credit_scheduler
+    bucket = rate_limiter.TokenBucket(capacity=1, refill_per_second=100, cost=1)
+    bucket.credits = 0
+    monkeypatch.setitem(
+        scheduler.pools,
+        rate_limiter.MATCHING_ENGINE,
+        rate_limiter.PoolQueue(bucket),
+    )
+
+    served = []
+
+    async def sending(endpoint):
+        await scheduler.acquiring(endpoint)
+        served.append(endpoint)
+
+    await asyncio.gather(
+        sending("private/buy"),
+        sending("private/sell"),
+        sending("private/cancel"),
+    )
+
+    assert served[0] == "private/cancel"
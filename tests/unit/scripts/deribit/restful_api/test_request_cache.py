@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from src.scripts.deribit.restful_api.request_cache import RequestCache, building_key
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    # a fresh instance, the process singleton is left untouched
+    monkeypatch.setattr(RequestCache, "_instance", None)
+    return RequestCache()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_share_one_call(cache):
+    calls = []
+
+    async def fetching():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"result": []}
+
+    endpoint = "private/get_subaccounts_details"
+    key = building_key("id", endpoint, {"currency": "BTC"})
+
+    results = await asyncio.gather(
+        *[cache.getting(endpoint, key, fetching) for _ in range(5)]
+    )
+
+    assert len(calls) == 1
+    assert all(o == {"result": []} for o in results)
+
+    await cache.getting(endpoint, key, fetching)
+    assert len(calls) == 1
+
+    cache.invalidating()
+    await cache.getting(endpoint, key, fetching)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_writes_are_never_cached(cache):
+    calls = []
+
+    async def fetching():
+        calls.append(1)
+
+    for _ in range(2):
+        await cache.getting("private/buy", building_key("private/buy"), fetching)
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_waiters_survive_a_cancelled_leader(cache):
+    calls = []
+
+    async def fetching():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"result": len(calls)}
+
+    endpoint = "private/get_open_orders"
+    key = building_key("id", endpoint)
+
+    leader = asyncio.create_task(cache.getting(endpoint, key, fetching))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.getting(endpoint, key, fetching))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+
+    assert await asyncio.wait_for(waiter, 1) == {"result": 2}
+    assert not cache.in_flight
+
+
+@pytest.mark.asyncio
+async def test_read_in_flight_during_an_invalidation_is_not_kept(cache):
+    calls = []
+
+    async def fetching():
+        call = asyncio.Event()
+        calls.append(call)
+        result = {"result": len(calls)}
+        await call.wait()
+        return result
+
+    endpoint = "private/get_open_orders"
+    key = building_key("id", endpoint)
+
+    stale = asyncio.create_task(cache.getting(endpoint, key, fetching))
+    await asyncio.sleep(0)
+
+    # an order was placed while the read was in flight: the next read does
+    # not join it
+    cache.invalidating()
+
+    fresh = asyncio.create_task(cache.getting(endpoint, key, fetching))
+    await asyncio.sleep(0)
+    assert len(calls) == 2
+
+    calls[1].set()
+    assert await fresh == {"result": 2}
+
+    # the stale read completes last, it is returned but not kept
+    calls[0].set()
+    assert await stale == {"result": 1}
+
+    assert cache.cached[key][2] == {"result": 2}
+    assert not cache.in_flight
@@ -0,0 +1,111 @@
+import itertools
+
+import numpy as np
+
+from src.scripts.deribit.strategies.hedging import hedging_spot, sizing_surface
+
+FLAGS = (
+    "strong_bullish",
+    "bullish",
+    "weak_bullish",
+    "strong_bearish",
+    "bearish",
+    "weak_bearish",
+)
+
+# every combination of the flags read by the sizing functions
+MARKET_CONDITIONS = [
+    dict(zip(FLAGS, flags), neutral=not any(flags))
+    for flags in itertools.product((False, True), repeat=6)
+]
+
+
+def test_batched_functions_match_the_scalar_ones():
+    rng = np.random.default_rng(7)
+
+    notionals = np.concatenate([rng.uniform(-2e6, 2e6, 30), [0.0, 5.0, -5.0]])
+    sums = np.concatenate([rng.uniform(-2e6, 2e6, 20), [0.0, 1.0]])
+    thresholds = [0, 1, 3, 180_000.0]
+    min_trade_amounts = [1, 10, 0.5]
+
+    for condition in MARKET_CONDITIONS:
+
+        multiply_factor = sizing_surface.size_multiply_factor(
+            *(condition[k] for k in FLAGS)
+        )
+
+        assert multiply_factor == hedging_spot.size_multiply_factor(condition)
+
+        batched = sizing_surface.size_to_be_hedged(
+            notionals[:, None], sums[None, :], sums[None, :] > 0, multiply_factor
+        )
+
+        for i, notional in enumerate(notionals):
+            for j, sum_trades in enumerate(sums):
+                assert batched[i, j] == hedging_spot.size_to_be_hedged(
+                    notional, sum_trades, sum_trades > 0, condition
+                )
+
+        for threshold in thresholds:
+            assert sizing_surface.get_timing_factor(
+                condition["strong_bearish"], condition["bearish"], threshold
+            ) == hedging_spot.get_timing_factor(
+                condition["strong_bearish"], condition["bearish"], threshold
+            )
+
+        for medium, extreme in ((5, 10), (3, 20)):
+            assert sizing_surface.get_waiting_time_factor(
+                medium, extreme, condition["strong_bearish"], condition["bearish"]
+            ) == hedging_spot.get_waiting_time_factor(
+                dict(medium=medium, extreme=extreme),
+                condition["strong_bearish"],
+                condition["bearish"],
+            )
+
+    for min_trade_amount, side in itertools.product(min_trade_amounts, ("sell", "buy")):
+
+        futures_instruments = [
+            dict(instrument_name="BTC-PERPETUAL", min_trade_amount=min_trade_amount)
+        ]
+
+        for factor in (0.01, 0.05, 0.1):
+
+            batched = sizing_surface.determine_opening_size(
+                min_trade_amount, side, notionals, factor
+            )
+
+            assert list(batched) == [
+                hedging_spot.determine_opening_size(
+                    "BTC-PERPETUAL", futures_instruments, side, o, factor
+                )
+                for o in notionals
+            ]
+
+
+def test_surface_covers_the_whole_grid():
+    surface = sizing_surface.sweeping(
+        notional=[10_000, 100_000],
+        sum_my_trades_currency_strategy=[-50_000, 0, 5_000],
+        market_conditions=[dict(neutral=True), dict(bearish=True, weak_bearish=True)],
+        weighted_factor_medium=[3, 5],
+        waiting_minute_before_cancel=[1, 3],
+    )
+
+    assert surface["opening_size"].shape == (2, 3, 2, 2, 1, 2, 1)
+
+    # 100k notional, nothing traded yet, bearish, medium factor 5
+    condition = dict.fromkeys(FLAGS, False)
+    condition.update(weak_bearish=True, bearish=True)
+    max_position = hedging_spot.size_to_be_hedged(-100_000, 0, False, condition)
+
+    assert surface["max_position"][1, 1, 1, 1, 0, 0, 0] == max_position
+    assert surface["opening_size"][1, 1, 1, 1, 0, 0, 0] == (
+        hedging_spot.determine_opening_size(
+            "BTC-PERPETUAL",
+            [dict(instrument_name="BTC-PERPETUAL", min_trade_amount=10)],
+            "sell",
+            max_position,
+            5 / 100,
+        )
+    )
+    assert surface["timing_factor"][0, 0, 0, 0, 0, 1, 0] == 3
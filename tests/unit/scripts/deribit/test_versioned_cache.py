@@ -0,0 +1,121 @@
+import pytest
+
+from core.db import codecs
+from src.scripts.deribit import versioned_cache
+
+
+def test_delta_only_carries_changes():
+    publisher = versioned_cache.VersionedPublisher("sub_account")
+    subscriber = versioned_cache.VersionedSubscriber("sub_account")
+
+    orders = [{"order_id": "1", "amount": 1}, {"order_id": "2", "amount": 2}]
+    snapshot = publisher.building_message(dict(open_orders=orders))
+    assert snapshot["kind"] == "snapshot"
+    assert subscriber.applying(snapshot)
+
+    orders = [{"order_id": "2", "amount": 3}, {"order_id": "3", "amount": 1}]
+    delta = publisher.building_message(dict(open_orders=orders))
+    assert delta["kind"] == "delta"
+    assert delta["sections"]["open_orders"] == dict(
+        upserted=orders,
+        removed=["1"],
+    )
+    assert subscriber.applying(delta)
+    assert subscriber.view() == dict(open_orders=orders)
+
+
+def test_gap_is_detected():
+    publisher = versioned_cache.VersionedPublisher("sub_account")
+    subscriber = versioned_cache.VersionedSubscriber("sub_account")
+
+    subscriber.applying(publisher.building_message(dict(positions=[])))
+    publisher.building_message(dict(positions=[{"instrument_name": "BTC-PERPETUAL"}]))
+
+    assert not subscriber.applying(publisher.building_message(dict(positions=[])))
+
+
+class Redis:
+    def __init__(self):
+        self.hashes = {}
+        self.hsets = 0
+
+    async def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = fields.get(field, 0) + amount
+        return fields[field]
+
+    async def hset(self, key, field, value):
+        self.hsets += 1
+        self.hashes.setdefault(key, {})[field] = value
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+
+@pytest.mark.asyncio
+async def test_publishers_of_a_channel_share_its_sequence(monkeypatch):
+    published = []
+
+    async def publishing_result(client_redis, message):
+        published.append(dict(message["params"]["data"]))
+
+    monkeypatch.setattr(
+        versioned_cache.redis_client, "publishing_result", publishing_result
+    )
+
+    redis = Redis()
+    first = versioned_cache.VersionedPublisher("sub_account")
+    second = versioned_cache.VersionedPublisher("sub_account")
+    subscriber = versioned_cache.VersionedSubscriber("sub_account")
+
+    def publishing(publisher, orders):
+        message = dict(params={})
+        return publisher.publishing(redis, message, dict(open_orders=orders))
+
+    orders = [{"order_id": "1", "amount": 1}]
+
+    await publishing(first, orders)
+    await publishing(first, orders + [{"order_id": "2", "amount": 1}])
+    # the second process removes order 2, unknown to its own state
+    await publishing(second, orders)
+    await publishing(first, orders + [{"order_id": "3", "amount": 1}])
+
+    assert [o["seq"] for o in published] == [1, 2, 3, 4]
+    assert [o["kind"] for o in published] == ["snapshot", "delta"] + ["snapshot"] * 2
+
+    # stored with the snapshots only
+    assert redis.hsets == 3
+
+    for data in published:
+        view = await subscriber.receiving(redis, data)
+
+    assert view == dict(open_orders=orders + [{"order_id": "3", "amount": 1}])
+
+
+@pytest.mark.asyncio
+async def test_subscriber_behind_the_stored_snapshot_waits_for_the_next():
+    redis = Redis()
+    publisher = versioned_cache.VersionedPublisher("sub_account")
+    subscriber = versioned_cache.VersionedSubscriber("sub_account")
+
+    messages = [
+        publisher.building_message(dict(positions=[{"instrument_name": str(o)}]))
+        for o in range(4)
+    ]
+    await redis.hset(
+        versioned_cache.SNAPSHOT_KEY, "sub_account", codecs.sealing(messages[0])
+    )
+
+    # joined late: the stored snapshot misses the delta 2
+    await subscriber.receiving(redis, messages[2])
+
+    assert subscriber.is_behind
+    assert subscriber.view() == dict(positions=[{"instrument_name": "0"}])
+
+    await subscriber.receiving(redis, messages[3])
+    assert redis.hsets == 1
+
+    snapshot = publisher.building_message(dict(positions=[]), seq=100)
+
+    assert await subscriber.receiving(redis, snapshot) == dict(positions=[])
+    assert not subscriber.is_behind
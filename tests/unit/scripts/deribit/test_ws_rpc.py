@@ -0,0 +1,63 @@
+import asyncio
+
+import orjson
+import pytest
+
+from src.scripts.deribit import ws_rpc
+
+
+class EchoSocket:
+    """answers every request with its own id, in reverse order"""
+
+    def __init__(self, client):
+        self.client = client
+        self.sent = []
+
+    async def send(self, raw):
+        self.sent.append(orjson.loads(raw))
+        if len(self.sent) == 2:
+            for msg in reversed(self.sent):
+                self.client.dispatching({"id": msg["id"], "result": msg["params"]})
+
+
+@pytest.mark.asyncio
+async def test_responses_are_matched_by_id():
+    client = ws_rpc.WsRpcClient("id", "secret")
+    client.websocket_client = EchoSocket(client)
+
+    first, second = await asyncio.gather(
+        client.cancel_order("ETH-1"),
+        client.cancel_order("ETH-2"),
+    )
+
+    assert first["result"] == {"order_id": "ETH-1"}
+    assert second["result"] == {"order_id": "ETH-2"}
+    assert not client.pending
+
+
+@pytest.mark.asyncio
+async def test_request_without_connection_is_retriable():
+    client = ws_rpc.WsRpcClient("id", "secret")
+
+    with pytest.raises(ws_rpc.WsNotConnected):
+        await client.cancel_order("ETH-1")
+
+
+class SilentSocket:
+    async def send(self, raw):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_disconnect_after_send_leaves_the_outcome_unknown():
+    client = ws_rpc.WsRpcClient("id", "secret")
+    client.websocket_client = SilentSocket()
+
+    order = asyncio.create_task(client.send_order("buy", {"amount": 10}))
+    await asyncio.sleep(0)
+
+    client.failing_pending(ConnectionError("closed"))
+
+    # not a WsNotConnected: the order must not be resent over REST
+    with pytest.raises(ws_rpc.WsOutcomeUnknown):
+        await order
@@ -0,0 +1,40 @@
+from src.services.cleaner.managing_closed_transactions import (
+    matching_closed_transactions,
+)
+
+
+def trade(trade_id, label, amount, instrument_name="BTC-PERPETUAL"):
+    return dict(
+        trade_id=trade_id,
+        label=label,
+        amount=amount,
+        instrument_name=instrument_name,
+    )
+
+
+def test_one_to_one_pairs_same_size_opposite_sign():
+    transactions = [
+        trade("1", "hedgingSpot-open-100", -10),
+        trade("2", "hedgingSpot-open-100", -10),
+        trade("3", "hedgingSpot-closed-100", 10),
+        trade("4", "hedgingSpot-closed-100", 5),
+        trade("5", "hedgingSpot-open-200", -10),
+    ]
+
+    matched = [o["trade_id"] for o in matching_closed_transactions(transactions)]
+
+    assert sorted(matched) == ["1", "3"]
+
+
+def test_one_to_many_when_label_nets_to_zero():
+    transactions = [
+        trade("1", "futureSpread-open-100", -10),
+        trade("2", "futureSpread-closed-100", 5),
+        trade("3", "futureSpread-closed-100", 5),
+        trade("4", "futureSpread-open-100", 7, "BTC-27JUN25"),
+        trade("5", "futureSpread-closed-100", -7, "BTC-27JUN25"),
+    ]
+
+    matched = [o["trade_id"] for o in matching_closed_transactions(transactions)]
+
+    assert sorted(matched) == ["1", "2", "3", "4", "5"]
@@ -0,0 +1,105 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.services.cleaner import partitioning_db
+from src.services.cleaner.partitioning_db import (
+    DAILY,
+    MONTHLY,
+    PartitionPolicy,
+    planning_partitions,
+    selecting_expired_partitions,
+)
+
+NOW = datetime(2025, 1, 31, 15, 30, tzinfo=timezone.utc)
+
+
+def test_daily_partitions_planned_ahead():
+    plan = planning_partitions(PartitionPolicy("ohlc1_btc_perp", DAILY, ahead=2), NOW)
+
+    assert [o[0] for o in plan] == [
+        "ohlc1_btc_perp_p20250131",
+        "ohlc1_btc_perp_p20250201",
+        "ohlc1_btc_perp_p20250202",
+    ]
+    # contiguous ranges in unix ms
+    assert plan[0][1] == 1738281600000
+    assert plan[0][2] == plan[1][1]
+
+
+def test_partitions_planned_back_to_the_retention_horizon():
+    policy = PartitionPolicy("ohlc1_btc_perp", DAILY, 7, ahead=1)
+
+    plan = planning_partitions(policy, NOW)
+
+    assert plan[0][0] == "ohlc1_btc_perp_p20250124"
+    assert plan[-1][0] == "ohlc1_btc_perp_p20250201"
+    assert len(plan) == 9
+    # the oldest one planned is not expired yet
+    assert selecting_expired_partitions(policy, [o[0] for o in plan], NOW) == []
+
+
+def test_monthly_partitions_roll_over_the_year():
+    plan = planning_partitions(
+        PartitionPolicy("ohlc60_btc_perp", MONTHLY, ahead=12),
+        NOW,
+    )
+
+    assert plan[0][0] == "ohlc60_btc_perp_p202501"
+    assert plan[-1][0] == "ohlc60_btc_perp_p202601"
+
+
+def test_only_fully_expired_partitions_are_dropped():
+    policy = PartitionPolicy("ohlc1_btc_perp", DAILY, 7)
+
+    existing = [
+        "ohlc1_btc_perp_default",
+        "ohlc1_btc_perp_p20250123",
+        "ohlc1_btc_perp_p20250124",
+        "ohlc1_btc_perp_p20250125",
+    ]
+
+    assert selecting_expired_partitions(policy, existing, NOW) == [
+        "ohlc1_btc_perp_p20250123",
+    ]
+
+    assert selecting_expired_partitions(
+        PartitionPolicy("ohlc60_btc_perp", MONTHLY, None),
+        ["ohlc60_btc_perp_p200001"],
+        NOW,
+    ) == []
+
+
+@pytest.mark.asyncio
+async def test_maintenance_detaches_concurrently(monkeypatch):
+    statements = []
+
+    async def fetch(query, *args):
+        return [
+            {"relname": "ohlc1_btc_perp_p20250101", "inhdetachpending": False},
+            {"relname": "ohlc1_btc_perp_p20250102", "inhdetachpending": True},
+        ] + [
+            {"relname": f"ohlc1_btc_perp_p202501{o}", "inhdetachpending": False}
+            for o in range(24, 31)
+        ]
+
+    async def execute(query, *args):
+        statements.append(query)
+
+    monkeypatch.setattr(partitioning_db.postgres_client, "fetch", fetch)
+    monkeypatch.setattr(partitioning_db.postgres_client, "execute", execute)
+
+    result = await partitioning_db.maintaining_partitions(
+        PartitionPolicy("ohlc1_btc_perp", DAILY, 7, ahead=0), NOW
+    )
+
+    assert result == dict(
+        created=["ohlc1_btc_perp_p20250131"],
+        dropped=["ohlc1_btc_perp_p20250101", "ohlc1_btc_perp_p20250102"],
+    )
+
+    detaching = [o for o in statements if "DETACH" in o]
+
+    assert detaching[0].endswith("ohlc1_btc_perp_p20250101 CONCURRENTLY")
+    # an interrupted concurrent detach is completed instead
+    assert detaching[1].endswith("ohlc1_btc_perp_p20250102 FINALIZE")
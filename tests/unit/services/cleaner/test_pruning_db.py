@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+from src.services.cleaner.pruning_db import (
+    DEFAULT_TABLES,
+    POSTGRES,
+    SQLITE,
+    RetentionEngine,
+    RetentionPolicy,
+    get_retention_policy,
+)
+
+
+def creating_ohlc_table(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE ohlc1_btc_perp_json (id INTEGER PRIMARY KEY, tick INTEGER)")
+    conn.executemany(
+        "INSERT INTO ohlc1_btc_perp_json (tick) VALUES (?)",
+        [(tick,) for tick in range(rows)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def counting(path):
+    conn = sqlite3.connect(path)
+    result = conn.execute("SELECT COUNT(*), MIN(tick) FROM ohlc1_btc_perp_json").fetchone()
+    conn.close()
+    return result
+
+
+def test_policy_from_max_rows():
+    policy = get_retention_policy("ohlc1_btc_perp_json")
+
+    assert policy.column == "tick"
+    assert policy.max_rows == 10000
+
+    assert get_retention_policy("supporting_items_json", max_age_ms=1).max_age_ms is None
+
+
+@pytest.mark.asyncio
+async def test_chunked_pruning_converges_in_one_cycle(tmp_path):
+    path = str(tmp_path / "trading.sqlite3")
+    creating_ohlc_table(path, 1_050)
+
+    engine = RetentionEngine(
+        policies=[RetentionPolicy("ohlc1_btc_perp_json", max_rows=100, chunk_size=200)],
+        database=path,
+    )
+
+    result = await engine.running_cycle()
+
+    assert result[0]["rows_pruned"] == 950
+    assert counting(path) == (100, 950)
+
+
+@pytest.mark.asyncio
+async def test_single_statement_pruning_by_age(tmp_path):
+    path = str(tmp_path / "trading.sqlite3")
+    creating_ohlc_table(path, 10)
+
+    engine = RetentionEngine(
+        policies=[
+            RetentionPolicy(
+                "ohlc1_btc_perp_json",
+                max_rows=100,
+                max_age_ms=1,
+                single_statement=True,
+            )
+        ],
+        database=path,
+    )
+
+    result = await engine.running_cycle()
+
+    # ticks are far in the past: everything is expired by age
+    assert result[0]["rows_pruned"] == 10
+    assert counting(path)[0] == 0
+
+
+def test_postgres_defaults_are_postgres_tables():
+    assert "ohlc1_btc_perp" in DEFAULT_TABLES[POSTGRES]
+    assert not [o for o in DEFAULT_TABLES[POSTGRES] if o.endswith("_json")]
+    assert "ohlc1_btc_perp_json" in DEFAULT_TABLES[SQLITE]
@@ -0,0 +1,79 @@
+from src.services.cleaner.reconciling_db import ReconciliationEngine
+
+
+def test_trades_and_positions_reconcile_incrementally():
+    engine = ReconciliationEngine()
+
+    engine.loading_trades(
+        "BTC-PERPETUAL",
+        [dict(trade_id="1", amount=-10), dict(trade_id="2", amount=-5)],
+    )
+    assert not engine.is_reconciled("BTC-PERPETUAL")
+
+    assert engine.updating_positions(
+        [dict(instrument_name="BTC-PERPETUAL", size=-15)]
+    ) == ["BTC-PERPETUAL"]
+    assert engine.is_reconciled("BTC-PERPETUAL")
+
+    # a new fill breaks it until the sub account catches up
+    assert engine.adding_trade(
+        dict(
+            instrument_name="BTC-PERPETUAL",
+            trade_id="3",
+            amount=5,
+            direction="buy",
+        )
+    )
+    assert not engine.is_reconciled("BTC-PERPETUAL")
+
+    assert engine.updating_positions(
+        [dict(instrument_name="BTC-PERPETUAL", size=-10)]
+    ) == ["BTC-PERPETUAL"]
+
+
+def test_status_changes_only_on_transitions():
+    engine = ReconciliationEngine()
+
+    positions = [dict(instrument_name="ETH-PERPETUAL", size=0)]
+
+    assert engine.updating_positions(positions) == ["ETH-PERPETUAL"]
+    assert engine.updating_positions(positions) == []
+
+    trade = dict(instrument_name="ETH-PERPETUAL", trade_id="9", amount=1, direction="sell")
+
+    assert engine.adding_trade(trade)
+    # the same trade seen twice is counted once
+    assert not engine.adding_trade(trade)
+    assert engine.getting("ETH-PERPETUAL").my_trades_size == -1
+
+    assert engine.removing_trade("ETH-PERPETUAL", "9")
+    assert engine.is_reconciled("ETH-PERPETUAL")
+
+
+def test_instrument_whose_trades_all_closed_is_reset():
+    engine = ReconciliationEngine()
+
+    engine.loading_trades("BTC-PERPETUAL", [dict(trade_id="1", amount=-10)])
+    engine.loading_trades("BTC-27JUN25", [dict(trade_id="2", amount=10)])
+    engine.loading_trades("ETH-PERPETUAL", [dict(trade_id="3", amount=-1)])
+    engine.updating_positions(
+        [
+            dict(instrument_name="BTC-PERPETUAL", size=-10),
+            dict(instrument_name="BTC-27JUN25", size=10),
+            dict(instrument_name="ETH-PERPETUAL", size=-1),
+        ]
+    )
+
+    # the BTC-PERPETUAL position is flat, its trade not closed yet
+    assert engine.updating_positions(
+        [
+            dict(instrument_name="BTC-27JUN25", size=10),
+            dict(instrument_name="ETH-PERPETUAL", size=-1),
+        ]
+    ) == ["BTC-PERPETUAL"]
+    assert not engine.is_reconciled("BTC-PERPETUAL")
+
+    # then closed: no active trade left to load, the total is reset
+    assert engine.closing_instruments("BTC", ["BTC-27JUN25"]) == ["BTC-PERPETUAL"]
+    assert engine.getting("BTC-PERPETUAL").my_trades_size == 0
+    assert all(engine.is_reconciled(o) for o in engine.instruments)
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from src.services.distributor.deribit import allocating_ohlc, distributing_ws_data
+
+MINUTE = 60_000
+
+
+@pytest.mark.asyncio
+async def test_refills_run_in_the_background_holding_their_chart(monkeypatch):
+    caught_up, upserted = [], []
+    refilled = asyncio.Event()
+
+    async def fetch_value(query):
+        assert "ohlc1_btc_perp" in query
+        return 0
+
+    async def catching_up(currency, instruments_name, resolutions, **kwargs):
+        assert kwargs["table_name"] == allocating_ohlc.TABLE_OHLC
+        caught_up.append(kwargs["now"] // MINUTE)
+        await refilled.wait()
+
+    async def upsert_ohlc(table, candles):
+        upserted.extend((table, o["tick"] // MINUTE) for o in candles)
+
+    monkeypatch.setattr(allocating_ohlc.postgres_client, "fetch_value", fetch_value)
+    monkeypatch.setattr(allocating_ohlc.postgres_client, "upsert_ohlc", upsert_ohlc)
+    monkeypatch.setattr(allocating_ohlc, "catching_up", catching_up)
+
+    state = distributing_ws_data.get_initial_state()
+
+    async def handling(tick):
+        await distributing_ws_data.handle_chart(
+            "btc", "chart.trades.BTC-PERPETUAL.1", dict(tick=tick * MINUTE), state
+        )
+
+    # first candle since start: the refill runs, the chart candles are held
+    await handling(10)
+    await handling(11)
+    await asyncio.sleep(0)
+
+    assert caught_up == [10]
+    assert upserted == []
+
+    refilled.set()
+    await asyncio.gather(*state["ohlc"]["refills"].values())
+
+    assert upserted == [("ohlc1_btc_perp", 10), ("ohlc1_btc_perp", 11)]
+    assert not state["ohlc"]["refills"] and not state["ohlc"]["held"]
+
+    # the next minute goes straight in, a jump over two refills again
+    await handling(12)
+    await handling(15)
+    await asyncio.gather(*state["ohlc"]["refills"].values())
+
+    assert caught_up == [10, 15]
+    assert [o for _, o in upserted] == [10, 11, 12, 15]
+
+    # no table for the daily chart
+    await distributing_ws_data.handle_chart(
+        "btc", "chart.trades.BTC-PERPETUAL.1D", dict(tick=0), state
+    )
+
+    assert len(upserted) == 4
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from src.services.distributor.deribit import catching_up_ohlc
+from src.services.distributor.deribit.catching_up_ohlc import (
+    catching_up,
+    finding_gaps,
+    splitting,
+)
+
+MINUTE = 60_000
+
+
+def test_finding_gaps():
+    ticks = [0, MINUTE, 4 * MINUTE, 5 * MINUTE]
+
+    assert finding_gaps(ticks, 1, 0, 8 * MINUTE) == [
+        (2 * MINUTE, 3 * MINUTE),
+        (6 * MINUTE, 8 * MINUTE),
+    ]
+    assert finding_gaps(ticks, 1, 0, 5 * MINUTE) == [(2 * MINUTE, 3 * MINUTE)]
+    assert finding_gaps([], 5, 0, 20 * MINUTE) == [(0, 20 * MINUTE)]
+
+    assert splitting([(0, 9 * MINUTE)], 1, max_candles=4) == [
+        (0, 3 * MINUTE),
+        (4 * MINUTE, 7 * MINUTE),
+        (8 * MINUTE, 9 * MINUTE),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_catching_up_fetches_gaps_concurrently(monkeypatch):
+    stored = [{"tick": o * MINUTE} for o in range(10) if o not in (2, 4, 7)]
+    upserted = {}
+    running, peak = 0, 0
+
+    async def fetch(query, start_tick):
+        return [o for o in stored if o["tick"] >= start_tick]
+
+    async def upsert_ohlc(table, candles):
+        upserted[table] = candles
+
+    async def fetching_candles(instrument_name, resolution, first, last):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [
+            dict(tick=tick, open=1, high=1, low=1, close=1)
+            for tick in range(first, last + 1, resolution * MINUTE)
+        ]
+
+    monkeypatch.setattr(catching_up_ohlc.postgres_client, "fetch", fetch)
+    monkeypatch.setattr(catching_up_ohlc.postgres_client, "upsert_ohlc", upsert_ohlc)
+    monkeypatch.setattr(catching_up_ohlc, "fetching_candles", fetching_candles)
+
+    refilled = await catching_up(
+        "BTC",
+        ["BTC-PERPETUAL"],
+        [1],
+        lookback_minutes=9,
+        max_workers=2,
+        now=9 * MINUTE + 30_000,
+    )
+
+    assert refilled == {("BTC-PERPETUAL", 1): 3}
+    assert sorted(o["tick"] for o in upserted["ohlc1_btc_perp"]) == [
+        2 * MINUTE,
+        4 * MINUTE,
+        7 * MINUTE,
+    ]
+    assert peak == 2
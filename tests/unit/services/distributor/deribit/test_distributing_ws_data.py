@@ -0,0 +1,52 @@
+import pytest
+
+from core.db.redis import CustomRedisClient
+from core.latency import (
+    HANDLER_END,
+    HANDLER_START,
+    WS_RECEIVE,
+    XREADGROUP,
+    latency_tracer,
+)
+from src.services.distributor.deribit import distributing_ws_data
+from src.shared.config.constants import RedisChannels
+
+
+@pytest.mark.asyncio
+async def test_ticker_publish_carries_the_stream_trace(monkeypatch):
+    published = []
+
+    async def publishing_result(client_redis, message):
+        data = message["params"]["data"]
+        published.append((message["params"]["channel"], dict(data["trace"])))
+
+    monkeypatch.setattr(distributing_ws_data, "publishing_result", publishing_result)
+
+    encoded = CustomRedisClient.encode_stream_message(
+        dict(
+            channel="incremental_ticker.BTC-PERPETUAL",
+            data=dict(instrument_name="BTC-PERPETUAL", timestamp=1, mark_price=1.0),
+            trace=latency_tracer.starting(WS_RECEIVE),
+        ),
+        "json",
+    )
+    # as read back by XREADGROUP
+    message_data = {
+        key.encode(): value if isinstance(value, bytes) else value.encode()
+        for key, value in encoded.items()
+    }
+
+    state = distributing_ws_data.get_initial_state()
+
+    assert await distributing_ws_data.process_message("1-0", message_data, state)
+
+    # published once per batch, not per entry
+    assert not published
+
+    await distributing_ws_data.publishing_tickers(state)
+
+    channel, trace = published[0]
+
+    assert channel == RedisChannels.TICKER_CACHE_UPDATING
+    assert list(trace) == [WS_RECEIVE, XREADGROUP, HANDLER_START, HANDLER_END]
+    assert not state["ticker_traces"]
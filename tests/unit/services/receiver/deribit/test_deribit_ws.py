@@ -1,6 +1,8 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
+from core.latency import XADD, LatencyTracer
 from src.services.receiver.deribit import deribit_ws
+from src.shared.utils.resampling import OhlcResampler
 
 
 @pytest.mark.asyncio
@@ -21,3 +23,95 @@ async def test_authentication_flow(mocker):
         '"params": {"grant_type": "client_credentials", '
         '"client_id": "test_id", "client_secret": "test_secret"}}'
     )
+
+
+@pytest.mark.asyncio
+async def test_subscription_list_with_resampler():
+    stream = deribit_ws.StreamingAccountData(
+        sub_account_id="test",
+        client_id="test_id",
+        client_secret="test_secret",
+        resampler=OhlcResampler([1, 5, 15, 60]),
+    )
+
+    channels = stream.generate_subscription_list(["BTC-PERPETUAL"], [1, 5, 15, 60])
+
+    assert [o for o in channels if o.startswith("chart.trades.")] == [
+        "chart.trades.BTC-PERPETUAL.1"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_resampler_is_seeded_again_on_each_connection(monkeypatch):
+    minute = 60_000
+    resampler = OhlcResampler([1, 5])
+
+    stream = deribit_ws.StreamingAccountData(
+        sub_account_id="test",
+        client_id="test_id",
+        client_secret="test_secret",
+        resampler=resampler,
+    )
+
+    def get_candle(tick, price):
+        return dict(
+            tick=tick, open=price, high=price, low=price, close=price, volume=1, cost=1
+        )
+
+    for i in range(3):
+        resampler.updating("BTC-PERPETUAL", get_candle(i * minute, 100))
+
+    # disconnected during minutes 3 and 4, reconnected within minute 5
+    async def failing(*args, **kwargs):
+        raise ConnectionError("rest down")
+
+    monkeypatch.setattr(deribit_ws.end_point_params_template, "get_ohlc", failing)
+
+    await stream.seeding_resampler(["BTC-PERPETUAL", "BTC-27JUN25"])
+
+    # the bucket forming is skipped, not built from the minutes after the gap
+    assert resampler.updating("BTC-PERPETUAL", get_candle(4 * minute, 90)) == []
+
+    async def get_ohlc(instrument_name, resolution, qty, qty_as_start_time_stamp):
+        candles = [get_candle(i * minute, 100 - i) for i in range(5)]
+        return {
+            "ticks": [o["tick"] for o in candles],
+            **{key: [o[key] for o in candles] for key in candles[0] if key != "tick"},
+        }
+
+    monkeypatch.setattr(deribit_ws.end_point_params_template, "get_ohlc", get_ohlc)
+
+    await stream.seeding_resampler(["BTC-PERPETUAL"])
+
+    [(resolution, candle)] = resampler.updating(
+        "BTC-PERPETUAL", get_candle(4 * minute, 90)
+    )
+
+    assert resolution == 5
+    assert (candle["open"], candle["high"], candle["low"]) == (100, 100, 90)
+
+
+@pytest.mark.asyncio
+async def test_retried_batch_is_stamped_once(monkeypatch):
+    monkeypatch.setattr(LatencyTracer, "_instance", None)
+    tracer = LatencyTracer()
+    monkeypatch.setattr(deribit_ws, "latency_tracer", tracer)
+
+    stream = deribit_ws.StreamingAccountData(
+        sub_account_id="test", client_id="test_id", client_secret="test_secret"
+    )
+
+    client_redis = AsyncMock()
+    client_redis.xadd_bulk.side_effect = [ConnectionError, None]
+
+    batch = [{"channel": "ticker", "trace": tracer.starting()} for _ in range(3)]
+
+    with pytest.raises(ConnectionError):
+        await stream.sending_batch(client_redis, batch)
+
+    assert XADD not in tracer.stats()["stages"]
+
+    await stream.sending_batch(client_redis, batch)
+
+    assert tracer.stats()["stages"][XADD]["count"] == 3
+    assert all(XADD in o["trace"] for o in batch)
@@ -0,0 +1,46 @@
+import glob
+import os
+
+from src.services.receiver.deribit.recording_frames import (
+    FrameRecorder,
+    reading_frames,
+    reading_manifest,
+)
+
+
+def test_frames_are_read_back_in_order_across_segments(tmp_path):
+    path = str(tmp_path / "session")
+
+    recorder = FrameRecorder(
+        path,
+        dict(instruments=[{"instrument_name": "BTC-PERPETUAL"}]),
+        segment_frames=4,
+        flush_frames=2,
+    )
+
+    frames = [(i, f'{{"id": {i},\n"text": "a\\tb"}}') for i in range(10)]
+
+    for received_ns, frame in frames:
+        recorder.recording(received_ns, frame)
+
+    recorder.closing()
+
+    assert recorder.recorded == 10
+    assert len(glob.glob(os.path.join(path, "segment_*.frames.gz"))) == 3
+
+    assert list(reading_frames(path)) == [
+        (received_ns, frame.replace("\n", " ")) for received_ns, frame in frames
+    ]
+    assert reading_manifest(path)["instruments"][0]["instrument_name"] == "BTC-PERPETUAL"
+
+
+def test_a_new_recorder_continues_after_existing_segments(tmp_path):
+    path = str(tmp_path)
+
+    for start in (0, 5):
+        recorder = FrameRecorder(path)
+        for i in range(start, start + 5):
+            recorder.recording(i, f'{{"id": {i}}}')
+        recorder.closing()
+
+    assert [o[0] for o in reading_frames(path)] == list(range(10))
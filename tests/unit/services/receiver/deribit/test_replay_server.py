@@ -0,0 +1,74 @@
+import asyncio
+
+import orjson
+import pytest
+import websockets
+
+from src.services.receiver.deribit.recording_frames import FrameRecorder
+from src.services.receiver.deribit.replay_server import ReplayServer
+
+TICKER = "incremental_ticker.BTC-PERPETUAL"
+
+
+def notification(channel, i):
+    return orjson.dumps(
+        {
+            "jsonrpc": "2.0",
+            "method": "subscription",
+            "params": {"channel": channel, "data": {"i": i}},
+        }
+    ).decode()
+
+
+@pytest.mark.asyncio
+async def test_subscribed_channels_are_replayed_as_recorded(tmp_path):
+    path = str(tmp_path)
+
+    recorder = FrameRecorder(
+        path,
+        dict(
+            instruments=[{"instrument_name": "BTC-PERPETUAL", "base_currency": "BTC"}]
+        ),
+    )
+    recorder.recording(0, '{"jsonrpc": "2.0", "id": 9929, "result": {}}')
+    for i in range(6):
+        channel = "chart.trades.BTC-PERPETUAL.1" if i % 2 else TICKER
+        recorder.recording(i * 1_000_000, notification(channel, i))
+    recorder.closing()
+
+    replay = ReplayServer(path, speed=0)
+
+    assert [o["instrument_name"] for o in replay.getting_instruments("btc")] == [
+        "BTC-PERPETUAL"
+    ]
+    assert replay.getting_instruments("ETH") == []
+
+    async with websockets.serve(replay.handling_connection, "127.0.0.1", 0) as server:
+
+        port = list(server.sockets)[0].getsockname()[1]
+
+        async with websockets.connect(f"ws://127.0.0.1:{port}") as client:
+
+            await client.send(
+                orjson.dumps({"id": 9929, "method": "public/auth", "params": {}})
+            )
+            auth = orjson.loads(await client.recv())
+
+            await client.send(
+                orjson.dumps(
+                    {
+                        "id": 7,
+                        "method": "private/subscribe",
+                        "params": {"channels": [TICKER]},
+                    }
+                )
+            )
+
+            received = [await asyncio.wait_for(client.recv(), 1) for _ in range(4)]
+
+    responses = [orjson.loads(o) for o in received if '"id"' in o]
+    notifications = [o for o in received if '"id"' not in o]
+
+    assert auth["result"]["refresh_token"]
+    assert [o["result"] for o in responses] == [[TICKER]]
+    assert notifications == [notification(TICKER, i) for i in (0, 2, 4)]
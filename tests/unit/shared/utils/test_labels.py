@@ -0,0 +1,30 @@
+from src.shared.utils import labels
+
+
+def test_parsed_label():
+    parsed = labels.parsed_label("futureSpreadLong-closed-1729232152632")
+
+    assert parsed.main == "futureSpreadLong"
+    assert parsed.super_main == "futureSpread"
+    assert parsed.side == "Long"
+    assert parsed.status == "closed"
+    assert parsed.int == "1729232152632"
+    assert parsed.closed_to_open == "futureSpreadLong-open-1729232152632"
+    assert parsed.flipping_closed(1) == "futureSpreadShort-open-1"
+    assert parsed is labels.parsed_label("futureSpreadLong-closed-1729232152632")
+
+
+def test_label_index():
+    transactions = [
+        {"label": "hedgingSpot-open-1", "amount": -10},
+        {"label": "hedgingSpot-closed-1", "amount": 10},
+        {"label": "hedgingSpot-open-2", "amount": -5},
+        {"label": "futureSpread-open-1", "amount": 3},
+        {"label": None, "amount": 1},
+    ]
+
+    index = labels.LabelIndex(transactions)
+
+    assert index.under_main_and_int("hedgingSpot-closed-1") == transactions[:2]
+    assert len(index.under_int("x-open-1")) == 3
+    assert len(index.under_main("hedgingSpot")) == 3
@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from src.shared.utils import resampling
+from src.shared.utils.time_modification import resampling_time_frame
+
+START = 1_700_000_000_000 - 1_700_000_000_000 % 3_600_000
+
+
+def get_minutes(count: int) -> list:
+    random.seed(7)
+
+    candles, close = [], 30_000.0
+
+    for i in range(count):
+        open, close = close, close + random.uniform(-20, 20)
+        candles.append(
+            dict(
+                tick=START + i * resampling.ONE_MINUTE,
+                open=open,
+                high=max(open, close) + random.uniform(0, 5),
+                low=min(open, close) - random.uniform(0, 5),
+                close=close,
+                volume=random.uniform(0, 3),
+                cost=random.uniform(0, 90_000),
+            )
+        )
+
+    return candles
+
+
+def test_resampling():
+    candles = get_minutes(12)
+
+    five = resampling.resampling(list(reversed(candles)), 5)
+
+    assert [o["tick"] for o in five] == [START, START + 300_000, START + 600_000]
+    assert five[0]["open"] == candles[0]["open"]
+    assert five[0]["close"] == candles[4]["close"]
+    assert five[0]["high"] == max(o["high"] for o in candles[:5])
+    assert five[0]["low"] == min(o["low"] for o in candles[:5])
+    assert five[0]["volume"] == pytest.approx(sum(o["volume"] for o in candles[:5]))
+    assert five[2]["close"] == candles[11]["close"]
+
+    assert resampling_time_frame(candles, "5min") == five
+    assert resampling_time_frame(candles, "1h")[0]["tick"] == START
+    assert resampling.get_subscribed_resolutions([1, 5, 15, 60, "1D"]) == [1, "1D"]
+
+
+def test_ohlc_resampler_matches_resampling():
+    candles = get_minutes(150)
+
+    resampler = resampling.OhlcResampler([5, 15, 60])
+
+    live = {5: {}, 15: {}, 60: {}}
+
+    for candle in candles:
+        # a minute is updated while it forms, then closed
+        forming = dict(candle, high=candle["open"], low=candle["open"])
+        forming["close"] = candle["open"]
+
+        for minute in (forming, candle):
+            for resolution, resampled in resampler.updating("BTC-PERPETUAL", minute):
+                live[resolution][resampled["tick"]] = resampled
+
+    for resolution in (5, 15, 60):
+        batch = resampling.resampling(candles, resolution)
+
+        assert len(live[resolution]) == len(batch)
+
+        for expected in batch:
+            candle = live[resolution][expected["tick"]]
+
+            for key in ("open", "high", "low", "close"):
+                assert candle[key] == expected[key]
+
+            assert candle["volume"] == pytest.approx(expected["volume"])
+
+    assert len(resampler.minutes["BTC-PERPETUAL"]) <= 121
+
+
+def test_ohlc_resampler_skips_the_buckets_started_before_it():
+    candles = get_minutes(20)
+
+    # started in the middle of the first 15 minutes bucket
+    resampler = resampling.OhlcResampler([5, 15])
+
+    published = [
+        resolution
+        for candle in candles[7:]
+        for resolution, _ in resampler.updating("BTC-PERPETUAL", candle)
+    ]
+
+    assert published.count(15) == len(candles[15:])
+    assert published.count(5) == len(candles[10:])
+
+    # seeded with the minutes already past, every bucket is whole
+    resampler = resampling.OhlcResampler([5, 15])
+    resampler.seeding("BTC-PERPETUAL", candles[:7])
+
+    resampled = resampler.updating("BTC-PERPETUAL", candles[7])
+
+    assert resampled[1] == (15, resampling.resampling(candles[:8], 15)[0])